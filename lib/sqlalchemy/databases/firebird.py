@@ -594,7 +594,7 @@ class FBCompiler(sql.compiler.DefaultCompiler):
         return " FROM rdb$database"
 
     def visit_sequence(self, seq):
-        return "gen_id(%s, 1)" % self.preparer.format_sequence(seq)
+        return "gen_id(%s, %d)" % (self.preparer.format_sequence(seq), seq.prefetch or 1)
 
     def get_select_precolumns(self, select):
         """Called when building a ``SELECT`` statement, position is just
@@ -703,10 +703,18 @@ class FBDefaultRunner(base.DefaultRunner):
     """Firebird specific idiosincrasies"""
 
     def visit_sequence(self, seq):
-        """Get the next value from the sequence using ``gen_id()``."""
+        """Get the next value from the sequence using ``gen_id()``.
 
-        return self.execute_string("SELECT gen_id(%s, 1) FROM rdb$database" % \
-            self.dialect.identifier_preparer.format_sequence(seq))
+        Generators have no increment of their own; with ``prefetch``,
+        ``gen_id()`` advances the generator by a whole block, returning its
+        last value.
+        """
+
+        step = seq.prefetch or 1
+        def fetch():
+            return self.execute_string("SELECT gen_id(%s, %d) FROM rdb$database" % \
+                (self.dialect.identifier_preparer.format_sequence(seq), step)) - step + 1
+        return self.fire_sequence(seq, fetch)
 
 
 RESERVED_WORDS = set(
@@ -885,8 +885,8 @@ class MaxDBDefaultRunner(engine_base.DefaultRunner):
     def visit_sequence(self, seq):
         if seq.optional:
             return None
-        return self.execute_string("SELECT %s.NEXTVAL FROM DUAL" % (
-            self.dialect.identifier_preparer.format_sequence(seq)))
+        return self.fire_sequence(seq, lambda: self.execute_string("SELECT %s.NEXTVAL FROM DUAL" % (
+            self.dialect.identifier_preparer.format_sequence(seq))))
 
 
 class MaxDBIdentifierPreparer(compiler.IdentifierPreparer):
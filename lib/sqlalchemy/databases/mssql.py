@@ -860,6 +860,7 @@ class MSSQLDialect(default.DefaultDialect):
     use_scope_identity = False
     has_window_funcs = False
     max_identifier_length = 128
+    max_bind_params = 2000
     schema_name = "dbo"
 
     colspecs = {
@@ -1445,6 +1445,7 @@ class MySQLDialect(default.DefaultDialect):
     supports_unicode_statements = False
     # identifiers are 64, however aliases can be 255...
     max_identifier_length = 255
+    supports_tuple_in = True
     supports_sane_rowcount = True
     default_paramstyle = 'format'
 
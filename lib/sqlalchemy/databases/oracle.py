@@ -363,6 +363,8 @@ class OracleDialect(default.DefaultDialect):
     supports_alter = True
     supports_unicode_statements = False
     max_identifier_length = 30
+    max_bind_params = 1000
+    supports_tuple_in = True
     supports_sane_rowcount = True
     supports_sane_multi_rowcount = False
     preexecute_pk_sequences = True
@@ -869,6 +871,8 @@ class OracleSchemaGenerator(compiler.SchemaGenerator):
     def visit_sequence(self, sequence):
         if not self.checkfirst  or not self.dialect.has_sequence(self.connection, sequence.name, sequence.schema):
             self.append("CREATE SEQUENCE %s" % self.preparer.format_sequence(sequence))
+            if sequence.increment is not None:
+                self.append(" INCREMENT BY %d" % sequence.increment)
             self.execute()
 
 class OracleSchemaDropper(compiler.SchemaDropper):
@@ -879,7 +883,8 @@ class OracleSchemaDropper(compiler.SchemaDropper):
 
 class OracleDefaultRunner(base.DefaultRunner):
     def visit_sequence(self, seq):
-        return self.execute_string("SELECT " + self.dialect.identifier_preparer.format_sequence(seq) + ".nextval FROM DUAL", {})
+        return self.fire_sequence(seq, lambda:
+            self.execute_string("SELECT " + self.dialect.identifier_preparer.format_sequence(seq) + ".nextval FROM DUAL", {}))
 
 class OracleIdentifierPreparer(compiler.IdentifierPreparer):
     def format_savepoint(self, savepoint):
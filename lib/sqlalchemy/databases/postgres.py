@@ -194,11 +194,12 @@ class PGBoolean(sqltypes.Boolean):
         return "BOOLEAN"
 
 class PGArray(sqltypes.MutableType, sqltypes.Concatenable, sqltypes.TypeEngine):
-    def __init__(self, item_type, mutable=True):
+    def __init__(self, item_type, mutable=True, digest=False):
         if isinstance(item_type, type):
             item_type = item_type()
         self.item_type = item_type
         self.mutable = mutable
+        self.digest = digest
 
     def copy_value(self, value):
         if value is None:
@@ -208,6 +209,12 @@ class PGArray(sqltypes.MutableType, sqltypes.Concatenable, sqltypes.TypeEngine):
         else:
             return value
 
+    def uses_digest(self):
+        return self.mutable and self.digest
+
+    def serialize_value(self, value):
+        return util.pickle.dumps(list(value), 2)
+
     def compare_values(self, x, y):
         return x == y
 
@@ -333,6 +340,7 @@ class PGDialect(default.DefaultDialect):
     supports_alter = True
     supports_unicode_statements = False
     max_identifier_length = 63
+    supports_tuple_in = True
     supports_sane_rowcount = True
     supports_sane_multi_rowcount = False
     preexecute_pk_sequences = True
@@ -796,6 +804,8 @@ class PGSchemaGenerator(compiler.SchemaGenerator):
     def visit_sequence(self, sequence):
         if not sequence.optional and (not self.checkfirst or not self.dialect.has_sequence(self.connection, sequence.name)):
             self.append("CREATE SEQUENCE %s" % self.preparer.format_sequence(sequence))
+            if sequence.increment is not None:
+                self.append(" INCREMENT BY %d" % sequence.increment)
             self.execute()
 
     def visit_index(self, index):
@@ -848,7 +858,8 @@ class PGDefaultRunner(base.DefaultRunner):
 
     def visit_sequence(self, seq):
         if not seq.optional:
-            return self.execute_string(("select nextval('%s')" % self.dialect.identifier_preparer.format_sequence(seq)))
+            return self.fire_sequence(seq, lambda:
+                self.execute_string(("select nextval('%s')" % self.dialect.identifier_preparer.format_sequence(seq))))
         else:
             return None
 
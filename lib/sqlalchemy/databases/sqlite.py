@@ -350,6 +350,7 @@ class SQLiteExecutionContext(default.DefaultExecutionContext):
 class SQLiteDialect(default.DefaultDialect):
     name = 'sqlite'
     supports_alter = False
+    max_bind_params = 999
     supports_unicode_statements = True
     default_paramstyle = 'qmark'
     supports_default_values = True
@@ -76,6 +76,14 @@ class Dialect(object):
     max_identifier_length
       The maximum length of identifier names.
 
+    max_bind_params
+      The maximum number of bind parameters the ORM places within a
+      single statement, such as the ``IN`` clause of a batched ``DELETE``.
+
+    supports_tuple_in
+      Indicate whether the database accepts a row value constructor on
+      the left side of ``IN``, i.e. ``(a, b) IN ((1, 2), (3, 4))``.
+
     supports_unicode_statements
       Indicate whether the DB-API can receive SQL statements as Python unicode strings
 
@@ -529,6 +537,9 @@ class Connection(Connectable):
         self.__savepoint_seq = 0
         self.__branch = _branch
         self.__invalid = False
+        # the number of Sequence values fetched from the database, as
+        # opposed to those handed out from a prefetched block
+        self._sequence_fetches = 0
         
     def _branch(self):
         """Return a new Connection which references this Connection's
@@ -1098,6 +1109,10 @@ class Engine(Connectable):
         self.echo = echo
         self.engine = self
         self.logger = log.instance_logger(self, echoflag=echo)
+        # blocks of values reserved from Sequences with "prefetch",
+        # keyed on schema and sequence name
+        self._sequence_blocks = {}
+        self._sequence_mutex = util.threading.Lock()
         if proxy:
             self.Connection = _proxy_connection_cls(Connection, proxy)
         else:
@@ -1840,6 +1855,34 @@ class DefaultRunner(schema.SchemaVisitor):
     def visit_sequence(self, seq):
         return None
 
+    def fire_sequence(self, seq, fetch):
+        """Return the next value of ``seq``, using ``fetch`` to retrieve a
+        value from the database.
+
+        For a Sequence with ``prefetch``, each value retrieved begins a block
+        of ``prefetch`` values, reserved for the Engine and handed out in
+        turn before ``fetch`` is called again.  Each call to ``fetch`` is
+        counted within the ``_sequence_fetches`` of the Connection.
+        """
+
+        if not seq.prefetch:
+            self.context.root_connection._sequence_fetches += 1
+            return fetch()
+
+        engine = self.context.engine
+        key = (seq.schema, seq.name)
+        engine._sequence_mutex.acquire()
+        try:
+            value, limit = engine._sequence_blocks.get(key, (None, None))
+            if value is None or value >= limit:
+                self.context.root_connection._sequence_fetches += 1
+                value = fetch()
+                limit = value + seq.prefetch
+            engine._sequence_blocks[key] = (value + 1, limit)
+            return value
+        finally:
+            engine._sequence_mutex.release()
+
     def exec_default_sql(self, default):
         conn = self.context.connection
         c = expression.select([default.arg]).compile(bind=conn)
@@ -31,6 +31,8 @@ class DefaultDialect(base.Dialect):
     supports_alter = True
     supports_unicode_statements = False
     max_identifier_length = 9999
+    max_bind_params = 500
+    supports_tuple_in = False
     supports_sane_rowcount = True
     supports_sane_multi_rowcount = True
     preexecute_pk_sequences = False
@@ -346,6 +348,9 @@ class DefaultExecutionContext(base.ExecutionContext):
                             param[c.key] = val
                 self.compiled_parameters = params
 
+            self.postfetch_cols = self.compiled.postfetch
+            self.prefetch_cols = self.compiled.prefetch
+
         else:
             compiled_parameters = self.compiled_parameters[0]
             drunner = self.dialect.defaultrunner(self)
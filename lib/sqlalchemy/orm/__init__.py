@@ -48,7 +48,16 @@ from sqlalchemy.orm.properties import (
 from sqlalchemy.orm import mapper as mapperlib
 from sqlalchemy.orm.mapper import reconstructor, validates
 from sqlalchemy.orm import strategies
+from sqlalchemy.orm.identity import IdentityCache
 from sqlalchemy.orm.query import AliasOption, Query
+from sqlalchemy.orm.caching import (
+     CacheBackend,
+     FileBackend,
+     MemcachedBackend,
+     MemoryBackend,
+     QueryCache,
+     )
+from sqlalchemy.orm.uowprofiler import FlushProfiler
 from sqlalchemy.sql import util as sql_util
 from sqlalchemy.orm.session import Session as _Session
 from sqlalchemy.orm.session import object_session, sessionmaker
@@ -58,12 +67,19 @@ from sqlalchemy import util as sa_util
 
 __all__ = (
     'EXT_CONTINUE',
+    'CacheBackend',
     'EXT_STOP',
+    'FileBackend',
+    'FlushProfiler',
+    'IdentityCache',
     'InstrumentationManager',
     'MapperExtension',
+    'MemcachedBackend',
+    'MemoryBackend',
     'Validator',
     'PropComparator',
     'Query',
+    'QueryCache',
     'aliased',
     'backref',
     'class_mapper',
@@ -374,6 +390,11 @@ def relation(argument, secondary=None, **kwargs):
       used for self-referential relationships, indicates the column or
       list of columns that form the "remote side" of the relationship.
 
+    :param secondary_batch_size=500:
+      the maximum number of association rows inserted, updated or
+      deleted by a single statement when a many-to-many relation is
+      flushed.  Larger sets of rows are sent in several statements.
+
     :param secondaryjoin:
       a ClauseElement that will be used as the join of an association
       table to the child object. By default, this value is computed
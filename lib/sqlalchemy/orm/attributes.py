@@ -111,7 +111,10 @@ class QueryableAttribute(interfaces.PropComparator):
             self.property = None
 
     def get_history(self, instance, **kwargs):
-        return self.impl.get_history(instance_state(instance), **kwargs)
+        state = instance_state(instance)
+        if state.generation.expired:
+            state.expire_generation()
+        return self.impl.get_history(state, **kwargs)
 
     def __selectable__(self):
         # TODO: conditionally attach this method based on clause_element ?
@@ -330,6 +333,8 @@ class AttributeImpl(object):
         resulting value will be set as the new value for this attribute.
         """
 
+        if state.generation.expired:
+            state.expire_generation()
         try:
             return state.dict[self.key]
         except KeyError:
@@ -391,6 +396,9 @@ class ScalarAttributeImpl(AttributeImpl):
 
     def delete(self, state):
 
+        if state.generation.expired:
+            state.expire_generation()
+
         # TODO: catch key errors, convert to attributeerror?
         if self.active_history or self.extensions:
             old = self.get(state)
@@ -413,6 +421,9 @@ class ScalarAttributeImpl(AttributeImpl):
         if initiator is self:
             return
 
+        if state.generation.expired:
+            state.expire_generation()
+
         if self.active_history or self.extensions:
             old = self.get(state)
         else:
@@ -449,20 +460,34 @@ class MutableScalarAttributeImpl(ScalarAttributeImpl):
 
     def __init__(self, class_, key, callable_,
                     class_manager, copy_function=None,
-                    compare_function=None, **kwargs):
+                    compare_function=None, digest_function=None, **kwargs):
         super(ScalarAttributeImpl, self).__init__(class_, key, callable_,
                                 class_manager, compare_function=compare_function, **kwargs)
         class_manager.mutable_attributes.add(key)
         if copy_function is None:
             raise sa_exc.ArgumentError("MutableScalarAttributeImpl requires a copy function")
         self.copy = copy_function
+        self.digest = digest_function
 
     def get_history(self, state, passive=PASSIVE_OFF):
-        return History.from_attribute(
-            self, state, state.dict.get(self.key, NO_VALUE))
+        current = state.dict.get(self.key, NO_VALUE)
+        if self.digest is not None and current is not NO_VALUE and \
+                self.key not in state.committed_state and \
+                state.committed_digests and self.key in state.committed_digests:
+            # only a digest of the committed value is retained
+            if self.digest(current) == state.committed_digests[self.key]:
+                return History((), [current], ())
+            else:
+                return History([current], (), ())
+        return History.from_attribute(self, state, current)
 
     def commit_to_state(self, state, dest):
-        dest[self.key] = self.copy(state.dict[self.key])
+        if self.digest is not None:
+            if state.committed_digests is None:
+                state.committed_digests = {}
+            state.committed_digests[self.key] = self.digest(state.dict[self.key])
+        else:
+            dest[self.key] = self.copy(state.dict[self.key])
 
     def check_mutable_modified(self, state):
         (added, unchanged, deleted) = self.get_history(state, passive=PASSIVE_NO_INITIALIZE)
@@ -472,6 +497,9 @@ class MutableScalarAttributeImpl(ScalarAttributeImpl):
         if initiator is self:
             return
 
+        if state.generation.expired:
+            state.expire_generation()
+
         state.modified_event(self, True, NEVER_SET)
 
         if self.extensions:
@@ -617,6 +645,9 @@ class CollectionAttributeImpl(AttributeImpl):
             ext.remove(state, value, initiator or self)
 
     def delete(self, state):
+        if state.generation.expired:
+            state.expire_generation()
+
         if self.key not in state.dict:
             return
 
@@ -791,6 +822,16 @@ class GenericBackrefExtension(interfaces.AttributeExtension):
             child_state.get_impl(self.key).remove(child_state, state.obj(), initiator, passive=PASSIVE_NO_CALLABLES)
 
 
+class Generation(object):
+    """A marker shared among InstanceStates which are expired together.
+
+    Setting ``expired`` expires each InstanceState referencing the
+    marker as its attributes are next accessed, so that a large number
+    of instances can be expired in constant time.
+
+    """
+    expired = False
+
 class InstanceState(object):
     """tracks state information at the instance level."""
 
@@ -799,6 +840,11 @@ class InstanceState(object):
     runid = None
     expired_attributes = EMPTY_SET
     insert_order = None
+    readonly = False
+    readonly_session_id = None
+    generation = Generation()
+    load_group = None
+    committed_digests = None
     
     def __init__(self, obj, manager):
         self.class_ = obj.__class__
@@ -864,6 +910,8 @@ class InstanceState(object):
             raise
 
     def get_history(self, key, **kwargs):
+        if self.generation.expired:
+            self.expire_generation()
         return self.manager.get_impl(key).get_history(self, **kwargs)
 
     def get_impl(self, key):
@@ -901,6 +949,8 @@ class InstanceState(object):
         self.manager.events.run('on_load', instance)
 
     def __getstate__(self):
+        if self.generation.expired:
+            self.expire_generation()
         return {'key': self.key,
                 'committed_state': self.committed_state,
                 'pending': self.pending,
@@ -909,6 +959,7 @@ class InstanceState(object):
                 'expired':self.expired,
                 'instance': self.obj(),
                 'expired_attributes':self.expired_attributes,
+                'committed_digests':self.committed_digests,
                 'callables': self.callables}
 
     def __setstate__(self, state):
@@ -926,6 +977,7 @@ class InstanceState(object):
         self.runid = None
         self.expired = state['expired']
         self.expired_attributes = state['expired_attributes']
+        self.committed_digests = state.get('committed_digests')
 
     def initialize(self, key):
         self.manager.get_impl(key).initialize(self)
@@ -959,7 +1011,8 @@ class InstanceState(object):
 
         return set(
             key for key in self.manager.iterkeys()
-            if (key not in self.committed_state or
+            if ((key not in self.committed_state and
+                 not (self.committed_digests and key in self.committed_digests)) or
                 (key in self.manager.mutable_attributes and
                  not self.manager[key].impl.check_mutable_modified(self))))
 
@@ -985,10 +1038,18 @@ class InstanceState(object):
         for key in attribute_names:
             self.dict.pop(key, None)
             self.committed_state.pop(key, None)
+            if self.committed_digests:
+                self.committed_digests.pop(key, None)
             self.expired_attributes.add(key)
             if self.manager.get_impl(key).accepts_scalar_loader:
                 self.callables[key] = self
 
+    def expire_generation(self):
+        """Expire all attributes, as the generation of this state has been expired."""
+
+        del self.generation
+        self.expire_attributes(None)
+
     def reset(self, key):
         """remove the given attribute and any callables associated with it."""
 
@@ -1027,9 +1088,12 @@ class InstanceState(object):
         class_manager = self.manager
         for key in keys:
             if key in self.dict and key in class_manager.mutable_attributes:
+                self.committed_state.pop(key, None)
                 class_manager[key].impl.commit_to_state(self, self.committed_state)
             else:
                 self.committed_state.pop(key, None)
+                if self.committed_digests:
+                    self.committed_digests.pop(key, None)
 
         self.expired = False
         # unexpire attributes which have loaded
@@ -1055,6 +1119,7 @@ class InstanceState(object):
         """
         
         self.committed_state = {}
+        self.committed_digests = None
         self.pending = {}
         
         # unexpire attributes which have loaded
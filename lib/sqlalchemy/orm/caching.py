@@ -0,0 +1,391 @@
+# caching.py
+# Copyright (C) the SQLAlchemy authors and contributors
+#
+# This module is part of SQLAlchemy and is released under
+# the MIT License: http://www.opensource.org/licenses/mit-license.php
+
+"""Caching of Query results.
+
+A :class:`QueryCache` stores the results of queries marked with
+``Query.cache()`` within a pluggable :class:`CacheBackend`::
+
+    cache = QueryCache(MemoryBackend(size=500, ttl=300))
+    Session = sessionmaker(query_cache=cache)
+
+    sess = Session()
+    users = sess.query(User).filter(User.name.like('j%')).cache().all()
+
+Results are keyed on the compiled SQL statement and its parameters.
+Instances are stored detached and in pickled form, and are merged into
+the querying Session using ``merge(dont_load=True)`` when retrieved.
+
+Each table is associated with a *generation* token, also held within
+the backend, which forms part of the key of every cached result
+selecting from the table.  Replacing the token invalidates all such
+results at once; this occurs when a Session flushes changes to the
+table, or issues ``Query.update()`` or ``Query.delete()`` against it.
+Changes made by other means, such as SQL executed directly, aren't
+detected; use the ``ttl`` of the backend, or :meth:`QueryCache.invalidate`.
+
+"""
+
+import os
+import socket
+import sys
+import tempfile
+import time
+import zlib
+
+from sqlalchemy import util
+from sqlalchemy.util import md5
+from sqlalchemy.sql import util as sql_util
+from sqlalchemy.orm.query import _MapperEntity, _rowtuple_type
+
+
+__all__ = ['QueryCache', 'CacheBackend', 'MemoryBackend', 'FileBackend',
+           'MemcachedBackend']
+
+
+class QueryCache(object):
+    """Stores the results of Query objects within a CacheBackend.
+
+    backend
+      The :class:`CacheBackend` which stores results.
+
+    namespace
+      A string prefixed to all keys placed in the backend, allowing
+      several QueryCaches to share one.  Defaults to ``'sqlalchemy'``.
+
+    The ``hits`` and ``misses`` attributes count the queries which were
+    and were not answered from the cache by this QueryCache.
+
+    """
+
+    def __init__(self, backend, namespace='sqlalchemy'):
+        self.backend = backend
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self, *tables):
+        """Invalidate all cached results which select from the given tables."""
+
+        for table in tables:
+            self.backend.set(self._generation_key(table), _new_generation())
+
+    def _generation_key(self, table):
+        return "%s:table:%s" % (self.namespace, md5(table.key).hexdigest())
+
+    def _generations(self, tables):
+        gens = []
+        for table in tables:
+            key = self._generation_key(table)
+            gen = self.backend.get(key)
+            if gen is None:
+                gen = _new_generation()
+                self.backend.set(key, gen)
+            gens.append(gen)
+        return gens
+
+    def _cache_key(self, statement, params, tables):
+        compiled = statement.compile()
+        bind_params = dict(compiled.params)
+        bind_params.update(params)
+        return "%s:query:%s" % (self.namespace, md5(
+            "%s\n%r\n%r" % (compiled, sorted(bind_params.items()), self._generations(tables))
+        ).hexdigest())
+
+    def _iterate(self, query, context):
+        """Return the results of the given Query, from the cache if present."""
+
+        session = query.session
+        statement = context.statement
+        tables = set(sql_util.find_tables(statement))
+        if query._readonly or query._populate_existing or query._lockmode or \
+                tables.intersection(session._query_cache_written):
+            return query._execute_and_instances(context)
+
+        tables = sorted(tables, key=lambda t: t.key)
+        key = self._cache_key(statement, query._params, tables)
+        cached = self.backend.get(key)
+        if cached is not None:
+            self.hits += 1
+            return _merged_results(query, *util.pickle.loads(cached))
+
+        self.misses += 1
+        result = list(query._execute_and_instances(context))
+        single_entity = len(query._entities) == 1 and bool(list(query._mapper_entities))
+        if single_entity:
+            labels, rows = None, result
+        else:
+            labels = [ent._result_label for ent in query._entities]
+            rows = [tuple(row) for row in result]
+        self.backend.set(key, util.pickle.dumps((labels, rows), -1))
+        return iter(result)
+
+def _merged_results(query, labels, rows):
+    """Merge cached rows into the Session of the given Query."""
+
+    session = query.session
+    def merge(instance):
+        if instance is None:
+            return None
+        return session.merge(instance, dont_load=True)
+
+    if labels is None:
+        return iter([merge(instance) for instance in rows])
+
+    mapped = [isinstance(ent, _MapperEntity) for ent in query._entities]
+    rowtuple = _rowtuple_type(labels)
+    def process(row):
+        values = list(row)
+        for i, is_mapped in enumerate(mapped):
+            if is_mapped:
+                values[i] = merge(values[i])
+        return rowtuple(values)
+    return iter([process(row) for row in rows])
+
+def _new_generation():
+    return "%x.%x" % (time.time() * 1000000, id(object()))
+
+
+class CacheBackend(object):
+    """Base class for storage used by a QueryCache.
+
+    Keys are strings of up to 250 characters, free of whitespace; values
+    are strings.  A backend may discard any value at any time.
+
+    """
+
+    def get(self, key):
+        """Return the value stored for the given key, or None."""
+
+        raise NotImplementedError()
+
+    def set(self, key, value):
+        """Store a value for the given key."""
+
+        raise NotImplementedError()
+
+    def delete(self, key):
+        """Discard the value stored for the given key, if any."""
+
+        raise NotImplementedError()
+
+class MemoryBackend(CacheBackend):
+    """Stores values in process memory, discarding the least recently used.
+
+    size
+      The number of values to retain.  Defaults to 1000.
+
+    ttl
+      Optional number of seconds after which a value is discarded.
+
+    """
+
+    def __init__(self, size=1000, ttl=None):
+        self.ttl = ttl
+        self._values = util.LRUCache(size)
+        self._mutex = util.threading.Lock()
+
+    def get(self, key):
+        self._mutex.acquire()
+        try:
+            entry = self._values.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires is not None and time.time() > expires:
+                del self._values[key]
+                return None
+            return value
+        finally:
+            self._mutex.release()
+
+    def set(self, key, value):
+        self._mutex.acquire()
+        try:
+            self._values[key] = (self.ttl is not None and time.time() + self.ttl or None, value)
+        finally:
+            self._mutex.release()
+
+    def delete(self, key):
+        self._mutex.acquire()
+        try:
+            self._values.pop(key, None)
+        finally:
+            self._mutex.release()
+
+class FileBackend(CacheBackend):
+    """Stores each value within a file of the given directory.
+
+    The directory may be shared among processes.
+
+    directory
+      The directory in which to store files.  It is created if not
+      present.
+
+    ttl
+      Optional number of seconds after which a value is discarded.
+
+    """
+
+    def __init__(self, directory, ttl=None):
+        self.directory = directory
+        self.ttl = ttl
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+    def _path(self, key):
+        return os.path.join(self.directory, md5(key).hexdigest())
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            f = open(path, 'rb')
+            try:
+                expires, value = util.pickle.load(f)
+            finally:
+                f.close()
+        except (IOError, EOFError, util.pickle.UnpicklingError):
+            return None
+        if expires is not None and time.time() > expires:
+            self.delete(key)
+            return None
+        return value
+
+    def set(self, key, value):
+        # write to a temporary file and rename, so that readers never see
+        # a partially written value
+        fd, tmp = tempfile.mkstemp(dir=self.directory)
+        f = os.fdopen(fd, 'wb')
+        try:
+            util.pickle.dump((self.ttl is not None and time.time() + self.ttl or None, value), f, -1)
+        finally:
+            f.close()
+        path = self._path(key)
+        if sys.platform == 'win32' and os.path.exists(path):
+            os.remove(path)
+        os.rename(tmp, path)
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+class MemcachedBackend(CacheBackend):
+    """Stores values in one or more servers speaking the memcached protocol.
+
+    servers
+      A list of ``'host:port'`` strings.  Each key is stored on one server,
+      chosen by a hash of the key.
+
+    ttl
+      Optional number of seconds after which a value is discarded; passed
+      to the server as the expiration time.
+
+    timeout
+      Socket timeout in seconds.  Defaults to 3.
+
+    A server which can't be reached is treated as holding no values;
+    the connection is retried upon the next operation.
+
+    """
+
+    def __init__(self, servers, ttl=None, timeout=3):
+        self.servers = [_MemcachedServer(server, timeout) for server in servers]
+        self.ttl = ttl
+
+    def _server(self, key):
+        return self.servers[(zlib.crc32(key) & 0xffffffff) % len(self.servers)]
+
+    def get(self, key):
+        server = self._server(key)
+        def go(conn):
+            conn.send("get %s\r\n" % key)
+            line = conn.readline()
+            if line == 'END':
+                return None
+            if not line.startswith('VALUE '):
+                raise socket.error("unexpected response %r" % line)
+            length = int(line.split()[3])
+            value = conn.read(length + 2)[:-2]
+            if conn.readline() != 'END':
+                raise socket.error("unexpected end of response")
+            return value
+        return server.call(go)
+
+    def set(self, key, value):
+        server = self._server(key)
+        def go(conn):
+            conn.send("set %s 0 %d %d\r\n%s\r\n" % (key, self.ttl or 0, len(value), value))
+            line = conn.readline()
+            if line != 'STORED':
+                raise socket.error("unexpected response %r" % line)
+        server.call(go)
+
+    def delete(self, key):
+        server = self._server(key)
+        def go(conn):
+            conn.send("delete %s\r\n" % key)
+            line = conn.readline()
+            if line not in ('DELETED', 'NOT_FOUND'):
+                raise socket.error("unexpected response %r" % line)
+        server.call(go)
+
+class _MemcachedServer(object):
+    def __init__(self, address, timeout):
+        host, port = address.split(':')
+        self.address = (host, int(port))
+        self.timeout = timeout
+        self._socket = None
+        self._buffer = ''
+        self._mutex = util.threading.Lock()
+
+    def call(self, fn):
+        """Call fn with this server connected, returning None upon socket errors."""
+
+        self._mutex.acquire()
+        try:
+            try:
+                if self._socket is None:
+                    self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                    self._socket.settimeout(self.timeout)
+                    self._socket.connect(self.address)
+                return fn(self)
+            except socket.error:
+                self.close()
+                return None
+        finally:
+            self._mutex.release()
+
+    def close(self):
+        if self._socket is not None:
+            try:
+                self._socket.close()
+            except socket.error:
+                pass
+        self._socket = None
+        self._buffer = ''
+
+    def send(self, data):
+        self._socket.sendall(data)
+
+    def _fill(self):
+        data = self._socket.recv(65536)
+        if not data:
+            raise socket.error("connection closed")
+        self._buffer += data
+
+    def readline(self):
+        while '\r\n' not in self._buffer:
+            self._fill()
+        line, self._buffer = self._buffer.split('\r\n', 1)
+        return line
+
+    def read(self, length):
+        while len(self._buffer) < length:
+            self._fill()
+        data, self._buffer = self._buffer[:length], self._buffer[length:]
+        return data
@@ -13,9 +13,11 @@ dependencies at flush time.
 """
 
 from sqlalchemy import sql, util
+from sqlalchemy.sql import expression, operators
 import sqlalchemy.exceptions as sa_exc
 from sqlalchemy.orm import attributes, exc, sync
 from sqlalchemy.orm.interfaces import ONETOMANY, MANYTOONE, MANYTOMANY
+from sqlalchemy.orm.util import _pk_sort_key
 
 
 def create_dependency_processor(prop):
@@ -443,22 +445,97 @@ class ManyToManyDP(DependencyProcessor):
                         #self.syncrules.update(associationrow, state, child, "old_")
                         secondary_update.append(associationrow)
 
+        ordered = 'ordered' in uowcommit.mapper_flush_opts
+        if ordered:
+            keys = [c.key for c in self.secondary.c]
+            secondary_delete.sort(key=_pk_sort_key(keys))
+            secondary_update.sort(key=_pk_sort_key(["old_" + k for k in keys]))
+            secondary_insert.sort(key=_pk_sort_key(keys))
+
+        batch_size = self.prop.secondary_batch_size
+
         if secondary_delete:
-            # TODO: precompile the delete/insert queries?
-            statement = self.secondary.delete(sql.and_(*[c == sql.bindparam(c.key, type_=c.type) for c in self.secondary.c if c.key in associationrow]))
-            result = connection.execute(statement, secondary_delete)
-            if result.supports_sane_multi_rowcount() and result.rowcount != len(secondary_delete):
-                raise exc.ConcurrentModificationError("Deleted rowcount %d does not match number of secondary table rows deleted from table '%s': %d" % (result.rowcount, self.secondary.description, len(secondary_delete)))
+            if len(secondary_delete) == 1 or ordered:
+                # an ordered flush deletes row by row, as the order in which
+                # a single statement locks its rows isn't defined
+                rowcount = 0
+                for row in secondary_delete:
+                    rowcount += uowcommit.execute_statement(connection, self.secondary, self._delete_statement, row).rowcount
+            else:
+                rowcount = self._delete_rows(connection, uowcommit, secondary_delete, batch_size)
+            if connection.dialect.supports_sane_rowcount and rowcount != len(secondary_delete):
+                raise exc.ConcurrentModificationError("Deleted rowcount %d does not match number of secondary table rows deleted from table '%s': %d" % (rowcount, self.secondary.description, len(secondary_delete)))
 
         if secondary_update:
-            statement = self.secondary.update(sql.and_(*[c == sql.bindparam("old_" + c.key, type_=c.type) for c in self.secondary.c if c.key in associationrow]))
-            result = connection.execute(statement, secondary_update)
-            if result.supports_sane_multi_rowcount() and result.rowcount != len(secondary_update):
-                raise exc.ConcurrentModificationError("Updated rowcount %d does not match number of secondary table rows updated from table '%s': %d" % (result.rowcount, self.secondary.description, len(secondary_update)))
+            rowcount = 0
+            for i in xrange(0, len(secondary_update), batch_size):
+                result = uowcommit.execute_statement(connection, self.secondary, self._update_statement, secondary_update[i:i + batch_size])
+                rowcount += result.rowcount
+            if result.supports_sane_multi_rowcount() and rowcount != len(secondary_update):
+                raise exc.ConcurrentModificationError("Updated rowcount %d does not match number of secondary table rows updated from table '%s': %d" % (rowcount, self.secondary.description, len(secondary_update)))
 
         if secondary_insert:
             statement = self.secondary.insert()
-            connection.execute(statement, secondary_insert)
+            for i in xrange(0, len(secondary_insert), batch_size):
+                uowcommit.execute_statement(connection, self.secondary, statement, secondary_insert[i:i + batch_size])
+
+    def _delete_rows(self, connection, uowcommit, rows, batch_size):
+        """Delete several association rows with one or more statements,
+        returning the number of rows deleted.
+
+        Rows are matched using ``(a, b) IN ((...), (...))`` where the
+        dialect supports it, otherwise with ``OR``-ed criteria, in chunks
+        of at most ``batch_size`` rows and the dialect's
+        ``max_bind_params``.
+
+        """
+        cols = self._secondary_columns
+        chunksize = max(min(batch_size, connection.dialect.max_bind_params // len(cols)), 1)
+        rowcount = 0
+        for i in xrange(0, len(rows), chunksize):
+            chunk = rows[i:i + chunksize]
+            statement = self._delete_statements.get((connection.dialect.supports_tuple_in, len(chunk)))
+            if statement is None:
+                binds = [[sql.bindparam("%s_%d" % (c.key, j), type_=c.type) for c in cols]
+                         for j in xrange(len(chunk))]
+                if connection.dialect.supports_tuple_in:
+                    criterion = expression._BinaryExpression(
+                        expression.ClauseList(*cols).self_group(),
+                        expression.ClauseList(*[expression.ClauseList(*b).self_group() for b in binds]).self_group(),
+                        operators.in_op)
+                else:
+                    criterion = sql.or_(*[sql.and_(*[c == bind for c, bind in zip(cols, b)]).self_group()
+                                          for b in binds])
+                statement = self.secondary.delete(criterion)
+                if len(chunk) == chunksize:
+                    # statements for partial chunks vary in length and
+                    # aren't retained
+                    self._delete_statements[(connection.dialect.supports_tuple_in, len(chunk))] = statement
+            params = {}
+            for j, row in enumerate(chunk):
+                for c in cols:
+                    params["%s_%d" % (c.key, j)] = row[c.key]
+            rowcount += uowcommit.execute_statement(connection, self.secondary, statement, params).rowcount
+        return rowcount
+
+    @util.memoized_property
+    def _secondary_columns(self):
+        """The columns of the association table populated from the parent and child."""
+
+        keys = set([r.key for l, r in self.prop.synchronize_pairs + self.prop.secondary_synchronize_pairs])
+        return [c for c in self.secondary.c if c.key in keys]
+
+    @util.memoized_property
+    def _delete_statement(self):
+        return self.secondary.delete(sql.and_(*[c == sql.bindparam(c.key, type_=c.type) for c in self._secondary_columns]))
+
+    @util.memoized_property
+    def _update_statement(self):
+        return self.secondary.update(sql.and_(*[c == sql.bindparam("old_" + c.key, type_=c.type) for c in self._secondary_columns]))
+
+    @util.memoized_property
+    def _delete_statements(self):
+        return {}
 
     def preprocess_dependencies(self, task, deplist, uowcommit, delete = False):
         #print self.mapper.mapped_table.name + " " + self.key + " " + repr(len(deplist)) + " preprocess_dep isdelete " + repr(delete) + " direction " + repr(self.direction)
@@ -499,6 +576,10 @@ class MapperStub(object):
         self.base_mapper = self
         self.class_ = mapper.class_
         self._inheriting_mappers = []
+        self._description = "MapperStub|%s.%s" % (parent.class_.__name__, key)
+
+    def __str__(self):
+        return self._description
 
     def polymorphic_iterator(self):
         return iter((self,))
@@ -4,6 +4,7 @@
 # This module is part of SQLAlchemy and is released under
 # the MIT License: http://www.opensource.org/licenses/mit-license.php
 
+import time
 import weakref
 
 from sqlalchemy import util as base_util
@@ -13,7 +14,9 @@ from sqlalchemy.orm import attributes
 class IdentityMap(dict):
     def __init__(self):
         self._mutable_attrs = {}
-        self.modified = False
+        self._modified = {}
+        self._wr = weakref.ref(self)
+        self._generation = attributes.Generation()
         
     def add(self, state):
         raise NotImplementedError()
@@ -28,26 +31,90 @@ class IdentityMap(dict):
         raise NotImplementedError("IdentityMap uses remove() to remove data")
         
     def _manage_incoming_state(self, state):
+        if state.generation.expired:
+            state.expire_generation()
+        state._instance_dict = self._wr
+        state.generation = self._generation
         if state.modified:  
-            self.modified = True
+            self._modified[state] = True
         if state.manager.mutable_attributes:
             self._mutable_attrs[state] = True
     
     def _manage_removed_state(self, state):
-        if state in self._mutable_attrs:
-            del self._mutable_attrs[state]
-            
+        if state.generation.expired and state.obj() is not None:
+            state.expire_generation()
+        del state.generation
+        del state._instance_dict
+        self._mutable_attrs.pop(state, None)
+        self._modified.pop(state, None)
+
+    def _modified_event(self, state):
+        self._modified[state] = True
+
+    def expire_all(self):
+        """Expire all InstanceStates present.
+
+        Each state is expired as it's next accessed, by way of the
+        :class:`~sqlalchemy.orm.attributes.Generation` it shares with the
+        others; a new generation is begun for states which are refreshed
+        or added afterwards.  States with pending changes are expired
+        immediately.
+
+        """
+        self._generation.expired = True
+        self._generation = attributes.Generation()
+        for state in self._modified:
+            state.expire_generation()
+        self._modified.clear()
+
+    def _get_modified(self):
+        return bool(self._modified)
+
+    def _set_modified(self, value):
+        if not value:
+            self._prune_modified()
+
+    modified = property(_get_modified, _set_modified, doc=
+        """True if any InstanceStates present have been marked as 'modified'.
+
+        Setting to False forgets those InstanceStates which are no longer
+        modified, as is done once they've been flushed.
+
+        """)
+
+    def _prune_modified(self):
+        for state in list(self._modified):
+            if not state.modified:
+                del self._modified[state]
+
     def check_modified(self):
         """return True if any InstanceStates present have been marked as 'modified'."""
         
-        if not self.modified:
-            for state in list(self._mutable_attrs):
-                if state.check_modified():
-                    return True
-            else:
-                return False
+        for state in list(self._modified):
+            if state.modified:
+                return True
+            del self._modified[state]
+
+        for state in list(self._mutable_attrs):
+            if not state.generation.expired and state.check_modified():
+                return True
         else:
-            return True
+            return False
+
+    def _modified_states(self):
+        """Return the set of InstanceStates present which are modified.
+
+        States are recorded as their attributes change, so only those with
+        mutable scalar attributes are examined here.
+
+        """
+        self._prune_modified()
+
+        modified = set(self._modified)
+        for state in self._mutable_attrs:
+            if state not in modified and not state.generation.expired and state.check_modified():
+                modified.add(state)
+        return modified
             
     def has_key(self, key):
         return key in self
@@ -72,10 +139,6 @@ class IdentityMap(dict):
         
 class WeakInstanceDict(IdentityMap):
 
-    def __init__(self):
-        IdentityMap.__init__(self)
-        self._wr = weakref.ref(self)
-
     def __getitem__(self, key):
         state = dict.__getitem__(self, key)
         o = state.obj()
@@ -107,7 +170,6 @@ class WeakInstanceDict(IdentityMap):
                 raise AssertionError("A conflicting state is already present in the identity map for key %r" % state.key)
         else:
             dict.__setitem__(self, state.key, state)
-            state._instance_dict = self._wr
             self._manage_incoming_state(state)
     
     def remove_key(self, key):
@@ -117,13 +179,11 @@ class WeakInstanceDict(IdentityMap):
     def remove(self, state):
         if dict.pop(self, state.key) is not state:
             raise AssertionError("State %s is not present in this identity map" % state)
-        del state._instance_dict
         self._manage_removed_state(state)
     
     def discard(self, state):
         if self.contains_state(state):
             dict.__delitem__(self, state.key)
-            del state._instance_dict
             self._manage_removed_state(state)
         
     def get(self, key, default=None):
@@ -186,22 +246,34 @@ class StrongInstanceDict(IdentityMap):
         
         ref_count = len(self)
         dirty = [s.obj() for s in self.all_states() if s.check_modified()]
+        states = dict((state.key, state) for state in self.all_states())
         keepers = weakref.WeakValueDictionary(self)
         dict.clear(self)
         dict.update(self, keepers)
-        self.modified = bool(dirty)
+        for key, state in states.iteritems():
+            if key not in self:
+                self._manage_removed_state(state)
         return ref_count - len(self)
         
 class IdentityManagedState(attributes.InstanceState):
     def _instance_dict(self):
         return None
+
+    def expire_generation(self):
+        attributes.InstanceState.expire_generation(self)
+        instance_dict = self._instance_dict()
+        if instance_dict is not None:
+            self.generation = instance_dict._generation
     
     def modified_event(self, attr, should_copy, previous, passive=False):
+        if self.readonly:
+            # loaded via Query.readonly(); changes are never flushed
+            return
         attributes.InstanceState.modified_event(self, attr, should_copy, previous, passive)
         
         instance_dict = self._instance_dict()
         if instance_dict:
-            instance_dict.modified = True
+            instance_dict._modified_event(self)
     
     def _is_really_none(self):
         """do a check modified/resurrect.
@@ -251,3 +323,109 @@ class IdentityManagedState(attributes.InstanceState):
         self.dict = obj.__dict__
         self._run_on_load(obj)
         return obj
+
+
+class IdentityCache(object):
+    """A size-bounded cache of committed row state, shared among Sessions.
+
+    A Session configured with an ``IdentityCache`` via its
+    ``identity_cache`` argument stores the column attribute values of
+    each instance it loads, keyed by identity key.  ``Query.get()``, and
+    therefore lazy loads of many-to-one relations which can use
+    ``get()``, consult the cache when the identity isn't present in the
+    Session, constructing the instance from the cached values without
+    emitting SQL.
+
+    Entries are discarded when a Session flushes changes to the
+    corresponding row, or when ``Query.update()`` or ``Query.delete()``
+    are used against the row's class.  Changes made to the database by
+    other means aren't detected; the ``ttl`` argument limits how stale
+    an entry can become.
+
+    size
+      The number of identities to retain.  Least recently used entries
+      are discarded beyond this size.  Defaults to 1000.
+
+    ttl
+      Optional number of seconds after which an entry is discarded.
+
+    The ``hits`` and ``misses`` attributes count the lookups against the
+    cache which did and did not find an entry, respectively.  The cache
+    is thread-safe.
+
+    """
+
+    def __init__(self, size=1000, ttl=None):
+        self.size = size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = base_util.LRUCache(size)
+        self._mutex = base_util.threading.Lock()
+
+    def get(self, key):
+        """Return a tuple of ``(class, values)`` for the given identity key, or None."""
+
+        self._mutex.acquire()
+        try:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and \
+                    time.time() - entry[0] > self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[1], entry[2]
+        finally:
+            self._mutex.release()
+
+    def put(self, key, class_, values):
+        """Store the given dictionary of column attribute values for an identity key."""
+
+        self._mutex.acquire()
+        try:
+            self._entries[key] = (time.time(), class_, values)
+        finally:
+            self._mutex.release()
+
+    def invalidate(self, key):
+        """Discard the entry for the given identity key, if any."""
+
+        self._mutex.acquire()
+        try:
+            self._entries.pop(key, None)
+        finally:
+            self._mutex.release()
+
+    def invalidate_class(self, class_):
+        """Discard all entries whose identity key is against the given class."""
+
+        self._mutex.acquire()
+        try:
+            for key in [key for key in self._entries if key[0] is class_]:
+                del self._entries[key]
+        finally:
+            self._mutex.release()
+
+    def clear(self):
+        """Discard all entries."""
+
+        self._mutex.acquire()
+        try:
+            self._entries.clear()
+        finally:
+            self._mutex.release()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def hit_ratio(self):
+        """The fraction of lookups which found an entry, or None if no lookups have occurred."""
+
+        lookups = self.hits + self.misses
+        if not lookups:
+            return None
+        return float(self.hits) / lookups
@@ -20,7 +20,7 @@ import operator
 from itertools import chain
 deque = __import__('collections').deque
 
-from sqlalchemy import sql, util, log, exc as sa_exc
+from sqlalchemy import sql, util, log, schema, exc as sa_exc
 from sqlalchemy.sql import expression, visitors, operators, util as sqlutil
 from sqlalchemy.orm import attributes, exc, sync
 from sqlalchemy.orm.identity import IdentityManagedState
@@ -28,8 +28,8 @@ from sqlalchemy.orm.interfaces import (
     MapperProperty, EXT_CONTINUE, PropComparator
     )
 from sqlalchemy.orm.util import (
-     ExtensionCarrier, _INSTRUMENTOR, _class_to_mapper, _state_has_identity,
-     _state_mapper, class_mapper, instance_str, state_str,
+     ExtensionCarrier, _INSTRUMENTOR, _class_to_mapper, _pk_sort_key,
+     _state_has_identity, _state_mapper, class_mapper, instance_str, state_str,
      )
 
 __all__ = (
@@ -59,7 +59,7 @@ ColumnProperty = None
 SynonymProperty = None
 ComparableProperty = None
 _expire_state = None
-_state_session = None
+_state_loading_session = None
 
 class Mapper(object):
     """Define the correlation of class attributes to database table
@@ -132,6 +132,7 @@ class Mapper(object):
         self.polymorphic_on = polymorphic_on
         self._dependency_processors = []
         self._validators = {}
+        self._compiled_populators = {}
         self._clause_adapter = None
         self._requires_row_aliasing = False
         self._inherits_equated_pairs = None
@@ -251,6 +252,7 @@ class Mapper(object):
 
             for mapper in self.iterate_to_root():
                 util.reset_memoized(mapper, '_equivalent_columns')
+                util.reset_memoized(mapper, '_sorted_tables')
 
             if self.order_by is False and not self.concrete and self.inherits.order_by is not False:
                 self.order_by = self.inherits.order_by
@@ -632,6 +634,7 @@ class Mapper(object):
 
         self._props[key] = prop
         prop.key = key
+        util.reset_memoized(self, '_cascading_props')
 
         if setparent:
             prop.set_parent(self)
@@ -905,6 +908,19 @@ class Mapper(object):
         params = [(primary_key, sql.bindparam(None, type_=primary_key.type)) for primary_key in self.primary_key]
         return sql.and_(*[k==v for (k, v) in params]), util.column_dict(params)
 
+    @util.memoized_property
+    def _sorted_tables(self):
+        """Return the tables of this mapper's inheritance hierarchy in
+        dependency order, along with a mapping of each to the mapper
+        which maps it.
+
+        """
+        table_to_mapper = {}
+        for mapper in self.base_mapper.polymorphic_iterator():
+            for t in mapper.tables:
+                table_to_mapper[t] = mapper
+        return sqlutil.sort_tables(table_to_mapper.iterkeys()), table_to_mapper
+
     @util.memoized_property
     def _equivalent_columns(self):
         """Create a map of all *equivalent* columns, based on
@@ -1165,8 +1181,12 @@ class Mapper(object):
         reference so that they don't fall out of scope immediately.
 
         """
+        props = self._props_for_cascade(type_)
+        if not props:
+            return
+
         visited_instances = util.IdentitySet()
-        visitables = [(self._props.itervalues(), 'property', state)]
+        visitables = [(iter(props), 'property', state)]
 
         while visitables:
             iterator, item_type, parent_state = visitables[-1]
@@ -1177,10 +1197,25 @@ class Mapper(object):
                 elif item_type == 'mapper':
                     instance, instance_mapper, corresponding_state  = iterator.next()
                     yield (instance, instance_mapper)
-                    visitables.append((instance_mapper._props.itervalues(), 'property', corresponding_state))
+                    visitables.append((iter(instance_mapper._props_for_cascade(type_)), 'property', corresponding_state))
             except StopIteration:
                 visitables.pop()
 
+    @util.memoized_property
+    def _cascading_props(self):
+        return {}
+
+    def _props_for_cascade(self, type_):
+        """Return the list of properties which may cascade the given rule."""
+
+        try:
+            return self._cascading_props[type_]
+        except KeyError:
+            props = self._cascading_props[type_] = [
+                prop for prop in self._props.itervalues()
+                if type_ in getattr(prop, 'cascade', ())]
+            return props
+
     # persistence
 
     def _save_obj(self, states, uowtransaction, postupdate=False, post_update_cols=None, single=False):
@@ -1239,134 +1274,96 @@ class Mapper(object):
                     self._log_debug("detected row switch for identity %s.  will update %s, remove %s from transaction" % (instance_key, state_str(state), state_str(existing)))
                 uowtransaction.set_row_switch(existing)
 
-        table_to_mapper = {}
-        for mapper in self.base_mapper.polymorphic_iterator():
-            for t in mapper.tables:
-                table_to_mapper[t] = mapper
-
-        for table in sqlutil.sort_tables(table_to_mapper.iterkeys()):
+        sorted_tables, table_to_mapper = self.base_mapper._sorted_tables
+        for table in sorted_tables:
             insert = []
             update = []
+            partitions = util.OrderedDict()
 
             for state, mapper, connection, has_identity in tups:
                 if table not in mapper._pks_by_table:
                     continue
-                pks = mapper._pks_by_table[table]
                 instance_key = mapper._identity_key_from_state(state)
 
                 if self._should_log_debug:
                     self._log_debug("_save_obj() table '%s' instance %s identity %s" % (table.name, state_str(state), str(instance_key)))
 
                 isinsert = not instance_key in uowtransaction.session.identity_map and not postupdate and not has_identity
-                
-                params = {}
-                value_params = {}
-                hasdata = False
+
+                get_value = lambda col, mapper=mapper, state=state: mapper._get_state_attr_by_column(state, col)
 
                 if isinsert:
-                    for col in mapper._cols_by_table[table]:
-                        if col is mapper.version_id_col:
-                            params[col.key] = 1
-                        elif col in pks:
-                            value = mapper._get_state_attr_by_column(state, col)
+                    def prefetch_pk(col, mapper=mapper, state=state, connection=connection, table=table):
+                        if isinstance(col.default, schema.Sequence) and col.default.prefetch:
+                            # assign the primary key ahead of the INSERT,
+                            # from the block reserved by the Engine
+                            value = uowtransaction.execute_statement(connection, table, col.default)
                             if value is not None:
-                                params[col.key] = value
-                        elif mapper.polymorphic_on and mapper.polymorphic_on.shares_lineage(col):
-                            if self._should_log_debug:
-                                self._log_debug("Using polymorphic identity '%s' for insert column '%s'" % (mapper.polymorphic_identity, col.key))
-                            value = mapper.polymorphic_identity
-                            if ((col.default is None and
-                                 col.server_default is None) or
-                                value is not None):
-                                params[col.key] = value
-                        else:
-                            value = mapper._get_state_attr_by_column(state, col)
-                            if ((col.default is None and
-                                 col.server_default is None) or
-                                value is not None):
-                                if isinstance(value, sql.ClauseElement):
-                                    value_params[col] = value
-                                else:
-                                    params[col.key] = value
+                                mapper._set_state_attr_by_column(state, col, value)
+                            return value
+                    params, value_params = mapper._insert_params(table, get_value, prefetch_pk)
                     insert.append((state, params, mapper, connection, value_params))
                 else:
-                    for col in mapper._cols_by_table[table]:
-                        if col is mapper.version_id_col:
-                            params[col._label] = mapper._get_state_attr_by_column(state, col)
-                            params[col.key] = params[col._label] + 1
-                            for prop in mapper._columntoproperty.itervalues():
-                                history = attributes.get_history(state, prop.key, passive=True)
-                                if history.added:
-                                    hasdata = True
-                        elif mapper.polymorphic_on and mapper.polymorphic_on.shares_lineage(col):
-                            pass
-                        else:
-                            if post_update_cols is not None and col not in post_update_cols:
-                                if col in pks:
-                                    params[col._label] = mapper._get_state_attr_by_column(state, col)
-                                continue
-
-                            prop = mapper._columntoproperty[col]
-                            history = attributes.get_history(state, prop.key, passive=True)
-                            if history.added:
-                                if isinstance(history.added[0], sql.ClauseElement):
-                                    value_params[col] = history.added[0]
-                                else:
-                                    params[col.key] = prop.get_col_value(col, history.added[0])
-                                if col in pks:
-                                    if history.deleted:
-                                        params[col._label] = prop.get_col_value(col, history.deleted[0])
-                                    else:
-                                        # row switch logic can reach us here
-                                        params[col._label] = prop.get_col_value(col, history.added[0])
-                                hasdata = True
-                            elif col in pks:
-                                params[col._label] = mapper._get_state_attr_by_column(state, col)
+                    get_history = lambda prop, state=state: attributes.get_history(state, prop.key, passive=True)
+                    params, value_params, hasdata = mapper._update_params(table, get_value, get_history, post_update_cols)
                     if hasdata:
                         update.append((state, params, mapper, connection, value_params))
 
             if update:
                 mapper = table_to_mapper[table]
-                clause = sql.and_()
-
-                for col in mapper._pks_by_table[table]:
-                    clause.clauses.append(col == sql.bindparam(col._label, type_=col.type))
+                if 'ordered' in uowtransaction.mapper_flush_opts:
+                    pk_key = _pk_sort_key([col._label for col in mapper._pks_by_table[table]])
+                    update.sort(key=lambda rec: pk_key(rec[1]))
 
-                if mapper.version_id_col and table.c.contains_column(mapper.version_id_col):
-                    clause.clauses.append(mapper.version_id_col == sql.bindparam(mapper.version_id_col._label, type_=col.type))
-
-                statement = table.update(clause)
-                rows = 0
-                for state, params, mapper, connection, value_params in update:
-                    c = connection.execute(statement.values(value_params), params)
-                    mapper._postfetch(uowtransaction, connection, table, state, c, c.last_updated_params(), value_params)
+                statement = table.update(mapper._update_criterion(table))
+                def update_partition(update, defer, statement=statement, table=table):
+                    rows = 0
+                    for state, params, mapper, connection, value_params in update:
+                        c = uowtransaction.execute_statement(connection, table, statement.values(value_params), params)
+                        defer(mapper._postfetch, uowtransaction, connection, table, state, c, c.last_updated_params(), value_params)
 
-                    rows += c.rowcount
+                        rows += c.rowcount
 
-                if c.supports_sane_rowcount() and rows != len(update):
-                    raise exc.ConcurrentModificationError("Updated rowcount %d does not match number of objects updated %d" % (rows, len(update)))
+                    if c.supports_sane_rowcount() and rows != len(update):
+                        raise exc.ConcurrentModificationError("Updated rowcount %d does not match number of objects updated %d" % (rows, len(update)))
+                _partition_by_connection(partitions, update, update_partition)
 
             if insert:
                 statement = table.insert()
-                for state, params, mapper, connection, value_params in insert:
-                    c = connection.execute(statement.values(value_params), params)
-                    primary_key = c.last_inserted_ids()
-
-                    if primary_key is not None:
-                        # set primary key attributes
-                        for i, col in enumerate(mapper._pks_by_table[table]):
-                            if mapper._get_state_attr_by_column(state, col) is None and len(primary_key) > i:
-                                mapper._set_state_attr_by_column(state, col, primary_key[i])
-                    mapper._postfetch(uowtransaction, connection, table, state, c, c.last_inserted_params(), value_params)
-
-                    # synchronize newly inserted ids from one table to the next
-                    # TODO: this performs some unnecessary attribute transfers
-                    # from an attribute to itself, since the attribute is often mapped
-                    # to multiple, equivalent columns.  it also may fire off more
-                    # than needed overall.
-                    for m in mapper.iterate_to_root():
-                        if m._inherits_equated_pairs:
-                            sync.populate(state, m, state, m, m._inherits_equated_pairs)
+                def insert_partition(insert, defer, statement=statement, table=table):
+                    def post_insert(state, mapper, connection, c, params, value_params, primary_key=None):
+                        if primary_key is not None:
+                            # set primary key attributes
+                            for i, col in enumerate(mapper._pks_by_table[table]):
+                                if mapper._get_state_attr_by_column(state, col) is None and len(primary_key) > i:
+                                    mapper._set_state_attr_by_column(state, col, primary_key[i])
+
+                        mapper._postfetch(uowtransaction, connection, table, state, c, params, value_params)
+
+                        # synchronize newly inserted ids from one table to the next
+                        # TODO: this performs some unnecessary attribute transfers
+                        # from an attribute to itself, since the attribute is often mapped
+                        # to multiple, equivalent columns.  it also may fire off more
+                        # than needed overall.
+                        for m in mapper.iterate_to_root():
+                            if m._inherits_equated_pairs:
+                                sync.populate(state, m, state, m, m._inherits_equated_pairs)
+
+                    for batch in _insert_batches(table, insert):
+                        if len(batch) > 1:
+                            # all columns, including the primary key, are
+                            # present; insert the rows using executemany()
+                            c = uowtransaction.execute_statement(batch[0][3], table, statement, [rec[1] for rec in batch])
+                            for state, params, mapper, connection, value_params in batch:
+                                defer(post_insert, state, mapper, connection, c, params, value_params)
+                            continue
+
+                        state, params, mapper, connection, value_params = batch[0]
+                        c = uowtransaction.execute_statement(connection, table, statement.values(value_params), params)
+                        defer(post_insert, state, mapper, connection, c, c.last_inserted_params(), value_params, c.last_inserted_ids())
+                _partition_by_connection(partitions, insert, insert_partition)
+
+            _execute_partitions(uowtransaction, partitions, _python_defaults(table, insert, update))
 
         if not postupdate:
             for state, mapper, connection, has_identity in tups:
@@ -1439,13 +1436,9 @@ class Mapper(object):
             if 'before_delete' in mapper.extension:
                 mapper.extension.before_delete(mapper, connection, state.obj())
 
-        table_to_mapper = {}
-        for mapper in self.base_mapper.polymorphic_iterator():
-            for t in mapper.tables:
-                table_to_mapper[t] = mapper
-
-        for table in reversed(sqlutil.sort_tables(table_to_mapper.iterkeys())):
-            delete = {}
+        sorted_tables, table_to_mapper = self.base_mapper._sorted_tables
+        for table in reversed(sorted_tables):
+            delete = util.OrderedDict()
             for state, mapper, connection in tups:
                 if table not in mapper._pks_by_table:
                     continue
@@ -1460,25 +1453,274 @@ class Mapper(object):
                 if mapper.version_id_col and table.c.contains_column(mapper.version_id_col):
                     params[mapper.version_id_col.key] = mapper._get_state_attr_by_column(state, mapper.version_id_col)
 
-            for connection, del_objects in delete.iteritems():
-                mapper = table_to_mapper[table]
+            if not delete:
+                continue
+
+            mapper = table_to_mapper[table]
+            pks = mapper._pks_by_table[table]
+            ordered = 'ordered' in uowtransaction.mapper_flush_opts
+            if ordered:
+                pk_key = _pk_sort_key([col.key for col in pks])
+                for del_objects in delete.itervalues():
+                    del_objects.sort(key=pk_key)
+
+            if len(pks) == 1 and not ordered and not (mapper.version_id_col and table.c.contains_column(mapper.version_id_col)):
+                # a single column primary key; delete rows in chunks using
+                # "pk IN (...)" rather than one execution per row.  an
+                # ordered flush deletes row by row instead, as the order in
+                # which a single statement locks its rows isn't defined.
+                def delete_partition(connection, del_objects, table=table, col=list(pks)[0]):
+                    chunksize = connection.dialect.max_bind_params
+                    rowcount = 0
+                    for i in xrange(0, len(del_objects), chunksize):
+                        ids = [params[col.key] for params in del_objects[i:i + chunksize]]
+                        c = uowtransaction.execute_statement(connection, table, table.delete(col.in_(ids)))
+                        rowcount += c.rowcount
+                    if c.supports_sane_rowcount() and rowcount != len(del_objects):
+                        raise exc.ConcurrentModificationError("Deleted rowcount %d does not match "
+                                "number of objects deleted %d" % (rowcount, len(del_objects)))
+            else:
                 clause = sql.and_()
-                for col in mapper._pks_by_table[table]:
+                for col in pks:
                     clause.clauses.append(col == sql.bindparam(col.key, type_=col.type))
                 if mapper.version_id_col and table.c.contains_column(mapper.version_id_col):
                     clause.clauses.append(
                         mapper.version_id_col == 
                         sql.bindparam(mapper.version_id_col.key, type_=mapper.version_id_col.type))
                 statement = table.delete(clause)
-                c = connection.execute(statement, del_objects)
-                if c.supports_sane_multi_rowcount() and c.rowcount != len(del_objects):
-                    raise exc.ConcurrentModificationError("Deleted rowcount %d does not match "
-                            "number of objects deleted %d" % (c.rowcount, len(del_objects)))
+
+                def delete_partition(connection, del_objects, table=table, statement=statement):
+                    c = uowtransaction.execute_statement(connection, table, statement, del_objects)
+                    if c.supports_sane_multi_rowcount() and c.rowcount != len(del_objects):
+                        raise exc.ConcurrentModificationError("Deleted rowcount %d does not match "
+                                "number of objects deleted %d" % (c.rowcount, len(del_objects)))
+
+            partitions = util.OrderedDict()
+            for connection, del_objects in delete.iteritems():
+                partitions[connection] = [lambda defer, connection=connection, del_objects=del_objects: delete_partition(connection, del_objects)]
+            _execute_partitions(uowtransaction, partitions)
 
         for state, mapper, connection in tups:
             if 'after_delete' in mapper.extension:
                 mapper.extension.after_delete(mapper, connection, state.obj())
 
+    def _insert_params(self, table, get_value, pk_default=None):
+        """Return ``(params, value_params)`` for an ``INSERT`` of a row into ``table``.
+
+        ``get_value(col)`` returns the value of a column of ``table``.  For
+        a primary key column without a value, ``pk_default(col)``, if
+        given, may return one.  ``value_params`` contains the SQL
+        expressions assigned to columns.
+
+        """
+        params = {}
+        value_params = {}
+        pks = self._pks_by_table[table]
+        for col in self._cols_by_table[table]:
+            if col is self.version_id_col:
+                params[col.key] = 1
+            elif col in pks:
+                value = get_value(col)
+                if value is None and pk_default is not None:
+                    value = pk_default(col)
+                if value is not None:
+                    params[col.key] = value
+            elif self.polymorphic_on and self.polymorphic_on.shares_lineage(col):
+                if self._should_log_debug:
+                    self._log_debug("Using polymorphic identity '%s' for insert column '%s'" % (self.polymorphic_identity, col.key))
+                value = self.polymorphic_identity
+                if ((col.default is None and
+                     col.server_default is None) or
+                    value is not None):
+                    params[col.key] = value
+            else:
+                value = get_value(col)
+                if ((col.default is None and
+                     col.server_default is None) or
+                    value is not None):
+                    if isinstance(value, sql.ClauseElement):
+                        value_params[col] = value
+                    else:
+                        params[col.key] = value
+        return params, value_params
+
+    def _update_params(self, table, get_value, get_history, post_update_cols=None):
+        """Return ``(params, value_params, hasdata)`` for an ``UPDATE`` of a row of ``table``.
+
+        ``get_value(col)`` returns the value of a column of ``table``, and
+        ``get_history(prop)`` the history of a column-based property.  The
+        primary key and version id are keyed on the column labels bound
+        by :meth:`_update_criterion`.  ``hasdata`` is False when no
+        column has changed.
+
+        """
+        params = {}
+        value_params = {}
+        hasdata = False
+        pks = self._pks_by_table[table]
+        for col in self._cols_by_table[table]:
+            if col is self.version_id_col:
+                params[col._label] = get_value(col)
+                params[col.key] = params[col._label] + 1
+                for prop in self._columntoproperty.itervalues():
+                    history = get_history(prop)
+                    if history.added:
+                        hasdata = True
+            elif self.polymorphic_on and self.polymorphic_on.shares_lineage(col):
+                pass
+            else:
+                if post_update_cols is not None and col not in post_update_cols:
+                    if col in pks:
+                        params[col._label] = get_value(col)
+                    continue
+
+                prop = self._columntoproperty[col]
+                history = get_history(prop)
+                if history.added:
+                    if isinstance(history.added[0], sql.ClauseElement):
+                        value_params[col] = history.added[0]
+                    else:
+                        params[col.key] = prop.get_col_value(col, history.added[0])
+                    if col in pks:
+                        if history.deleted:
+                            params[col._label] = prop.get_col_value(col, history.deleted[0])
+                        else:
+                            # row switch logic can reach us here
+                            params[col._label] = prop.get_col_value(col, history.added[0])
+                    hasdata = True
+                elif col in pks:
+                    params[col._label] = get_value(col)
+        return params, value_params, hasdata
+
+    def _update_criterion(self, table):
+        """Return the WHERE clause of an ``UPDATE`` of a row of ``table``,
+        which matches the primary key and any version id."""
+
+        clause = sql.and_()
+        for col in self._pks_by_table[table]:
+            clause.clauses.append(col == sql.bindparam(col._label, type_=col.type))
+        if self.version_id_col and table.c.contains_column(self.version_id_col):
+            clause.clauses.append(self.version_id_col == sql.bindparam(self.version_id_col._label, type_=self.version_id_col.type))
+        return clause
+
+    def _bulk_insert_table(self, connection, table, mappings, populate_pk):
+        """Issue ``INSERT`` statements against one of this mapper's tables
+        for a list of dictionaries keyed on attribute names.
+
+        This is called by ``Session.bulk_insert_mappings()`` and
+        ``bulk_save_objects()``, outside of any UOWTransaction, for each
+        table in dependency order.  Rows are sent with one
+        ``executemany()`` per set of columns, except that if
+        ``populate_pk``, as when further tables of the mapper follow, rows
+        lacking a primary key are inserted singly and the newly generated
+        key is set within their dictionaries.
+
+        """
+        pks = self._pks_by_table[table]
+        statement = table.insert()
+        batches = util.OrderedDict()
+        for mapping in mappings:
+            self._bulk_populate_inherited(mapping)
+            params, value_params = self._insert_params(table, self._bulk_value_getter(mapping))
+
+            if value_params or (populate_pk and [col for col in pks if col.key not in params]):
+                # maintain the order of rows
+                for batch in batches.itervalues():
+                    connection.execute(statement, batch)
+                batches.clear()
+                primary_key = connection.execute(statement.values(value_params), params).last_inserted_ids()
+                if primary_key is not None:
+                    for j, col in enumerate(pks):
+                        if col.key not in params and len(primary_key) > j:
+                            mapping[self._columntoproperty[col].key] = primary_key[j]
+            else:
+                batches.setdefault(frozenset(params), []).append(params)
+
+        for batch in batches.itervalues():
+            connection.execute(statement, batch)
+
+    def _bulk_update_table(self, connection, table, mappings):
+        """Issue ``UPDATE`` statements against one of this mapper's tables
+        for a list of dictionaries keyed on attribute names, each of which
+        includes the primary key, and the version id if the mapper has one.
+
+        This is called by ``Session.bulk_update_mappings()`` and
+        ``bulk_save_objects()``, outside of any UOWTransaction, for each
+        table in dependency order.  Rows are sent with one
+        ``executemany()`` per set of columns; rows with no values for the
+        table are skipped.
+
+        """
+        # attributes which identify the row rather than being updated
+        criterion_props = set(self._columntoproperty[col] for t in self._bulk_tables()
+                              for col in self._pks_by_table[t])
+        if self.version_id_col:
+            criterion_props.add(self._columntoproperty[self.version_id_col])
+
+        statement = table.update(self._update_criterion(table))
+        versioned = self.version_id_col and table.c.contains_column(self.version_id_col)
+
+        batches = util.OrderedDict()
+        for mapping in mappings:
+            self._bulk_populate_inherited(mapping)
+            def get_history(prop):
+                if prop.key in mapping and prop not in criterion_props:
+                    return attributes.History([mapping[prop.key]], (), ())
+                else:
+                    return attributes.History((), (), ())
+            params, value_params, hasdata = self._update_params(table, self._bulk_value_getter(mapping, True), get_history)
+            if not hasdata:
+                continue
+            if value_params:
+                c = connection.execute(statement.values(value_params), params)
+                if versioned and c.supports_sane_rowcount() and c.rowcount != 1:
+                    raise exc.ConcurrentModificationError("Updated rowcount %d does not match number of objects updated %d" % (c.rowcount, 1))
+            else:
+                batches.setdefault(frozenset(params), []).append(params)
+
+        for batch in batches.itervalues():
+            c = connection.execute(statement, batch)
+            if versioned and c.supports_sane_multi_rowcount() and c.rowcount != len(batch):
+                raise exc.ConcurrentModificationError("Updated rowcount %d does not match number of objects updated %d" % (c.rowcount, len(batch)))
+
+    def _bulk_value_getter(self, mapping, required=False):
+        """Return a function returning the value of a column within a
+        dictionary keyed on attribute names.
+
+        If ``required``, a missing primary key or version id value raises
+        an error, as these are needed to identify the row to be updated.
+
+        """
+        def get_value(col):
+            prop = self._columntoproperty[col]
+            if prop.key in mapping:
+                return prop.get_col_value(col, mapping[prop.key])
+            elif required:
+                raise sa_exc.InvalidRequestError(
+                    "A value for attribute '%s' of mapper %s is "
+                    "required to issue an UPDATE" % (prop.key, self))
+            else:
+                return None
+        return get_value
+
+    def _bulk_tables(self):
+        """Return the tables mapped by this mapper, in dependency order."""
+
+        return [table for table in self.base_mapper._sorted_tables[0]
+                if table in self._pks_by_table]
+
+    def _bulk_populate_inherited(self, mapping):
+        """Copy primary key values between the attributes of inherited
+        tables within a dictionary keyed on attribute names.
+
+        """
+        for m in self.iterate_to_root():
+            for l, r in m._inherits_equated_pairs or ():
+                source = self._columntoproperty[l].key
+                dest = self._columntoproperty[r].key
+                if source in mapping and dest not in mapping:
+                    mapping[dest] = mapping[source]
+
     def _register_dependencies(self, uowcommit):
         """Register ``DependencyProcessor`` instances with a
         ``unitofwork.UOWTransaction``.
@@ -1518,23 +1760,35 @@ class Mapper(object):
 
         new_populators = []
         existing_populators = []
+        # [column populator, remaining new populators], established
+        # along with new_populators on the first row
+        compiled = []
 
         def populate_state(state, row, isnew, only_load_props, **flags):
             if not new_populators:
                 new_populators[:], existing_populators[:] = self._populators(context, path, row, adapter)
-
-            if isnew:
-                populators = new_populators
-            else:
-                populators = existing_populators
+                compiled[:] = self._compile_populators(new_populators)
 
             if only_load_props:
+                if isnew:
+                    populators = new_populators
+                else:
+                    populators = existing_populators
                 populators = [p for p in populators if p[0] in only_load_props]
+            elif isnew:
+                compiled[0](state.dict, row)
+                populators = compiled[1]
+            else:
+                populators = existing_populators
 
             for key, populator in populators:
                 populator(state, row, isnew=isnew, **flags)
 
-        session_identity_map = context.session.identity_map
+        readonly = context.readonly
+        if readonly:
+            session_identity_map = context.readonly_identity_map
+        else:
+            session_identity_map = context.session.identity_map
 
         if not extension:
             extension = self.extension
@@ -1572,6 +1826,8 @@ class Mapper(object):
             if identitykey in session_identity_map:
                 instance = session_identity_map[identitykey]
                 state = attributes.instance_state(instance)
+                if state.generation.expired:
+                    state.expire_generation()
 
                 if self._should_log_debug:
                     self._log_debug("_instance(): using existing instance %s identity %s" % (instance_str(instance), identitykey))
@@ -1630,15 +1886,26 @@ class Mapper(object):
                 state = attributes.instance_state(instance)
                 state.key = identitykey
 
-                # manually adding instance to session.  for a complete add,
-                # session._finalize_loaded() must be called.
-                state.session_id = context.session.hash_key
-                session_identity_map.add(state)
+                if readonly:
+                    # read-only instances are only unique within this load,
+                    # and aren't part of the session, which they retain only
+                    # to load their unloaded attributes
+                    state.readonly = True
+                    state.readonly_session_id = context.session.hash_key
+                    session_identity_map[identitykey] = instance
+                else:
+                    # manually adding instance to session.  for a complete add,
+                    # session._finalize_loaded() must be called.
+                    state.session_id = context.session.hash_key
+                    session_identity_map.add(state)
 
             if currentload or populate_existing:
                 if isnew:
                     state.runid = context.runid
-                    context.progress.add(state)
+                    if not readonly:
+                        context.progress.add(state)
+                        state.load_group = context.load_group
+                        context.load_group.append(identitykey)
 
                 if not populate_instance or \
                         populate_instance(self, context, row, instance, 
@@ -1686,6 +1953,48 @@ class Mapper(object):
                 existing_populators.append((prop.key, existingpop))
         return new_populators, existing_populators
 
+    def _compile_populators(self, populators):
+        """Fold plain column populators into a single generated function.
+
+        Returns a tuple of ``(populate, remaining)``, where ``populate`` is a
+        callable ``populate(dict_, row)`` which assigns each plain column value
+        directly into the instance dictionary, and ``remaining`` is the list
+        of ``(key, populator)`` pairs which must still be called individually.
+
+        """
+        keys, columns, remaining = [], [], []
+        for key, populator in populators:
+            column = getattr(populator, 'populates_column', None)
+            if column:
+                keys.append(column[0])
+                columns.append(column[1])
+            else:
+                remaining.append((key, populator))
+        return self._compiled_populator(tuple(keys))(*columns), remaining
+
+    def _compiled_populator(self, keys):
+        """Return a factory for a ``populate(dict_, row)`` function for the given attribute keys.
+
+        The factory accepts the (possibly adapted) columns corresponding to
+        each key positionally.  Generated source is cached per set of keys
+        on this mapper, so that each query only binds its own columns.
+
+        """
+        try:
+            return self._compiled_populators[keys]
+        except KeyError:
+            args = ["c%d" % i for i in xrange(len(keys))]
+            lines = ["        dict_[%r] = row[%s]" % (key, arg)
+                     for key, arg in zip(keys, args)] or ["        pass"]
+            source = "def factory(%s):\n"\
+                     "    def populate(dict_, row):\n"\
+                     "%s\n"\
+                     "    return populate\n" % (", ".join(args), "\n".join(lines))
+            namespace = {}
+            exec compile(source, "<populator for %s>" % self, "exec") in namespace
+            factory = self._compiled_populators[keys] = namespace['factory']
+            return factory
+
     def _configure_subclass_mapper(self, context, path, adapter):
         """Produce a mapper level row processor callable factory for mappers inheriting this one."""
         
@@ -1759,6 +2068,107 @@ def _event_on_init_failure(state, instance, args, kwargs):
             instrumenting_mapper, instrumenting_mapper.class_,
             state.manager.events.original_init, instance, args, kwargs)
 
+def _partition_by_connection(partitions, records, fn):
+    """Arrange for ``fn`` to be called with each connection's share of ``records``.
+
+    ``records`` are tuples whose fourth element is the Connection the
+    record is to be persisted with.  ``partitions`` is an ordered
+    dictionary of Connection to a list of callables, which are later
+    invoked in order by ``_execute_partitions()``.  ``fn`` receives the
+    records along with the ``defer`` function described there.
+
+    """
+    by_connection = util.OrderedDict()
+    for rec in records:
+        by_connection.setdefault(rec[3], []).append(rec)
+    for connection, recs in by_connection.iteritems():
+        partitions.setdefault(connection, []).append(lambda defer, recs=recs: fn(recs, defer))
+
+def _python_defaults(table, insert, update):
+    """Return the columns of ``table`` whose Python function defaults are
+    to be invoked by the given INSERT and UPDATE records."""
+
+    cols = []
+    for col in table.c:
+        for records, default in ((insert, col.default), (update, col.onupdate)):
+            if not isinstance(default, schema.ColumnDefault) or not util.callable(default.arg):
+                continue
+            for state, params, mapper, connection, value_params in records:
+                if col.key not in params and col not in value_params:
+                    cols.append(col)
+                    break
+    return cols
+
+def _execute_partitions(uowtransaction, partitions, python_defaults=()):
+    """Invoke the callables of each connection's partition.
+
+    The callables for an individual connection are always called in
+    order, each with a ``defer(fn, *args)`` function through which any
+    change to instance state is requested.  If the flush options of the
+    unit of work specify a ``concurrent_callable``, and more than one
+    connection is involved, the partitions are passed to it as a list of
+    callables, which it is expected to invoke concurrently, returning
+    once all have completed; the deferred changes are then applied on
+    the calling thread, in order of partition.  Column defaults which
+    are Python functions would be invoked from other threads, so the
+    ``python_defaults`` columns, which require them, raise an error in
+    this mode.
+
+    """
+    if len(partitions) > 1 and 'concurrent_callable' in uowtransaction.mapper_flush_opts:
+        if python_defaults:
+            raise sa_exc.InvalidRequestError(
+                "Column '%s' requires its Python function default, "
+                "which can't be invoked by a concurrent flush; assign "
+                "a value to the attribute before flushing" % python_defaults[0])
+
+        deferred = []
+        def partition(fns):
+            calls = []
+            deferred.append(calls)
+            def defer(fn, *args):
+                calls.append((fn, args))
+            def go():
+                for fn in fns:
+                    fn(defer)
+            return go
+        uowtransaction.mapper_flush_opts['concurrent_callable'](
+            [partition(fns) for fns in partitions.itervalues()])
+
+        for calls in deferred:
+            for fn, args in calls:
+                fn(*args)
+    else:
+        def defer(fn, *args):
+            fn(*args)
+        for fns in partitions.itervalues():
+            for fn in fns:
+                fn(defer)
+
+def _insert_batches(table, insert):
+    """Group the INSERT records for ``table`` which may be executed together.
+
+    Consecutive records for the same connection are grouped when each
+    supplies a value for every column it maps, including the primary key,
+    so that no value needs to be fetched back for any one row; the primary
+    key is typically assigned from a Sequence with ``prefetch``.  Other
+    records are returned singly.
+
+    """
+    batches = []
+    keys = None
+    for rec in insert:
+        state, params, mapper, connection, value_params = rec
+        if value_params or len(params) != len(mapper._cols_by_table[table]):
+            batches.append([rec])
+            keys = None
+        elif keys is not None and batches[-1][0][3] is connection and keys == set(params):
+            batches[-1].append(rec)
+        else:
+            batches.append([rec])
+            keys = set(params)
+    return batches
+
 def _sort_states(states):
     return sorted(states, key=operator.attrgetter('sort_key'))
 
@@ -1766,13 +2176,17 @@ def _load_scalar_attributes(state, attribute_names):
     """initiate a column-based attribute refresh operation."""
     
     mapper = _state_mapper(state)
-    session = _state_session(state)
+    session = _state_loading_session(state)
     if not session:
         raise sa_exc.UnboundExecutionError("Instance %s is not bound to a Session; "
                     "attribute refresh operation cannot proceed" % (state_str(state)))
 
     has_key = _state_has_identity(state)
 
+    if has_key and state.expired and state.load_group and len(mapper.primary_key) == 1:
+        if _load_expired_group(state, mapper, session):
+            return
+
     result = False
     if mapper.inherits and not mapper.concrete:
         statement = mapper._optimized_get_statement(state, attribute_names)
@@ -1789,3 +2203,37 @@ def _load_scalar_attributes(state, attribute_names):
     # if instance is pending, a refresh operation may not complete (even if PK attributes are assigned)
     if has_key and result is None:
         raise exc.ObjectDeletedError("Instance '%s' has been deleted." % state_str(state))
+
+def _load_expired_group(state, mapper, session):
+    """Refresh an expired state along with the other expired states of its
+    mapper which were loaded by the same query, using one SELECT per chunk
+    of primary key values.
+
+    Returns False if no other state is eligible, in which case the state
+    is refreshed on its own.
+
+    """
+    identity_map = session.identity_map
+    states = [state]
+    for key in state.load_group:
+        if key == state.key or key not in identity_map:
+            continue
+        other = attributes.instance_state(identity_map[key])
+        if other.generation.expired:
+            other.expire_generation()
+        if other.expired and _state_mapper(other) is mapper:
+            states.append(other)
+    if len(states) == 1:
+        return False
+
+    chunksize = session.get_bind(mapper).dialect.max_bind_params
+    col = mapper.primary_key[0]
+    loaded = set()
+    for i in xrange(0, len(states), chunksize):
+        ids = [s.key[1][0] for s in states[i:i + chunksize]]
+        q = session.query(mapper).autoflush(False).filter(col.in_(ids))
+        loaded.update(id(obj) for obj in q)
+
+    if id(state.obj()) not in loaded:
+        raise exc.ObjectDeletedError("Instance '%s' has been deleted." % state_str(state))
+    return True
@@ -264,10 +264,12 @@ class RelationProperty(StrategizedProperty):
                  passive_updates=True, remote_side=None,
                  enable_typechecks=True, join_depth=None,
                  comparator_factory=None, strategy_class=None,
-                 _local_remote_pairs=None, query_class=None):
+                 _local_remote_pairs=None, query_class=None,
+                 secondary_batch_size=500):
         self.uselist = uselist
         self.argument = argument
         self.secondary = secondary
+        self.secondary_batch_size = secondary_batch_size
         self.primaryjoin = primaryjoin
         self.secondaryjoin = secondaryjoin
         self.post_update = post_update
@@ -312,6 +314,9 @@ class RelationProperty(StrategizedProperty):
         if self.passive_deletes == 'all' and ("delete" in self.cascade or "delete-orphan" in self.cascade):
             raise sa_exc.ArgumentError("Can't set passive_deletes='all' in conjunction with 'delete' or 'delete-orphan' cascade")
 
+        if self.secondary_batch_size < 1:
+            raise sa_exc.ArgumentError("secondary_batch_size must be at least 1 (received: %r)" % (self.secondary_batch_size,))
+
         self.order_by = order_by
 
         if isinstance(backref, str):
@@ -69,6 +69,10 @@ class Query(object):
         self._statement = None
         self._params = {}
         self._yield_per = None
+        self._streaming = False
+        self._expunge_batches = False
+        self._readonly = False
+        self._query_cache = None
         self._criterion = None
         self._correlate = set()
         self._joinpoint = None
@@ -408,6 +412,142 @@ class Query(object):
         """
         self._yield_per = count
 
+    def stream(self, batch=1000, expunge=True):
+        """Iterate the results of this Query in batches of ``batch`` rows, using bounded memory.
+
+        Rows are fetched and instances hydrated ``batch`` rows at a time,
+        as with ``yield_per()``.  Instances which were already returned in
+        the previous batch are not returned again, so that an instance
+        whose rows span a batch boundary is only produced once.
+
+        When ``expunge`` is True, the instances loaded for each batch,
+        including those loaded by eager loaders, are expunged from the
+        Session once iteration has advanced past that batch, so that the
+        Session does not grow with the size of the result.  Instances
+        which have been modified are left in the Session so that their
+        changes may be flushed.  Objects loaded by lazy loaders during
+        iteration are not expunged.
+
+        The cautions regarding eagerly loaded collections described in
+        ``yield_per()`` apply here as well.
+
+        """
+        q = self.yield_per(batch)
+        q._streaming = True
+        q._expunge_batches = expunge
+        return iter(q)
+
+    def windowed(self, key, size=1000):
+        """Iterate the results of this Query a page at a time, using keyset pagination.
+
+        Each page is selected using criterion against the last key value
+        of the previous page, i.e. ``WHERE key > :last ORDER BY key LIMIT
+        :size``, so that the cost of selecting a page does not grow with its
+        depth into the result, as is the case with ``offset()``.
+
+        :param key: a column or mapped attribute which uniquely orders the
+            rows of this Query, or a list of them for a composite key.  Each
+            may be wrapped in ``desc()`` to page in descending order.  Key
+            columns may not contain NULL values.
+
+        :param size: the number of results in each page.
+
+        The Query must not have ORDER BY, LIMIT or OFFSET applied.  Each
+        page is a separate Query and honors ``yield_per()``.
+
+        """
+        self.__no_statement_condition("windowed")
+        self.__no_limit_offset("windowed")
+        if self._order_by:
+            raise sa_exc.InvalidRequestError(
+                "Query.windowed() being called on a Query which already has ORDER BY applied.")
+
+        keys = []
+        for k in util.to_list(key):
+            k = expression._literal_as_column(k)
+            if isinstance(k, expression._UnaryExpression) and k.modifier in (operators.asc_op, operators.desc_op):
+                keys.append((k.element, k.modifier is operators.desc_op))
+            else:
+                keys.append((k, False))
+
+        return self._windowed(keys, size)
+
+    def _windowed(self, keys, size):
+        q = self.order_by(*[desc and col.desc() or col for col, desc in keys])
+        for col, desc in keys:
+            q = q.add_column(col)
+
+        width = len(self._entities)
+        # a single mapped entity produces instances, as does the Query
+        # itself; otherwise rows are produced as tuples
+        single_entity = width == 1 and isinstance(self._entities[0], _MapperEntity)
+        if not single_entity:
+            rowtuple = _rowtuple_type([ent._result_label for ent in self._entities])
+
+        last = None
+        while True:
+            if last is None:
+                page = q.limit(size)
+            else:
+                page = q.filter(_keyset_criterion(keys, last)).limit(size)
+
+            count = 0
+            for row in page:
+                count += 1
+                last = row[width:]
+                if single_entity:
+                    yield row[0]
+                else:
+                    yield rowtuple(row[0:width])
+
+            if count < size:
+                break
+
+    @_generative()
+    def readonly(self):
+        """Load instances in read-only mode.
+
+        Instances loaded by a read-only Query are not placed in the
+        Session's identity map and do not track changes; they are
+        intended for large, read-only result sets such as reports, where
+        the cost of identity management and change tracking is wasted.
+
+        Each row produces a new instance, unique only within the result of
+        this Query.  Eagerly loaded relations are populated as usual.
+        Deferred columns and lazy-loading relations still load when
+        accessed; the objects they load are placed in the Session normally.
+
+        A read-only instance can't be added to, deleted from or flushed
+        by a Session; use ``merge()`` to copy its state onto a persistent
+        instance.
+
+        """
+        self._readonly = True
+
+    @_generative()
+    def cache(self, query_cache=None):
+        """Store the results of this Query within a QueryCache, and retrieve them from it.
+
+        The given :class:`~sqlalchemy.orm.caching.QueryCache` is used, else
+        the ``query_cache`` configured on the Session.  Results are keyed on
+        the SQL statement and its parameters, and are invalidated when any
+        table they select from is changed by a flush or by ``update()`` or
+        ``delete()``.  Cached instances are merged into the Session using
+        ``merge(dont_load=True)``.
+
+        Results aren't cached for queries which are read-only, use
+        ``populate_existing()`` or ``with_lockmode()``, or which select from
+        a table the Session has changed within its current transaction.
+
+        """
+        if query_cache is None:
+            query_cache = self.session.query_cache
+            if query_cache is None:
+                raise sa_exc.InvalidRequestError(
+                    "Query.cache() requires a QueryCache, either passed "
+                    "directly or configured as the Session's query_cache")
+        self._query_cache = query_cache
+
     def get(self, ident):
         """Return an instance of the object based on the given identifier, or None if not found.
 
@@ -423,6 +563,25 @@ class Query(object):
         key = self._only_mapper_zero("get() can only be used against a single mapped class.").identity_key_from_primary_key(ident)
         return self._get(key, ident)
 
+    def get_many(self, idents):
+        """Return a list of instances based on the given identifiers, in the same order.
+
+        Each identifier is a scalar or tuple of primary key column values,
+        as accepted by ``get()``.  Instances already present in the Session
+        are returned without SQL; the remainder are loaded using one SELECT
+        per chunk of identifiers.  ``None`` is returned in place of each
+        identifier which isn't found.
+
+        """
+        mapper = self._only_mapper_zero("get_many() can only be used against a single mapped class.")
+        keys = []
+        for ident in idents:
+            # convert composite types to individual args
+            if hasattr(ident, '__composite_values__'):
+                ident = ident.__composite_values__()
+            keys.append(mapper.identity_key_from_primary_key(ident))
+        return self._get_many(keys)
+
     @classmethod
     @util.deprecated('Deprecated.  Use sqlalchemy.orm.with_parent '
                      'in conjunction with filter().')
@@ -1098,6 +1257,8 @@ class Query(object):
         context.statement.use_labels = True
         if self._autoflush and not self._populate_existing:
             self.session._autoflush()
+        if self._query_cache is not None:
+            return self._query_cache._iterate(self, context)
         return self._execute_and_instances(context)
 
     def _execute_and_instances(self, querycontext):
@@ -1113,8 +1274,6 @@ class Query(object):
             for u in session.query(User).instances(result):
                 print u
         """
-        session = self.session
-
         context = __context
         if context is None:
             context = QueryContext(self)
@@ -1122,30 +1281,36 @@ class Query(object):
         context.runid = _new_runid()
 
         filtered = bool(list(self._mapper_entities))
-        single_entity = filtered and len(self._entities) == 1
+        if not filtered:
+            return self._column_instances(cursor, context)
 
-        if filtered:
-            if single_entity:
-                filter = lambda x: util.unique_list(x, util.IdentitySet)
-            else:
-                filter = util.unique_list
+        single_entity = len(self._entities) == 1
+
+        if single_entity:
+            filter = lambda x: util.unique_list(x, util.IdentitySet)
         else:
-            filter = None
+            filter = util.unique_list
 
         custom_rows = single_entity and 'append_result' in self._entities[0].extension
 
         (process, labels) = zip(*[query_entity.row_processor(self, context, custom_rows) for query_entity in self._entities])
 
-        if not single_entity:
-            labels = dict((label, property(itemgetter(i)))
-                          for i, label in enumerate(labels)
-                          if label)
-            rowtuple = type.__new__(type, "RowTuple", (tuple,), labels)
-            rowtuple.keys = labels.keys
+        if single_entity:
+            rowtuple = None
+        else:
+            rowtuple = _rowtuple_type(labels)
+
+        return self._instances(cursor, context, process, rowtuple, filter, custom_rows, single_entity)
 
+    def _instances(self, cursor, context, process, rowtuple, filter, custom_rows, single_entity):
+        session = self.session
+        window = ()
         while True:
             context.progress = set()
             context.partials = {}
+            # identity keys of the instances loaded by this batch, which
+            # are refreshed together once expired
+            context.load_group = []
 
             if self._yield_per:
                 fetch = cursor.fetchmany(self._yield_per)
@@ -1164,12 +1329,25 @@ class Query(object):
                 rows = [rowtuple(proc(context, row) for proc in process)
                         for row in fetch]
 
-            if filter:
-                rows = filter(rows)
+            rows = filter(rows)
 
-            if context.refresh_state and self._only_load_props and context.refresh_state in context.progress:
-                context.refresh_state.commit(self._only_load_props)
-                context.progress.remove(context.refresh_state)
+            if self._streaming and single_entity and not custom_rows:
+                # unique against the previous batch, whose instances
+                # may have been expunged
+                keys = [row is not None and attributes.instance_state(row).key or None
+                        for row in rows]
+                rows = [row for row, key in zip(rows, keys) if key not in window]
+                window = set(keys)
+
+            session._register_loaded(context.progress)
+            session._register_loaded(context.partials)
+
+            if self._only_load_props:
+                # a subset of attributes was refreshed; pending changes
+                # to the remaining attributes are retained
+                for state in context.progress:
+                    state.commit(self._only_load_props)
+                context.progress.clear()
 
             session._finalize_loaded(context.progress)
 
@@ -1179,16 +1357,49 @@ class Query(object):
             for row in rows:
                 yield row
 
+            if self._expunge_batches:
+                for state in context.progress:
+                    if not state.modified:
+                        session._expunge_state(state)
+
             if not self._yield_per:
                 break
+
+    def _column_instances(self, cursor, context):
+        """Produce rows for a Query consisting only of column expressions.
+
+        No instances are loaded, so there's no uniquing or Session
+        finalization to perform; rows are produced directly from the
+        cursor.
+
+        """
+        columns = [ent._row_column(self, context) for ent in self._entities]
+        rowtuple = _rowtuple_type([ent._result_label for ent in self._entities])
+
+        while True:
+            if self._yield_per:
+                fetch = cursor.fetchmany(self._yield_per)
+                if not fetch:
+                    break
+            else:
+                fetch = cursor.fetchall()
+
+            for row in fetch:
+                yield rowtuple([row[c] for c in columns])
+
+            if not self._yield_per:
+                break
+
     iterate_instances = util.deprecated()(instances)
 
     def _get(self, key=None, ident=None, refresh_state=None, lockmode=None, only_load_props=None):
         lockmode = lockmode or self._lockmode
-        if not self._populate_existing and not refresh_state and not self._mapper_zero().always_refresh and lockmode is None:
+        if not self._populate_existing and not self._readonly and not refresh_state and not self._mapper_zero().always_refresh and lockmode is None:
             try:
                 instance = self.session.identity_map[key]
                 state = attributes.instance_state(instance)
+                if state.generation.expired:
+                    state.expire_generation()
                 if state.expired:
                     try:
                         state()
@@ -1197,7 +1408,10 @@ class Query(object):
                         return None
                 return instance
             except KeyError:
-                pass
+                if self.session.identity_cache is not None:
+                    instance = self.session._get_from_identity_cache(key)
+                    if instance is not None:
+                        return instance
 
         if ident is None:
             if key is not None:
@@ -1241,6 +1455,66 @@ class Query(object):
         except IndexError:
             return None
 
+    def _get_many(self, keys, refresh=False, only_load_props=None):
+        lockmode = self._lockmode
+        q = self._clone()
+        if not refresh:
+            q.__no_criterion_condition("get_many")
+        mapper = q._mapper_zero()
+
+        found = {}
+        expired = []
+        if not refresh and not q._populate_existing and not q._readonly and not mapper.always_refresh and lockmode is None:
+            for key in keys:
+                if key in found:
+                    continue
+                try:
+                    instance = self.session.identity_map[key]
+                except KeyError:
+                    if self.session.identity_cache is not None:
+                        instance = self.session._get_from_identity_cache(key)
+                        if instance is not None:
+                            found[key] = instance
+                    continue
+                state = attributes.instance_state(instance)
+                if state.generation.expired:
+                    state.expire_generation()
+                if state.expired:
+                    expired.append(state)
+                else:
+                    found[key] = instance
+
+        remaining = util.unique_list([key for key in keys if key not in found])
+        if remaining:
+            pk_cols = mapper.primary_key
+            chunksize = max(1, self.session.get_bind(mapper).dialect.max_bind_params // len(pk_cols))
+            for i in xrange(0, len(remaining), chunksize):
+                chunk = remaining[i:i + chunksize]
+                if len(pk_cols) == 1:
+                    criterion = pk_cols[0].in_([key[1][0] for key in chunk])
+                else:
+                    criterion = sql.or_(*[
+                        sql.and_(*[col == value for col, value in zip(pk_cols, key[1])])
+                        for key in chunk])
+
+                cq = q._clone()
+                cq._criterion = cq._adapt_clause(criterion, True, False)
+                if lockmode is not None:
+                    cq._lockmode = lockmode
+                cq.__get_options(
+                    populate_existing=refresh,
+                    version_check=(lockmode is not None),
+                    only_load_props=only_load_props)
+                cq._order_by = None
+                for instance in cq:
+                    found[attributes.instance_state(instance).key] = instance
+
+        for state in expired:
+            if state.key not in found:
+                self.session._remove_newly_deleted(state)
+
+        return [found.get(key) for key in keys]
+
     @property
     def _select_args(self):
         return {
@@ -1392,6 +1666,9 @@ class Query(object):
                 if identity_key in session.identity_map:
                     session._remove_newly_deleted(attributes.instance_state(session.identity_map[identity_key]))
 
+        session._invalidate_identity_cache(class_=self._mapper_zero()._identity_class)
+        session._invalidate_query_cache([primary_table])
+
         for ext in session.extensions:
             ext.after_bulk_delete(session, self, context, result)
 
@@ -1478,6 +1755,7 @@ class Query(object):
                         state.dict[key] = value_evaluators[key](obj)
 
                     state.commit(list(to_evaluate))
+                    session._register_altered(state)
 
                     # expire attributes with pending changes (there was no autoflush, so they are overwritten)
                     state.expire_attributes(set(evaluated_keys).difference(to_evaluate))
@@ -1488,7 +1766,12 @@ class Query(object):
             for primary_key in matched_rows:
                 identity_key = target_mapper.identity_key_from_primary_key(list(primary_key))
                 if identity_key in session.identity_map:
-                    session.expire(session.identity_map[identity_key], values.keys())
+                    obj = session.identity_map[identity_key]
+                    session.expire(obj, values.keys())
+                    session._register_altered(attributes.instance_state(obj))
+
+        session._invalidate_identity_cache(class_=self._mapper_zero()._identity_class)
+        session._invalidate_query_cache([primary_table])
 
         for ext in session.extensions:
             ext.after_bulk_update(session, self, context, result)
@@ -1741,12 +2024,14 @@ class _MapperEntity(_QueryEntity):
             def main(context, row):
                 return _instance(row, None)
 
+        return main, self._result_label
+
+    @property
+    def _result_label(self):
         if self.is_aliased_class:
-            entname = self.entity._sa_label_name
+            return self.entity._sa_label_name
         else:
-            entname = self.mapper.class_.__name__
-
-        return main, entname
+            return self.mapper.class_.__name__
 
     def setup_context(self, query, context):
         adapter = self._get_entity_clauses(query, context)
@@ -1770,7 +2055,18 @@ class _MapperEntity(_QueryEntity):
                 only_load_props=query._only_load_props,
                 column_collection=context.primary_columns
             )
-        
+
+        if query._only_load_props and context.refresh_state is None and self.primary_entity:
+            # the identity of each row is located from its primary key
+            for col in self.mapper.primary_key:
+                if adapter:
+                    col = adapter.columns[col]
+                for c in context.primary_columns:
+                    if c is col:
+                        break
+                else:
+                    context.primary_columns.append(col)
+
         if self._polymorphic_discriminator:
             if adapter:
                 pd = adapter.columns[self._polymorphic_discriminator]
@@ -1851,11 +2147,15 @@ class _ColumnEntity(_QueryEntity):
     def _resolve_expr_against_query_aliases(self, query, expr, context):
         return query._adapt_clause(expr, False, True)
 
-    def row_processor(self, query, context, custom_rows):
+    def _row_column(self, query, context):
         column = self._resolve_expr_against_query_aliases(query, self.column, context)
 
         if context.adapter:
             column = context.adapter.columns[column]
+        return column
+
+    def row_processor(self, query, context, custom_rows):
+        column = self._row_column(query, context)
 
         def proc(context, row):
             return row[column]
@@ -1893,6 +2193,9 @@ class QueryContext(object):
         self.populate_existing = query._populate_existing
         self.version_check = query._version_check
         self.refresh_state = query._refresh_state
+        self.readonly = query._readonly
+        if self.readonly:
+            self.readonly_identity_map = {}
         self.primary_columns = []
         self.secondary_columns = []
         self.eager_order_by = []
@@ -1917,6 +2220,51 @@ class AliasOption(interfaces.MapperOption):
         query._from_obj_alias = sql_util.ColumnAdapter(alias)
 
 
+def _keyset_criterion(keys, values):
+    """Produce criterion selecting rows which follow the given values of a (possibly composite) ordering key."""
+
+    clauses = []
+    for i, (col, desc) in enumerate(keys):
+        crit = [keys[j][0] == values[j] for j in xrange(i)]
+        if desc:
+            crit.append(col < values[i])
+        else:
+            crit.append(col > values[i])
+        clauses.append(sql.and_(*crit))
+    return sql.or_(*clauses)
+
+_rowtuple_types = util.LRUCache(100)
+_rowtuple_types_mutex = util.threading.Lock()
+
+def _rowtuple_type(labels):
+    """Return a tuple subclass with named accessors for the given labels.
+
+    Types are cached per sequence of labels, for the most recently used
+    sequences, so that repeated execution of similar queries doesn't
+    generate a new class for each result.
+
+    """
+    labels = tuple(labels)
+    _rowtuple_types_mutex.acquire()
+    try:
+        rowtuple = _rowtuple_types.get(labels)
+    finally:
+        _rowtuple_types_mutex.release()
+    if rowtuple is not None:
+        return rowtuple
+
+    props = dict((label, property(itemgetter(i)))
+                 for i, label in enumerate(labels)
+                 if label)
+    rowtuple = type.__new__(type, "RowTuple", (tuple,), props)
+    rowtuple.keys = props.keys
+    _rowtuple_types_mutex.acquire()
+    try:
+        _rowtuple_types[labels] = rowtuple
+    finally:
+        _rowtuple_types_mutex.release()
+    return rowtuple
+
 _runid = 1L
 _id_lock = util.threading.Lock()
 
@@ -136,7 +136,9 @@ def sessionmaker(bind=None, class_=None, autoflush=True, autocommit=False,
     expire_on_commit
       Defaults to ``True``. When ``True``, all instances will be fully expired after
       each ``commit()``, so that all attribute/object access subsequent to a completed
-      transaction will load from the most recent database state.
+      transaction will load from the most recent database state.  Each instance
+      is expired as it's next accessed, at which point it's refreshed along with
+      the other expired instances of its mapper loaded by the same query.
 
     extension
       An optional :class:`~sqlalchemy.orm.session.SessionExtension` instance, or
@@ -145,6 +147,33 @@ def sessionmaker(bind=None, class_=None, autoflush=True, autocommit=False,
       post-rollback event.  User- defined code may be placed within these
       hooks using a user-defined subclass of ``SessionExtension``.
 
+    identity_cache
+      An optional :class:`~sqlalchemy.orm.identity.IdentityCache`, shared
+      among Sessions, which retains the state of loaded instances beyond
+      the lifespan of any one Session.  ``Query.get()`` will construct
+      instances from the cache, without emitting SQL, for identities not
+      present in the Session.  Rows changed by a flush are discarded from
+      the cache, and aren't stored again by this Session until its
+      transaction ends.
+
+    ordered_flush
+      Defaults to ``False``.  When ``True``, ``flush()`` issues the UPDATE
+      and DELETE statements for each table, including the rows of
+      many-to-many association tables, in order of primary key, and
+      processes unrelated mappers in a fixed order, so that concurrent
+      flushes acquire row locks in the same order and are less prone to
+      deadlock.  Rows are deleted with one DELETE per row rather than
+      with multi-row ``IN`` criteria, as the order in which a single
+      statement locks its rows isn't defined.  Costs a sort of each
+      table's rows per flush.
+
+    query_cache
+      An optional :class:`~sqlalchemy.orm.caching.QueryCache`, shared among
+      Sessions, in which the results of queries marked with
+      ``Query.cache()`` are stored.  Tables changed by a flush are
+      invalidated within the cache, and aren't read from or stored in the
+      cache by this Session until its transaction ends.
+
     query_cls
       Class which should be used to create new Query objects, as returned
       by the ``query()`` method.  Defaults to :class:`~sqlalchemy.orm.query.Query`.
@@ -279,6 +308,8 @@ class SessionTransaction(object):
         if not self._is_transaction_boundary:
             self._new = self._parent._new
             self._deleted = self._parent._deleted
+            self._dirty = self._parent._dirty
+            self._savepoint = self._parent._savepoint
             return
 
         if not self.session._flushing:
@@ -286,10 +317,20 @@ class SessionTransaction(object):
 
         self._new = weakref.WeakKeyDictionary()
         self._deleted = weakref.WeakKeyDictionary()
+        # persistent states altered within this transaction, along with
+        # those loaded or refreshed while a SAVEPOINT is in progress
+        self._dirty = weakref.WeakKeyDictionary()
+        self._savepoint = self.nested
 
     def _restore_snapshot(self):
         assert self._is_transaction_boundary
 
+        if self.nested:
+            # states neither altered nor loaded since the SAVEPOINT began
+            # still match the database
+            dirty = set(self._dirty).union(self._deleted).union(
+                self.session.identity_map._modified_states())
+
         for s in set(self._deleted).union(self.session._deleted):
             self.session._update_impl(s)
 
@@ -298,15 +339,24 @@ class SessionTransaction(object):
         for s in set(self._new).union(self.session._new):
             self.session._expunge_state(s)
 
-        for s in self.session.identity_map.all_states():
-            _expire_state(s, None)
+        if self.nested:
+            for s in dirty:
+                if self.session.identity_map.contains_state(s):
+                    _expire_state(s, None)
+        else:
+            for s in self.session.identity_map.all_states():
+                _expire_state(s, None)
 
     def _remove_snapshot(self):
         assert self._is_transaction_boundary
 
-        if not self.nested and self.session.expire_on_commit:
-            for s in self.session.identity_map.all_states():
-                _expire_state(s, None)
+        if self.nested:
+            # the enclosing transaction assumes the changes of the SAVEPOINT
+            self._parent._new.update(self._new)
+            self._parent._deleted.update(self._deleted)
+            self._parent._dirty.update(self._dirty)
+        elif self.session.expire_on_commit:
+            self.session.identity_map.expire_all()
 
     def _connection_for_bind(self, bind):
         self._assert_is_active()
@@ -426,6 +476,7 @@ class SessionTransaction(object):
     def close(self):
         self.session.transaction = self._parent
         if self._parent is None:
+            self.session._release_caches()
             for connection, transaction, autoclose in set(self._connections.values()):
                 if autoclose:
                     connection.close()
@@ -533,7 +584,8 @@ class Session(object):
     def __init__(self, bind=None, autoflush=True, expire_on_commit=True,
                 _enable_transaction_accounting=True,
                  autocommit=False, twophase=False, echo_uow=None,
-                 weak_identity_map=True, binds=None, extension=None, query_cls=query.Query):
+                 weak_identity_map=True, binds=None, extension=None, query_cls=query.Query,
+                 identity_cache=None, query_cache=None, ordered_flush=False):
         """Construct a new Session.
 
         Arguments to ``Session`` are described using the
@@ -555,6 +607,10 @@ class Session(object):
 
         self._new = {}   # InstanceState->object, strong refs object
         self._deleted = {}  # same
+        # the number of instances removed individually from this Session,
+        # and that number as of each state's last save-update cascade
+        self._removed_count = 0
+        self._cascaded = weakref.WeakKeyDictionary()
         self.bind = bind
         self.__binds = {}
         self._flushing = False
@@ -568,6 +624,13 @@ class Session(object):
         self.extensions = util.to_list(extension) or []
         self._query_cls = query_cls
         self._mapper_flush_opts = {}
+        if ordered_flush:
+            self._mapper_flush_opts['ordered'] = True
+        self.identity_cache = identity_cache
+        self._cache_written_keys = set()
+        self._cache_written_classes = set()
+        self.query_cache = query_cache
+        self._query_cache_written = set()
 
         if binds is not None:
             for mapperortable, value in binds.iteritems():
@@ -906,6 +969,106 @@ class Session(object):
     def _finalize_loaded(self, states):
         for state in states:
             state.commit_all()
+        if self.identity_cache is not None:
+            for state in states:
+                self._store_in_identity_cache(state)
+
+    def _store_in_identity_cache(self, state):
+        key = state.key
+        if key is None or key in self._cache_written_keys or \
+                key[0] in self._cache_written_classes:
+            return
+
+        if state.generation.expired:
+            # nothing current remains to be cached
+            state.expire_generation()
+            return
+
+        mapper = _state_mapper(state)
+        dict_ = state.dict
+        mutable = state.manager.mutable_attributes
+        values = {}
+        for prop in mapper._columntoproperty.itervalues():
+            if prop.key in dict_:
+                value = dict_[prop.key]
+                if prop.key in mutable:
+                    value = state.manager[prop.key].impl.copy(value)
+                values[prop.key] = value
+        self.identity_cache.put(key, state.class_, values)
+
+    def _get_from_identity_cache(self, key):
+        """Return an instance constructed from the identity cache, or None."""
+
+        cached = self.identity_cache.get(key)
+        if cached is None:
+            return None
+        class_, values = cached
+        mapper = _class_mapper(class_)
+
+        instance = mapper.class_manager.new_instance()
+        state = attributes.instance_state(instance)
+        state.key = key
+        mutable = state.manager.mutable_attributes
+        for attr_key, value in values.iteritems():
+            if attr_key in mutable:
+                value = state.manager[attr_key].impl.copy(value)
+            state.dict[attr_key] = value
+        state.commit_all()
+
+        unloaded = [prop.key for prop in mapper._columntoproperty.itervalues()
+                    if prop.key not in values]
+        if unloaded:
+            state.expire_attributes(unloaded)
+
+        state.session_id = self.hash_key
+        self.identity_map.add(state)
+        state._run_on_load(instance)
+        return instance
+
+    def _invalidate_identity_cache(self, key=None, class_=None):
+        """Discard the given identity key or class from the identity cache.
+
+        Within a transaction, the identity or class is not stored in the
+        cache by this Session again until the transaction ends, when it is
+        discarded once more.
+
+        """
+        if self.identity_cache is None:
+            return
+        if key is not None:
+            if self.transaction is not None:
+                self._cache_written_keys.add(key)
+            self.identity_cache.invalidate(key)
+        if class_ is not None:
+            if self.transaction is not None:
+                self._cache_written_classes.add(class_)
+            self.identity_cache.invalidate_class(class_)
+
+    def _invalidate_query_cache(self, tables):
+        """Invalidate the given tables within the query cache.
+
+        Within a transaction, queries against the tables don't use the
+        cache until the transaction ends, when the tables are invalidated
+        once more.
+
+        """
+        if self.query_cache is None or not tables:
+            return
+        if self.transaction is not None:
+            self._query_cache_written.update(tables)
+        self.query_cache.invalidate(*tables)
+
+    def _release_caches(self):
+        if self.identity_cache is not None:
+            for key in self._cache_written_keys:
+                self.identity_cache.invalidate(key)
+            for class_ in self._cache_written_classes:
+                self.identity_cache.invalidate_class(class_)
+            self._cache_written_keys = set()
+            self._cache_written_classes = set()
+        if self.query_cache is not None and self._query_cache_written:
+            self.query_cache.invalidate(*self._query_cache_written)
+            self._query_cache_written = set()
 
     def refresh(self, instance, attribute_names=None):
         """Refresh the attributes on the given instance.
@@ -936,6 +1099,36 @@ class Session(object):
                 "Could not refresh instance '%s'" %
                 mapperutil.instance_str(instance))
 
+    def refresh_all(self, instances, attribute_names=None):
+        """Refresh the attributes on the given instances.
+
+        Equivalent to calling ``refresh()`` upon each instance, but
+        instances are refreshed using one query per mapper and chunk of
+        instances, rather than one query each.
+
+        The ``attribute_names`` argument is an iterable collection of
+        attribute names indicating a subset of attributes to be refreshed.
+
+        """
+        states = util.OrderedDict()
+        for instance in instances:
+            try:
+                state = attributes.instance_state(instance)
+            except exc.NO_STATE:
+                raise exc.UnmappedInstanceError(instance)
+            self._validate_persistent(state)
+            states.setdefault(_state_mapper(state), []).append(state)
+
+        for mapper, mapper_states in states.iteritems():
+            found = self.query(mapper)._get_many(
+                [state.key for state in mapper_states], refresh=True,
+                only_load_props=attribute_names)
+            for state, instance in zip(mapper_states, found):
+                if instance is None:
+                    raise sa_exc.InvalidRequestError(
+                        "Could not refresh instance '%s'" %
+                        mapperutil.state_str(state))
+
     def expire_all(self):
         """Expires all persistent instances within this Session."""
 
@@ -1005,10 +1198,12 @@ class Session(object):
         if state in self._new:
             self._new.pop(state)
             state.detach()
+            self._removed_count += 1
         elif self.identity_map.contains_state(state):
             self.identity_map.discard(state)
             self._deleted.pop(state, None)
             state.detach()
+            self._removed_count += 1
 
     def _register_newly_persistent(self, state):
         mapper = _state_mapper(state)
@@ -1024,7 +1219,9 @@ class Session(object):
             elif state.key != instance_key:
                 # primary key switch
                 self.identity_map.remove(state)
+                self._invalidate_identity_cache(key=state.key)
                 state.key = instance_key
+            self._invalidate_identity_cache(key=instance_key)
 
             if state.key in self.identity_map and not self.identity_map.contains_state(state):
                 self.identity_map.remove_key(state.key)
@@ -1036,13 +1233,36 @@ class Session(object):
             if self._enable_transaction_accounting and self.transaction:
                 self.transaction._new[state] = True
             self._new.pop(state)
+        else:
+            self._register_altered(state)
+
+    def _register_altered(self, state):
+        """Record a persistent state whose changes have been sent to the database."""
+
+        if self._enable_transaction_accounting and self.transaction:
+            self.transaction._dirty[state] = True
+
+    def _register_loaded(self, states):
+        """Record persistent states whose attributes have been loaded from the database.
+
+        Within a SAVEPOINT, the loaded values may reflect changes which
+        are discarded by its rollback.
+
+        """
+        if self._enable_transaction_accounting and self.transaction and \
+                self.transaction._savepoint:
+            for state in states:
+                self.transaction._dirty[state] = True
 
     def _remove_newly_deleted(self, state):
         if self._enable_transaction_accounting and self.transaction:
             self.transaction._deleted[state] = True
 
+        self._invalidate_identity_cache(key=state.key)
+
         self.identity_map.discard(state)
         self._deleted.pop(state, None)
+        self._removed_count += 1
 
     @util.pending_deprecation('0.5.x', "Use session.add()")
     def save(self, instance):
@@ -1102,8 +1322,17 @@ class Session(object):
             self.add(instance)
 
     def _save_or_update_state(self, state):
+        # the related instances of an unmodified, persistent instance
+        # which was cascaded to earlier remain in this Session, unless
+        # an instance has been removed since; don't traverse its graph
+        # again
+        cascade = state.key is None or state.modified or \
+                    not self.identity_map.contains_state(state) or \
+                    self._cascaded.get(state) != self._removed_count
         self._save_or_update_impl(state)
-        self._cascade_save_or_update(state)
+        if cascade:
+            self._cascade_save_or_update(state)
+            self._cascaded[state] = self._removed_count
 
     save_or_update = (
         util.pending_deprecation('0.5.x', "Use session.add()")(add))
@@ -1146,6 +1375,136 @@ class Session(object):
         for state, m, o in cascade_states:
             self._delete_impl(state)
 
+    def bulk_insert_mappings(self, mapper, mappings):
+        """Insert rows described by a list of dictionaries.
+
+        Each dictionary is keyed on the attribute names of the given
+        mapper or mapped class.  The rows are inserted immediately with
+        one ``executemany()`` per table, bypassing the unit of work:
+        no instances are created, and no cascades, identity map
+        handling, or ``MapperExtension`` events take place.  The
+        polymorphic identity and version id of the mapper are
+        populated as in a flush.
+
+        With joined table inheritance, rows lacking a primary key are
+        inserted one at a time, so that the generated key may populate
+        the tables which follow.
+
+        """
+        self._bulk_save([(_class_to_mapper(mapper), mappings, [])])
+
+    def bulk_update_mappings(self, mapper, mappings):
+        """Update rows described by a list of dictionaries.
+
+        Each dictionary is keyed on the attribute names of the given
+        mapper or mapped class, and must include the primary key, as
+        well as the current version id for a mapper with a
+        ``version_id_col``, which is incremented.  The remaining
+        attributes present are updated immediately with one
+        ``executemany()`` per table, bypassing the unit of work as
+        with :meth:`bulk_insert_mappings`.  Instances already present
+        in this ``Session`` are not refreshed.
+
+        """
+        self._bulk_save([(_class_to_mapper(mapper), [], mappings)])
+
+    def bulk_save_objects(self, objects):
+        """Insert or update the given instances, bypassing the unit of work.
+
+        Instances without a database identity are inserted with all of
+        their column attributes; others are updated with those column
+        attributes which have changed, as in
+        :meth:`bulk_update_mappings`.  Rows are inserted with one
+        ``executemany()`` per table and mapper, in the dependency order
+        of the tables, and are then updated in the same order.  Related
+        instances are not cascaded to, and the given instances
+        are not added to this ``Session``, nor is their state altered;
+        in particular, primary keys generated for inserted instances
+        aren't set upon them.
+
+        """
+        by_mapper = util.OrderedDict()
+        for instance in objects:
+            try:
+                state = attributes.instance_state(instance)
+            except exc.NO_STATE:
+                raise exc.UnmappedInstanceError(instance)
+            if state.generation.expired:
+                state.expire_generation()
+            mapper = _state_mapper(state)
+            inserts, updates = by_mapper.setdefault(mapper, ([], []))
+            if _state_has_identity(state):
+                mapping = {}
+                for prop in mapper._columntoproperty.itervalues():
+                    if prop.key in mapping:
+                        continue
+                    history = attributes.get_history(state, prop.key, passive=True)
+                    if history.added:
+                        mapping[prop.key] = history.added[0]
+                for col in list(mapper.primary_key) + (mapper.version_id_col and [mapper.version_id_col] or []):
+                    prop = mapper._columntoproperty[col]
+                    if prop.key not in mapping:
+                        mapping[prop.key] = mapper._get_state_attr_by_column(state, col)
+                updates.append(mapping)
+            else:
+                mapping = {}
+                for prop in mapper._columntoproperty.itervalues():
+                    if prop.key in state.dict:
+                        mapping[prop.key] = state.dict[prop.key]
+                inserts.append(mapping)
+
+        self._bulk_save([(mapper, inserts, updates)
+                         for mapper, (inserts, updates) in by_mapper.iteritems()])
+
+    def _bulk_save(self, saves):
+        """Insert and update rows for a list of ``(mapper, inserts, updates)``
+        tuples, table by table in dependency order.
+
+        """
+        saves = [(mapper, [dict(m) for m in inserts], [dict(m) for m in updates])
+                 for mapper, inserts, updates in saves]
+        tables = sql_util.sort_tables(set(table for mapper, inserts, updates in saves
+                                          for table in mapper._bulk_tables()))
+
+        connections = {}
+        transactions = []
+        try:
+            try:
+                for mapper, inserts, updates in saves:
+                    bind = self.get_bind(mapper)
+                    if bind not in connections:
+                        connections[bind] = self.connection(mapper)
+                        if self.transaction is None:
+                            # an autocommit Session; the statements are
+                            # committed together, without flushing any
+                            # pending changes
+                            transactions.append(connections[bind].begin())
+
+                for table in tables:
+                    for mapper, inserts, updates in saves:
+                        mapper_tables = mapper._bulk_tables()
+                        if inserts and table in mapper_tables:
+                            mapper._bulk_insert_table(connections[self.get_bind(mapper)], table,
+                                                      inserts, table is not mapper_tables[-1])
+                for table in tables:
+                    for mapper, inserts, updates in saves:
+                        if updates and table in mapper._bulk_tables():
+                            mapper._bulk_update_table(connections[self.get_bind(mapper)], table, updates)
+
+                for mapper, inserts, updates in saves:
+                    self._invalidate_identity_cache(class_=mapper._identity_class)
+                    self._invalidate_query_cache(mapper.tables)
+                for transaction in transactions:
+                    transaction.commit()
+            except:
+                for transaction in transactions:
+                    transaction.rollback()
+                raise
+        finally:
+            if self.transaction is None:
+                for connection in connections.itervalues():
+                    connection.close()
+
     def merge(self, instance, dont_load=False,
               _recursive=None):
         """Copy the state an instance onto the persistent instance with the same identifier.
@@ -1198,7 +1557,7 @@ class Session(object):
                 merged_state.key = key
                 self._update_impl(merged_state)
                 new_instance = True
-            else:
+            elif key not in _recursive.get(_MERGE_MISSING, ()):
                 merged = self.query(mapper.class_).autoflush(False).get(key[1])
 
         if merged is None:
@@ -1219,6 +1578,63 @@ class Session(object):
             merged_state._run_on_load(merged)
         return merged
 
+    def merge_all(self, instances, dont_load=False):
+        """Merge each of the given instances, returning the merged instances in the same order.
+
+        Equivalent to calling ``merge()`` for each instance, except that
+        persistent instances not present in the session, including those
+        reached along relations mapped with ``cascade="merge"``, are
+        loaded using one query per mapper and chunk of identities rather
+        than one query each.
+
+        """
+        instances = list(instances)
+        _recursive = {}
+        self._autoflush()
+
+        if not dont_load:
+            from sqlalchemy.orm import strategies
+
+            keys = util.OrderedDict()
+            collections = {}
+            seen = set()
+            for instance in instances:
+                root = attributes.instance_state(instance)
+                for (state, o, m) in chain([(root, None, None)], _cascade_state_iterator('merge', root)):
+                    mapper = _state_mapper(state)
+                    key = state.key or mapper._identity_key_from_state(state)
+                    if key in seen or None in key[1] or key in self.identity_map:
+                        continue
+                    seen.add(key)
+                    keys.setdefault(mapper, []).append(key)
+
+                    # lazily loaded collections which are to be merged are
+                    # loaded along with their parent
+                    for prop in mapper.iterate_properties:
+                        if getattr(prop, 'lazy', None) is True and prop.uselist and \
+                                'merge' in prop.cascade and prop.key in state.dict:
+                            collections.setdefault(mapper, set()).add(prop.key)
+
+            # hold onto the loaded instances until they're merged
+            loaded = []
+            missing = set()
+            for mapper, mapper_keys in keys.iteritems():
+                # instances may have been loaded by a collection since
+                mapper_keys = [key for key in mapper_keys if key not in self.identity_map]
+                q = self.query(mapper).autoflush(False).options(
+                    *[strategies.EagerLazyOption((key,), lazy=False)
+                      for key in collections.get(mapper, ())])
+                found = q._get_many(mapper_keys)
+                for key, instance in zip(mapper_keys, found):
+                    if instance is None:
+                        missing.add(key)
+                    else:
+                        loaded.append(instance)
+            _recursive[_MERGE_MISSING] = missing
+
+        return [self.merge(instance, dont_load=dont_load, _recursive=_recursive)
+                for instance in instances]
+
     @classmethod
     def identity_key(cls, *args, **kwargs):
         return mapperutil.identity_key(*args, **kwargs)
@@ -1278,6 +1694,12 @@ class Session(object):
         self.identity_map.add(state)
     
     def _attach(self, state):
+        if state.readonly:
+            raise sa_exc.InvalidRequestError(
+                "Instance %s was loaded by a read-only Query and can't be "
+                "attached to a Session; use merge() to copy its state onto "
+                "a persistent instance." % mapperutil.state_str(state))
+
         if state.key and \
             state.key in self.identity_map and \
             not self.identity_map.contains_state(state):
@@ -1384,14 +1806,18 @@ class Session(object):
                 objset.add(state)
         else:
             # or just everything
-            objset = set(self.identity_map.all_states()).union(new)
+            objset = None
 
         # store objects whose fate has been decided
         processed = set()
 
+        proc = new.union(dirty).difference(deleted)
+        if objset is not None:
+            proc = proc.intersection(objset)
+
         # put all saves/updates into the flush context.  detect top-level
         # orphans and throw them into deleted.
-        for state in new.union(dirty).intersection(objset).difference(deleted):
+        for state in proc:
             is_orphan = _state_mapper(state)._is_orphan(state)
             if is_orphan and not _state_has_identity(state):
                 path = ", nor ".join(
@@ -1406,8 +1832,12 @@ class Session(object):
             flush_context.register_object(state, isdelete=is_orphan)
             processed.add(state)
 
+        proc = deleted.difference(processed)
+        if objset is not None:
+            proc = proc.intersection(objset)
+
         # put all remaining deletes into the flush context.
-        for state in deleted.intersection(objset).difference(processed):
+        for state in proc:
             flush_context.register_object(state, isdelete=True)
 
         if len(flush_context.tasks) == 0:
@@ -1427,6 +1857,16 @@ class Session(object):
         
         flush_context.finalize_flush_changes()
 
+        if self.query_cache is not None:
+            tables = set()
+            for mapper in set(_state_mapper(elem.state)
+                              for elem in flush_context.elements if not elem.listonly):
+                tables.update(mapper.tables)
+                for prop in mapper.iterate_properties:
+                    if getattr(prop, 'secondary', None) is not None:
+                        tables.add(prop.secondary)
+            self._invalidate_query_cache(tables)
+
         if not objects:
             self.identity_map.modified = False
 
@@ -1478,10 +1918,7 @@ class Session(object):
         those that were possibly deleted.
 
         """
-        return util.IdentitySet(
-            [state
-             for state in self.identity_map.all_states()
-             if state.check_modified()])
+        return util.IdentitySet(self.identity_map._modified_states())
 
     @property
     def dirty(self):
@@ -1525,6 +1962,10 @@ register_attribute = unitofwork.register_attribute
 
 _sessions = weakref.WeakValueDictionary()
 
+# key within the _recursive dictionary of merge() holding the identity
+# keys known to be absent from the database
+_MERGE_MISSING = util.symbol('MERGE_MISSING')
+
 def _cascade_state_iterator(cascade, state, **kwargs):
     mapper = _state_mapper(state)
     # yield the state, object, mapper.  yielding the object
@@ -1576,9 +2017,20 @@ def _state_session(state):
             pass
     return None
 
+def _state_loading_session(state):
+    """Return the Session which loads the unloaded attributes of a state.
+
+    This is the Session the state belongs to, or for an instance loaded by
+    a read-only Query, the Session which loaded it.
+
+    """
+    if state.readonly:
+        return _sessions.get(state.readonly_session_id)
+    return _state_session(state)
+
 # Lazy initialization to avoid circular imports
 unitofwork.object_session = object_session
 unitofwork._state_session = _state_session
 from sqlalchemy.orm import mapper
 mapper._expire_state = _expire_state
-mapper._state_session = _state_session
+mapper._state_loading_session = _state_loading_session
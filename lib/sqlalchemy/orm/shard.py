@@ -14,8 +14,15 @@ included in the source distrbution.
 
 """
 
+import atexit
+import heapq
+import itertools
+import sys
+
 import sqlalchemy.exceptions as sa_exc
 from sqlalchemy import util
+from sqlalchemy import queue as Queue
+from sqlalchemy.sql import expression, operators
 from sqlalchemy.orm.session import Session
 from sqlalchemy.orm.query import Query
 
@@ -23,7 +30,8 @@ __all__ = ['ShardedSession', 'ShardedQuery']
 
 
 class ShardedSession(Session):
-    def __init__(self, shard_chooser, id_chooser, query_chooser, shards=None, **kwargs):
+    def __init__(self, shard_chooser, id_chooser, query_chooser, shards=None, concurrent=False,
+                 max_threads=10, cache_negative_lookups=False, **kwargs):
         """Construct a ShardedSession.
 
         shard_chooser
@@ -42,21 +50,74 @@ class ShardedSession(Session):
         query_chooser
           For a given Query, returns the list of shard_ids where the query
           should be issued.  Results from all shards returned will be combined
-          together into a single listing.
+          together into a single listing; if the query has an ORDER BY, the
+          results of each shard are merged in order, which requires that
+          each ORDER BY expression is a column expression.  LIMIT and
+          OFFSET are applied to the combined instances.
+
+        concurrent
+          If True, a query against more than one shard executes its
+          statement against each shard concurrently, each within a thread
+          of the Session's pool using the Session's Connection for that
+          shard.  Unordered
+          results are combined as they arrive.  The DB-API in use must allow
+          a connection to be used by a thread other than the one which
+          created it.  Defaults to False, which queries each shard in turn.
+          ``Query.get()`` likewise probes all candidate shards returned by
+          ``id_chooser`` concurrently, returning the result of the first
+          shard in ``id_chooser`` order which has the row as soon as the
+          shards before it have been found not to; the Session waits for
+          the remaining probes only before its Connections are next used.
+          When flushing,
+          the INSERT, UPDATE and DELETE statements for each table are
+          partitioned by shard, and the partitions executed concurrently;
+          the statements for one table complete on all shards before those
+          of the next table in dependency order are issued.  Instance state
+          is updated from the results on the flushing thread.  Column
+          defaults which are Python functions aren't invoked by a concurrent
+          flush; an error is raised if one would be needed, so such
+          attributes must be assigned before flushing.
+
+        max_threads
+          The maximum number of threads used by a concurrent Session, which
+          are shared by its queries and flushes.  Threads are started as
+          needed and exit once idle.  Statements beyond this number wait
+          for a thread to become available.  Defaults to 10.
+
+        cache_negative_lookups
+          If True, the shards which ``Query.get()`` found not to contain a
+          given identity are remembered, and are not queried again for that
+          identity.  The memory of these lookups is cleared by
+          ``expunge_all()`` or ``close()``, and for an individual identity
+          when an instance with that identity is flushed within this
+          Session; rows inserted by other Sessions aren't detected.
+          Defaults to False.
 
         """
         super(ShardedSession, self).__init__(**kwargs)
         self.shard_chooser = shard_chooser
         self.id_chooser = id_chooser
         self.query_chooser = query_chooser
+        self.concurrent = concurrent
+        self.cache_negative_lookups = cache_negative_lookups
+        self._negative_lookups = {}
+        # concurrent probes of get() still in progress on the Session's
+        # Connections
+        self._pending_probes = []
         self.__binds = {}
-        self._mapper_flush_opts = {'connection_callable':self.connection}
+        self._mapper_flush_opts['connection_callable'] = self.connection
+        if concurrent:
+            self._thread_pool = _ThreadPool(max_threads)
+            self._mapper_flush_opts['concurrent_callable'] = self._thread_pool.run_to_completion
+        else:
+            self._thread_pool = None
         self._query_cls = ShardedQuery
         if shards is not None:
             for k in shards:
                 self.bind_shard(k, shards[k])
         
     def connection(self, mapper=None, instance=None, shard_id=None, **kwargs):
+        self._wait_for_probes()
         if shard_id is None:
             shard_id = self.shard_chooser(mapper, instance)
 
@@ -66,19 +127,57 @@ class ShardedSession(Session):
             return self.get_bind(mapper, shard_id=shard_id, instance=instance).contextual_connect(**kwargs)
     
     def get_bind(self, mapper, shard_id=None, instance=None, clause=None, **kw):
+        self._wait_for_probes()
         if shard_id is None:
             shard_id = self.shard_chooser(mapper, instance, clause=clause)
         return self.__binds[shard_id]
 
+    def commit(self):
+        self._wait_for_probes()
+        super(ShardedSession, self).commit()
+
+    def rollback(self):
+        self._wait_for_probes()
+        super(ShardedSession, self).rollback()
+
+    def prepare(self):
+        self._wait_for_probes()
+        super(ShardedSession, self).prepare()
+
+    def close(self):
+        self._wait_for_probes()
+        super(ShardedSession, self).close()
+
+    def _wait_for_probes(self):
+        while self._pending_probes:
+            self._pending_probes.pop().wait()
+
     def bind_shard(self, shard_id, bind):
         self.__binds[shard_id] = bind
 
+    def expunge_all(self):
+        super(ShardedSession, self).expunge_all()
+        self._negative_lookups = {}
+    clear = expunge_all
+
+    def _register_newly_persistent(self, state):
+        super(ShardedSession, self)._register_newly_persistent(state)
+        self._negative_lookups.pop(state.key, None)
+
+    def _record_negative_lookup(self, key, shard_id):
+        if self.cache_negative_lookups:
+            self._negative_lookups.setdefault(key, set()).add(shard_id)
+
+    def _is_negative_lookup(self, key, shard_id):
+        return shard_id in self._negative_lookups.get(key, ())
+
 class ShardedQuery(Query):
     def __init__(self, *args, **kwargs):
         super(ShardedQuery, self).__init__(*args, **kwargs)
         self.id_chooser = self.session.id_chooser
         self.query_chooser = self.session.query_chooser
         self._shard_id = None
+        self._probe_shards = None
         
     def set_shard(self, shard_id):
         """return a new query, limited to a single shard ID.
@@ -95,33 +194,310 @@ class ShardedQuery(Query):
         if self._shard_id is not None:
             result = self.session.connection(mapper=self._mapper_zero(), shard_id=self._shard_id).execute(context.statement, self._params)
             return self.instances(result, context)
+
+        if self._probe_shards is not None:
+            # a get() against several candidate shards, which are
+            # consulted in order as their results arrive
+            key, shard_ids = self._probe_shards
+            results = self._fetch_from_shards(shard_ids, context, self._params)
+            try:
+                fetched = {}
+                next_index = 0
+                for index, rows in results:
+                    fetched[index] = rows
+                    while next_index in fetched:
+                        if fetched[next_index]:
+                            return self.instances(_MergedResult(fetched[next_index]), context)
+                        self.session._record_negative_lookup(key, shard_ids[next_index])
+                        next_index += 1
+                return iter([])
+            finally:
+                if results.remaining:
+                    self.session._pending_probes.append(results)
+
+        shard_ids = self.query_chooser(self)
+
+        limit, offset = self._limit, self._offset
+        if limit is not None or offset is not None:
+            # each shard returns enough instances to satisfy the overall
+            # LIMIT/OFFSET, which is applied to the merged instances, so
+            # that rows of eagerly joined collections are counted along
+            # with their parent.
+            q = self._clone()
+            q._offset = None
+            if limit is not None:
+                q._limit = limit + (offset or 0)
+            context = q._compile_context()
+            context.statement.use_labels = True
         else:
-            partial = []
-            for shard_id in self.query_chooser(self):
-                result = self.session.connection(mapper=self._mapper_zero(), shard_id=shard_id).execute(context.statement, self._params)
-                partial = partial + list(self.instances(result, context))
-            # if some kind of in memory 'sorting' were done, this is where it would happen
-            return iter(partial)
-
-    def get(self, ident, **kwargs):
-        if self._shard_id is not None:
-            return super(ShardedQuery, self).get(ident)
+            q = self
+
+        order_by = None
+        if len(shard_ids) > 1:
+            context.statement, order_by = _ordered_statement(context.statement)
+
+        results = self._fetch_from_shards(shard_ids, context, q._params)
+
+        if order_by:
+            rows = _merge_ordered(results, len(shard_ids), order_by)
         else:
-            ident = util.to_list(ident)
-            for shard_id in self.id_chooser(self, ident):
-                o = self.set_shard(shard_id).get(ident, **kwargs)
-                if o is not None:
-                    return o
+            rows = _merge_unordered(results)
+
+        instances = q.instances(_MergedResult(rows), context)
+        if limit is not None or offset is not None:
+            start = offset or 0
+            if limit is not None:
+                instances = itertools.islice(instances, start, start + limit)
             else:
-                return None
-    
-    def load(self, ident, **kwargs):
+                instances = itertools.islice(instances, start, None)
+        return instances
+
+    def _fetch_from_shards(self, shard_ids, context, params):
+        """Execute the given context's statement against each shard.
+
+        Returns an iterator of ``(index, rows)`` tuples, where ``index`` is
+        the position of the shard within ``shard_ids``.  When querying
+        concurrently, each shard's rows are fetched in full by its thread;
+        otherwise ``rows`` is the shard's result, read as it's consumed.
+
+        """
+        connections = [self.session.connection(mapper=self._mapper_zero(), shard_id=shard_id) for shard_id in shard_ids]
+        if self.session.concurrent and len(connections) > 1:
+            # bind values, such as those of a lazy load which may load
+            # expired attributes, are evaluated here rather than by each thread
+            compiled = context.statement.compile(bind=connections[0])
+            params = compiled.construct_params(params)
+            def fetch(conn):
+                return lambda: conn.execute(compiled, params).fetchall()
+            return self.session._thread_pool.run_concurrently([fetch(conn) for conn in connections])
+        else:
+            return ((index, conn.execute(context.statement, params))
+                    for index, conn in enumerate(connections))
+
+    def get(self, ident):
         if self._shard_id is not None:
-            return super(ShardedQuery, self).load(ident)
+            return super(ShardedQuery, self).get(ident)
+
+        ident = util.to_list(ident)
+        key = self._only_mapper_zero("get() can only be used against a single mapped class.").identity_key_from_primary_key(ident)
+        shard_ids = [shard_id for shard_id in self.id_chooser(self, ident)
+                     if not self.session._is_negative_lookup(key, shard_id)]
+
+        if self.session.concurrent and len(shard_ids) > 1:
+            q = self._clone()
+            q._probe_shards = (key, shard_ids)
+            return super(ShardedQuery, q).get(ident)
+
+        for shard_id in shard_ids:
+            o = self.set_shard(shard_id).get(ident)
+            if o is not None:
+                return o
+            self.session._record_negative_lookup(key, shard_id)
         else:
-            for shard_id in self.id_chooser(self, ident):
-                o = self.set_shard(shard_id).load(ident, raiseerr=False, **kwargs)
-                if o is not None:
-                    return o
-            else:
-                raise sa_exc.InvalidRequestError("No instance found for identity %s" % repr(ident))
+            return None
+
+    def load(self, ident):
+        o = self.get(ident)
+        if o is None:
+            raise sa_exc.InvalidRequestError("No instance found for identity %s" % repr(ident))
+        return o
+
+
+class _ThreadPool(object):
+    """A bounded pool of daemon threads which call the functions given to it.
+
+    Threads are started as functions are submitted, up to ``size`` threads,
+    and exit once the pool is discarded.  Like its Session, the pool
+    isn't thread-safe.
+
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._jobs = Queue.Queue()
+        self._threads = 0
+
+    def __del__(self):
+        # threads woken as the interpreter exits would run against modules
+        # being torn down; being daemons, they're left to be discarded
+        if not _running:
+            return
+        for i in xrange(self._threads):
+            self._jobs.put(None)
+
+    def run_concurrently(self, fns):
+        """Call each of the given callables within a thread of the pool.
+
+        Returns a :class:`_Results`, iterating ``(index, result)`` tuples
+        in order of completion.
+
+        """
+        return self._start(fns)
+
+    def run_to_completion(self, fns):
+        """Call each of the given callables within a thread of the pool, returning when all have completed.
+
+        The first exception raised by a callable is re-raised once the
+        remaining callables have finished.
+
+        """
+        results = self._start(fns)
+        first = None
+        while results.remaining:
+            index, result, exc_info = results._get()
+            if exc_info and first is None:
+                first = exc_info
+        if first:
+            raise first[0], first[1], first[2]
+
+    def _start(self, fns):
+        """Submit the given callables to the pool, returning their _Results."""
+
+        results = _Results(len(fns))
+        for index, fn in enumerate(fns):
+            self._jobs.put((index, fn, results.queue))
+        while self._threads < min(self.size, len(fns)):
+            thread = util.threading.Thread(target=_work, args=(self._jobs,))
+            thread.setDaemon(True)
+            thread.start()
+            self._threads += 1
+        return results
+
+class _Results(object):
+    """The results of callables submitted to a _ThreadPool.
+
+    Iterating yields ``(index, result)`` tuples in order of completion,
+    where ``index`` is the position of the callable; the first exception
+    raised by a callable is re-raised.
+
+    """
+
+    def __init__(self, count):
+        self.queue = Queue.Queue()
+        self.remaining = count
+
+    def __iter__(self):
+        while self.remaining:
+            index, result, exc_info = self._get()
+            if exc_info:
+                raise exc_info[0], exc_info[1], exc_info[2]
+            yield index, result
+
+    def wait(self):
+        """Wait for the remaining callables to complete, discarding their results."""
+
+        while self.remaining:
+            self._get()
+
+    def _get(self):
+        item = self.queue.get()
+        self.remaining -= 1
+        return item
+
+_running = True
+
+def _stop_running():
+    global _running
+    _running = False
+atexit.register(_stop_running)
+
+def _work(jobs):
+    """Call the callables received from a _ThreadPool's queue until receiving None."""
+
+    while True:
+        job = jobs.get()
+        if job is None:
+            return
+        index, fn, results = job
+        try:
+            results.put((index, fn(), None))
+        except:
+            results.put((index, None, sys.exc_info()))
+        del job, fn, results
+
+def _ordered_statement(statement):
+    """Add the ORDER BY expressions of the given statement to its columns.
+
+    Returns the new statement along with ``(label, descending)`` tuples
+    locating each ORDER BY expression within the result rows, or the
+    given statement and None if it isn't ordered.
+
+    """
+    clauses = getattr(statement, '_order_by_clause', None)
+    if not clauses:
+        return statement, None
+    keys = []
+    for index, clause in enumerate(clauses):
+        descending = False
+        if isinstance(clause, expression._UnaryExpression) and \
+                clause.modifier in (operators.asc_op, operators.desc_op):
+            descending = clause.modifier is operators.desc_op
+            clause = clause.element
+        if not isinstance(clause, expression.ColumnElement):
+            raise sa_exc.InvalidRequestError(
+                "Can't merge the ordered results of several shards; ORDER BY "
+                "expression '%s' is not a column expression" % clause)
+        label = "_shard_order_%d" % index
+        statement = statement.column(clause.label(label))
+        keys.append((label, descending))
+    return statement, keys
+
+class _Descending(object):
+    """Reverses the ordering of a value within a merge key."""
+
+    __slots__ = 'value',
+
+    def __init__(self, value):
+        self.value = value
+
+    def __cmp__(self, other):
+        return cmp(other.value, self.value)
+
+def _merge_unordered(results):
+    for index, rows in results:
+        for row in rows:
+            yield row
+
+def _merge_ordered(results, count, order_by):
+    """Merge individually ordered sequences of rows into a single ordered sequence.
+
+    ``order_by`` is a list of ``(label, descending)`` tuples as returned by
+    _ordered_statement().  Rows are read from each sequence only as the
+    merge requires them.
+
+    """
+    rows_by_index = [None] * count
+    for index, rows in results:
+        rows_by_index[index] = rows
+
+    def key(row):
+        return tuple(desc and _Descending(row[label]) or row[label] for label, desc in order_by)
+
+    heap = []
+    iterators = [iter(rows) for rows in rows_by_index]
+    for index, it in enumerate(iterators):
+        for row in it:
+            heap.append((key(row), index, row))
+            break
+    heapq.heapify(heap)
+
+    while heap:
+        k, index, row = heap[0]
+        yield row
+        for row in iterators[index]:
+            heapq.heapreplace(heap, (key(row), index, row))
+            break
+        else:
+            heapq.heappop(heap)
+
+class _MergedResult(object):
+    """Presents an iterator of rows to Query.instances() as a result."""
+
+    def __init__(self, rows):
+        self.rows = iter(rows)
+
+    def fetchall(self):
+        return list(self.rows)
+
+    def fetchmany(self, size):
+        return list(itertools.islice(self.rows, size))
@@ -7,7 +7,7 @@
 """sqlalchemy.orm.interfaces.LoaderStrategy implementations, and related MapperOptions."""
 
 import sqlalchemy.exceptions as sa_exc
-from sqlalchemy import sql, util, log
+from sqlalchemy import sql, util, log, types as sqltypes
 from sqlalchemy.sql import util as sql_util
 from sqlalchemy.sql import visitors, expression, operators
 from sqlalchemy.orm import mapper, attributes
@@ -21,7 +21,8 @@ from sqlalchemy.orm import util as mapperutil
 
 class DefaultColumnLoader(LoaderStrategy):
     def _register_attribute(self, compare_function, copy_function, mutable_scalars, 
-            comparator_factory, callable_=None, proxy_property=None, active_history=False):
+            comparator_factory, callable_=None, proxy_property=None, active_history=False,
+            digest_function=None):
         self.logger.info("%s register managed attribute" % self)
 
         attribute_ext = util.to_list(self.parent_property.extension) or []
@@ -43,9 +44,18 @@ class DefaultColumnLoader(LoaderStrategy):
                     callable_=callable_,
                     extension=attribute_ext,
                     proxy_property=proxy_property,
-                    active_history=active_history
+                    active_history=active_history,
+                    digest_function=digest_function
                     )
 
+    def _digest_function(self, type_):
+        """Return the digest function for mutable values of the given type, if it compares digests."""
+
+        if isinstance(type_, sqltypes.MutableType) and type_.uses_digest():
+            return type_.digest_value
+        else:
+            return None
+
 log.class_logger(DefaultColumnLoader)
     
 class ColumnLoader(DefaultColumnLoader):
@@ -70,8 +80,8 @@ class ColumnLoader(DefaultColumnLoader):
             coltype.copy_value,
             self.columns[0].type.is_mutable(),
             self.parent_property.comparator_factory,
-            active_history = active_history
-            
+            active_history = active_history,
+            digest_function = self._digest_function(coltype)
        )
         
     def create_row_processor(self, selectcontext, path, mapper, row, adapter):
@@ -81,6 +91,9 @@ class ColumnLoader(DefaultColumnLoader):
         if col in row:
             def new_execute(state, row, **flags):
                 state.dict[key] = row[col]
+            # allows the mapper to fold this populator into
+            # a generated function; see Mapper._compiled_populator()
+            new_execute.populates_column = (key, col)
                 
             if self._should_log_debug:
                 new_execute = self.debug_callable(new_execute, self.logger,
@@ -190,6 +203,7 @@ class DeferredColumnLoader(DefaultColumnLoader):
              self.columns[0].type.is_mutable(),
              self.parent_property.comparator_factory,
              callable_=self.class_level_loader,
+             digest_function=self._digest_function(self.columns[0].type)
         )
 
     def setup_query(self, context, entity, path, adapter, only_load_props=None, **kwargs):
@@ -255,7 +269,7 @@ class LoadDeferredColumns(object):
         if strategy._should_log_debug:
             strategy.logger.debug("deferred load %s group %s" % (mapperutil.state_attribute_str(state, self.key), group and ','.join(group) or 'None'))
 
-        session = sessionlib._state_session(state)
+        session = sessionlib._state_loading_session(state)
         if session is None:
             raise sa_exc.UnboundExecutionError("Parent instance %s is not bound to a Session; deferred load operation of attribute '%s' cannot proceed" % (mapperutil.state_str(state), self.key))
 
@@ -519,14 +533,15 @@ class LoadLazyAttribute(object):
         if strategy._should_log_debug:
             strategy.logger.debug("loading %s" % mapperutil.state_attribute_str(state, self.key))
 
-        session = sessionlib._state_session(state)
+        session = sessionlib._state_loading_session(state)
         if session is None:
             raise sa_exc.UnboundExecutionError(
                 "Parent instance %s is not bound to a Session; "
                 "lazy load operation of attribute '%s' cannot proceed" % 
                 (mapperutil.state_str(state), self.key)
             )
-        
+        session._register_loaded([state])
+
         q = session.query(prop.mapper)._adapt_all_clauses()
         
         if self.path:
@@ -20,7 +20,10 @@ changes at once.
 
 """
 
-from sqlalchemy import util, log, topological
+import time
+import weakref
+
+from sqlalchemy import util, log, topological, schema
 from sqlalchemy.orm import attributes, interfaces
 from sqlalchemy.orm import util as mapperutil
 from sqlalchemy.orm.mapper import _state_mapper
@@ -29,6 +32,16 @@ from sqlalchemy.orm.mapper import _state_mapper
 object_session = None
 _state_session = None
 
+# the results of sorting base mappers by dependency, keyed on the
+# ids of the mappers and dependencies present within a flush.  mappers
+# are held weakly, so that the cache doesn't keep them alive.
+_sorted_dependencies = util.LRUCache(100)
+_sorted_dependencies_mutex = util.threading.Lock()
+
+# keys of cached sorts whose mappers have been garbage collected; these
+# are removed from _sorted_dependencies upon the next lookup
+_collected_dependencies = []
+
 class UOWEventHandler(interfaces.AttributeExtension):
     """An event handler added to all relation attributes which handles
     session cascade operations.
@@ -111,6 +124,9 @@ class UOWTransaction(object):
         # dictionary used by external actors to store arbitrary state
         # information.
         self.attributes = {}
+
+        # a FlushProfile, if installed by a FlushProfiler
+        self.profile = None
         
     def get_attribute_history(self, state, key, passive=True):
         hashkey = ("history", state, key)
@@ -240,6 +256,10 @@ class UOWTransaction(object):
         synchronize instance attributes with database values and related
         foreign key values."""
 
+        profile = self.profile
+        if profile is not None:
+            profile._mark('preprocess')
+
         # pre-execute dependency processors.  this process may
         # result in new tasks, objects and/or dependency processors being added,
         # particularly with 'delete-orphan' cascade rules.
@@ -254,13 +274,54 @@ class UOWTransaction(object):
             if not ret:
                 break
 
+        if profile is not None:
+            profile._mark('sort')
         tasks = self._sort_dependencies()
         if self._should_log_info:
             self.logger.info("Task dump:\n" + self._dump(tasks))
-        UOWExecutor().execute(self, tasks)
+        if profile is not None:
+            from uowprofiler import _ProfilingExecutor
+            profile._mark('execute')
+            _ProfilingExecutor(profile).execute(self, tasks)
+            profile._mark('finalize')
+        else:
+            UOWExecutor().execute(self, tasks)
         if self._should_log_info:
             self.logger.info("Execute Complete")
 
+    def execute_statement(self, connection, table, statement, *multiparams):
+        """Execute a statement against ``table`` on behalf of this flush.
+
+        The statement is recorded within the profile of the flush, if
+        any.  A Sequence is recorded only if its value was fetched from
+        the database, rather than from a block prefetched by the Engine.
+
+        """
+        if self.profile is None:
+            return connection.execute(statement, *multiparams)
+
+        if isinstance(statement, schema.Sequence):
+            fetches = connection._sequence_fetches
+            started = time.time()
+            result = connection.execute(statement, *multiparams)
+            elapsed = time.time() - started
+            if connection._sequence_fetches > fetches:
+                # a Sequence affects no rows
+                self.profile._statement(table, 0, elapsed)
+            return result
+
+        started = time.time()
+        result = connection.execute(statement, *multiparams)
+        elapsed = time.time() - started
+        if result.rowcount >= 0:
+            rows = result.rowcount
+        elif multiparams and isinstance(multiparams[0], list):
+            rows = len(multiparams[0])
+        else:
+            rows = 1
+        self.profile._statement(table, rows, elapsed)
+        return result
+
     def _dump(self, tasks):
         from uowdumper import UOWDumper
         return UOWDumper.dump(tasks)
@@ -287,9 +348,49 @@ class UOWTransaction(object):
                 self.session._register_newly_persistent(elem.state)
 
     def _sort_dependencies(self):
-        nodes = topological.sort_with_cycles(self.dependencies,
-            [t.mapper for t in self.tasks.itervalues() if t.base_task is t]
-        )
+        mappers = [t.mapper for t in self.tasks.itervalues() if t.base_task is t]
+        dependencies = self.dependencies
+        ordered = 'ordered' in self.mapper_flush_opts
+        if ordered:
+            # present mappers to the sort in a fixed order, so that
+            # unrelated mappers are flushed in the same order by
+            # every process
+            mappers.sort(key=str)
+            dependencies = sorted(dependencies, key=lambda d: (str(d[0]), str(d[1])))
+
+        # the set of mappers involved rarely changes from one flush to
+        # the next; only the per-row sort of cycles is recomputed.
+        key = (frozenset([id(m) for m in mappers]),
+               frozenset([(id(m), id(d)) for m, d in self.dependencies]),
+               ordered)
+        _sorted_dependencies_mutex.acquire()
+        try:
+            while _collected_dependencies:
+                _sorted_dependencies.pop(_collected_dependencies.pop(), None)
+            cached = _sorted_dependencies.get(key)
+        finally:
+            _sorted_dependencies_mutex.release()
+
+        nodes = None
+        if cached is not None:
+            nodes = [(item(), [c() for c in cycles]) for item, cycles in cached]
+            # a mapper which has since been garbage collected may have
+            # had its id reused by the mappers present now
+            for item, cycles in nodes:
+                if item is None or None in cycles:
+                    nodes = None
+                    break
+
+        if nodes is None:
+            nodes = topological.sort_with_cycles(dependencies, mappers)
+            discard = lambda ref: _collected_dependencies.append(key)
+            cached = [(weakref.ref(item, discard), [weakref.ref(c, discard) for c in cycles])
+                      for item, cycles in nodes]
+            _sorted_dependencies_mutex.acquire()
+            try:
+                _sorted_dependencies[key] = cached
+            finally:
+                _sorted_dependencies_mutex.release()
 
         ret = []
         for item, cycles in nodes:
@@ -0,0 +1,228 @@
+# orm/uowprofiler.py
+# Copyright (C) 2005, 2006, 2007, 2008 Michael Bayer mike_mp@zzzcomputing.com
+#
+# This module is part of SQLAlchemy and is released under
+# the MIT License: http://www.opensource.org/licenses/mit-license.php
+
+"""Records the time spent within each phase of a flush.
+
+A :class:`FlushProfiler` is installed as an extension of a Session::
+
+    profiler = FlushProfiler()
+    Session = sessionmaker(extension=profiler)
+
+    sess = Session()
+    ...
+    sess.commit()
+    print profiler.last.summary()
+
+Each successful flush produces a :class:`FlushProfile`, recording the
+time spent within each phase of the unit of work, within each mapper
+and relation, and the statements issued against each table along with
+the rows they affected.  The summary is also logged to the
+``sqlalchemy.orm.uowprofiler.FlushProfiler`` logger at ``INFO`` level.
+
+"""
+
+import time
+
+from sqlalchemy import log, util
+from sqlalchemy.orm import unitofwork
+from sqlalchemy.orm.interfaces import SessionExtension
+from sqlalchemy.orm.mapper import Mapper
+
+
+__all__ = ['FlushProfiler', 'FlushProfile']
+
+
+class FlushProfiler(SessionExtension):
+    """A SessionExtension which profiles each flush of its Sessions.
+
+    history
+      The number of :class:`FlushProfile` objects retained within the
+      ``profiles`` list, most recent last.  Defaults to 100.
+
+    """
+
+    def __init__(self, history=100):
+        self.history = history
+        self.profiles = []
+
+    @property
+    def last(self):
+        """The FlushProfile of the most recent flush, or ``None``."""
+
+        if self.profiles:
+            return self.profiles[-1]
+        else:
+            return None
+
+    def clear(self):
+        """Discard all retained profiles."""
+
+        del self.profiles[:]
+
+    def before_flush(self, session, flush_context, instances):
+        flush_context.profile = FlushProfile()
+        flush_context.profile._mark('register')
+
+    def after_flush_postexec(self, session, flush_context):
+        profile = flush_context.profile
+        if profile is None:
+            return
+        profile._mark(None)
+        self.profiles.append(profile)
+        if len(self.profiles) > self.history:
+            del self.profiles[:-self.history]
+        if self._should_log_info:
+            self.logger.info(profile.summary())
+
+log.class_logger(FlushProfiler)
+
+
+class FlushProfile(object):
+    """Timings and statement counts recorded for a single flush.
+
+    All times are in seconds.
+
+    duration
+      The total time spent within the flush.
+
+    phases
+      A dictionary of phase name to time spent.  The phases, in order:
+
+      * ``register`` - registration of instances with the unit of work,
+        including cascades.
+      * ``preprocess`` - preprocessing of dependencies, such as the
+        location of orphans.
+      * ``sort`` - the dependency sort of mappers and instances.
+      * ``execute`` - the issuing of SQL, and synchronization of
+        foreign key attributes.
+      * ``finalize`` - the marking of instances as persistent or deleted,
+        and the commit of the flush's transaction.
+
+    mappers
+      A dictionary of Mapper to a dictionary with the keys ``save`` and
+      ``delete``, the time spent issuing INSERT/UPDATE and DELETE
+      statements for its instances, including the population of
+      generated values.
+
+    relations
+      A dictionary of the relation() property to the time spent
+      processing its dependencies, including the association rows of
+      many-to-many relations.
+
+    statements, rows, sql_time
+      Dictionaries of Table to the number of statements issued, the
+      number of rows affected and the time spent executing.  Rows are
+      those reported by the DB-API cursor, or those for which the
+      statement was issued where the cursor doesn't report a count.
+
+    """
+
+    def __init__(self):
+        self.duration = 0
+        self.phases = {}
+        self.mappers = {}
+        self.relations = {}
+        self.statements = {}
+        self.rows = {}
+        self.sql_time = {}
+        self._phase = None
+        self._started = time.time()
+        self._phase_started = self._started
+        # statements may be issued by several threads at once, as by a
+        # concurrent ShardedSession
+        self._mutex = util.threading.Lock()
+
+    def _mark(self, phase):
+        """End the current phase, and begin ``phase``."""
+
+        now = time.time()
+        if self._phase is not None:
+            self.phases[self._phase] = self.phases.get(self._phase, 0) + now - self._phase_started
+        self._phase = phase
+        self._phase_started = now
+        self.duration = now - self._started
+
+    def _mapper(self, mapper, operation, elapsed):
+        self._mutex.acquire()
+        try:
+            timings = self.mappers.setdefault(mapper, {'save': 0, 'delete': 0})
+            timings[operation] += elapsed
+        finally:
+            self._mutex.release()
+
+    def _relation(self, prop, elapsed):
+        self._mutex.acquire()
+        try:
+            self.relations[prop] = self.relations.get(prop, 0) + elapsed
+        finally:
+            self._mutex.release()
+
+    def _statement(self, table, rows, elapsed):
+        self._mutex.acquire()
+        try:
+            self.statements[table] = self.statements.get(table, 0) + 1
+            self.rows[table] = self.rows.get(table, 0) + rows
+            self.sql_time[table] = self.sql_time.get(table, 0) + elapsed
+        finally:
+            self._mutex.release()
+
+    @property
+    def total_statements(self):
+        """The total number of statements issued."""
+
+        return sum(self.statements.values())
+
+    @property
+    def total_rows(self):
+        """The total number of rows affected."""
+
+        return sum(self.rows.values())
+
+    def summary(self):
+        """Return a string describing this profile."""
+
+        lines = ["Flush completed in %.4f sec; %d statements, %d rows" %
+                 (self.duration, self.total_statements, self.total_rows)]
+        for phase in ('register', 'preprocess', 'sort', 'execute', 'finalize'):
+            if phase in self.phases:
+                lines.append("  %-12s %.4f sec" % (phase, self.phases[phase]))
+        for mapper, timings in sorted(self.mappers.items(), key=lambda i: str(i[0])):
+            lines.append("  %s: save %.4f sec, delete %.4f sec" %
+                         (mapper, timings['save'], timings['delete']))
+        for prop, elapsed in sorted(self.relations.items(), key=lambda i: str(i[0])):
+            lines.append("  %s: %.4f sec" % (prop, elapsed))
+        for table in sorted(self.statements, key=lambda t: t.description):
+            lines.append("  table %s: %d statements, %d rows, %.4f sec" %
+                         (table.description, self.statements[table],
+                          self.rows[table], self.sql_time[table]))
+        return "\n".join(lines)
+
+    def __str__(self):
+        return self.summary()
+
+
+class _ProfilingExecutor(unitofwork.UOWExecutor):
+    """A UOWExecutor which records its operations within a FlushProfile."""
+
+    def __init__(self, profile):
+        self.profile = profile
+
+    def save_objects(self, trans, task):
+        started = time.time()
+        super(_ProfilingExecutor, self).save_objects(trans, task)
+        if isinstance(task.mapper, Mapper):
+            self.profile._mapper(task.mapper, 'save', time.time() - started)
+
+    def delete_objects(self, trans, task):
+        started = time.time()
+        super(_ProfilingExecutor, self).delete_objects(trans, task)
+        if isinstance(task.mapper, Mapper):
+            self.profile._mapper(task.mapper, 'delete', time.time() - started)
+
+    def execute_dependency(self, trans, dep, isdelete):
+        started = time.time()
+        super(_ProfilingExecutor, self).execute_dependency(trans, dep, isdelete)
+        self.profile._relation(dep.processor.prop, time.time() - started)
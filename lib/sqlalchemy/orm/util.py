@@ -564,6 +564,14 @@ def has_identity(object):
 def _state_has_identity(state):
     return bool(state.key)
 
+def _pk_sort_key(keys):
+    """Return a function ordering parameter dictionaries by the given keys.
+
+    Used by an ordered flush to issue statements in primary key order.
+
+    """
+    return lambda params: tuple([params.get(k) for k in keys])
+
 def _is_mapped_class(cls):
     from sqlalchemy.orm import mapperlib as mapper
     if isinstance(cls, (AliasedClass, mapper.Mapper)):
@@ -1023,16 +1023,35 @@ class ColumnDefault(DefaultGenerator):
         return "ColumnDefault(%s)" % repr(self.arg)
 
 class Sequence(DefaultGenerator):
-    """Represents a named database sequence."""
+    """Represents a named database sequence.
+
+    With ``prefetch=N``, each value retrieved from the database reserves a
+    block of N values, which are handed out in turn by the Engine before
+    the sequence is consulted again (a "hi/lo" scheme).  The sequence is
+    created with an increment of N, and must not be advanced by other
+    means in steps of less than N.  Primary keys generated from such a
+    sequence are assigned before INSERT statements are issued, allowing
+    the rows of a flush to be inserted using executemany().
+
+    """
 
     __visit_name__ = 'sequence'
 
     def __init__(self, name, start=None, increment=None, schema=None,
-                 optional=False, quote=None, **kwargs):
+                 optional=False, quote=None, prefetch=None, **kwargs):
         super(Sequence, self).__init__(**kwargs)
+        if prefetch is not None:
+            if prefetch < 1:
+                raise exc.ArgumentError("Sequence prefetch must be a positive integer")
+            if increment is None:
+                increment = prefetch
+            elif increment != prefetch:
+                raise exc.ArgumentError(
+                    "Sequence increment %r must equal prefetch %r" % (increment, prefetch))
         self.name = name
         self.start = start
         self.increment = increment
+        self.prefetch = prefetch
         self.optional = optional
         self.quote = quote
         self.schema = schema
@@ -1042,7 +1061,7 @@ class Sequence(DefaultGenerator):
         return "Sequence(%s)" % ', '.join(
             [repr(self.name)] +
             ["%s=%s" % (k, repr(getattr(self, k)))
-             for k in ['start', 'increment', 'optional']])
+             for k in ['start', 'increment', 'optional', 'prefetch']])
 
     def _set_parent(self, column):
         super(Sequence, self)._set_parent(column)
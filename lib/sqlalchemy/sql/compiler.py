@@ -673,7 +673,12 @@ class DefaultCompiler(engine.Compiled):
                 values.append((c, value))
             elif isinstance(c, schema.Column):
                 if self.isinsert:
-                    if (c.primary_key and self.dialect.preexecute_pk_sequences and not self.inline):
+                    # primary keys from a Sequence with "prefetch" are taken
+                    # from a block of values rather than fired inline, even
+                    # for executemany()
+                    if (c.primary_key and self.dialect.preexecute_pk_sequences and
+                        (not self.inline or (isinstance(c.default, schema.Sequence) and
+                                             c.default.prefetch))):
                         if (((isinstance(c.default, schema.Sequence) and
                               not c.default.optional) or
                              not self.dialect.supports_pk_autoincrement) or
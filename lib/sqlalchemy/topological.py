@@ -18,6 +18,7 @@ conditions.
 
 """
 
+from collections import deque
 from sqlalchemy.exc import CircularDependencyError
 
 __all__ = ['sort', 'sort_with_cycles', 'sort_as_tree']
@@ -61,9 +62,11 @@ def sort_as_tree(tuples, allitems, with_cycles=False):
 class _Node(object):
     """Represent each item in the sort."""
 
-    def __init__(self, item):
+    def __init__(self, item, index):
         self.item = item
+        self.index = index
         self.dependencies = set()
+        self.successors = []
         self.children = []
         self.cycles = None
 
@@ -89,134 +92,131 @@ class _Node(object):
                 deps.update(c.dependencies)
         return deps
 
-class _EdgeCollection(object):
-    """A collection of directed edges."""
-
-    def __init__(self):
-        self.parent_to_children = {}
-        self.child_to_parents = {}
-
-    def add(self, edge):
-        """Add an edge to this collection."""
-
-        (parentnode, childnode) = edge
-        if parentnode not in self.parent_to_children:
-            self.parent_to_children[parentnode] = set()
-        self.parent_to_children[parentnode].add(childnode)
-        if childnode not in self.child_to_parents:
-            self.child_to_parents[childnode] = set()
-        self.child_to_parents[childnode].add(parentnode)
-        parentnode.dependencies.add(childnode)
-
-    def remove(self, edge):
-        """Remove an edge from this collection.
-
-        Return the childnode if it has no other parents.
-        """
-
-        (parentnode, childnode) = edge
-        self.parent_to_children[parentnode].remove(childnode)
-        self.child_to_parents[childnode].remove(parentnode)
-        if len(self.child_to_parents[childnode]) == 0:
-            return childnode
-        else:
-            return None
-
-    def has_parents(self, node):
-        return node in self.child_to_parents and len(self.child_to_parents[node]) > 0
-
-    def edges_by_parent(self, node):
-        if node in self.parent_to_children:
-            return [(node, child) for child in self.parent_to_children[node]]
-        else:
-            return []
-
-    def get_parents(self):
-        return self.parent_to_children.keys()
-
-    def pop_node(self, node):
-        """Remove all edges where the given node is a parent.
-
-        Return the collection of all nodes which were children of the
-        given node, and have no further parents.
-        """
-
-        children = self.parent_to_children.pop(node, None)
-        if children is not None:
-            for child in children:
-                self.child_to_parents[child].remove(node)
-                if not self.child_to_parents[child]:
-                    yield child
-
-    def __len__(self):
-        return sum(len(x) for x in self.parent_to_children.values())
-
-    def __iter__(self):
-        for parent, children in self.parent_to_children.iteritems():
-            for child in children:
-                yield (parent, child)
+def _sort(tuples, allitems, allow_cycles=False, ignore_self_cycles=False):
+    """Sort in O(V + E) time.
 
-    def __repr__(self):
-        return repr(list(self))
+    Cycles are located as the strongly connected components of the
+    graph; each is represented by its first node, whose ``cycles``
+    lists all of its members.  The condensed, acyclic graph is then
+    sorted breadth-first, so that unrelated items retain the order in
+    which they were first given.
 
-def _sort(tuples, allitems, allow_cycles=False, ignore_self_cycles=False):
+    """
     nodes = {}
-    edges = _EdgeCollection()
-
-    for item in list(allitems) + [t[0] for t in tuples] + [t[1] for t in tuples]:
-        if id(item) not in nodes:
-            node = _Node(item)
+    ordered = []
+    def add_node(item):
+        if item not in nodes:
+            node = _Node(item, len(ordered))
             nodes[item] = node
+            ordered.append(node)
+
+    for item in allitems:
+        add_node(item)
+    for t in tuples:
+        add_node(t[0])
+        add_node(t[1])
 
     for t in tuples:
         if t[0] is t[1]:
             if allow_cycles:
                 n = nodes[t[0]]
-                n.cycles = set([n])
+                n.cycles = [n]
             elif not ignore_self_cycles:
                 raise CircularDependencyError("Self-referential dependency detected " + repr(t))
             continue
-        childnode = nodes[t[1]]
         parentnode = nodes[t[0]]
-        edges.add((parentnode, childnode))
+        childnode = nodes[t[1]]
+        if childnode not in parentnode.dependencies:
+            parentnode.dependencies.add(childnode)
+            parentnode.successors.append(childnode)
+
+    # the node representing the component of each node
+    lead = {}
+    for component in _strongly_connected(ordered):
+        head = component[0]
+        for n in component:
+            lead[n] = head
+        if len(component) > 1:
+            if not allow_cycles:
+                edges = [(n, k) for n in component for k in n.successors if lead.get(k) is head]
+                raise CircularDependencyError("Circular dependency detected " + repr(edges))
+            head.cycles = component
+
+    heads = [n for n in ordered if lead[n] is n]
+    successors = dict((head, []) for head in heads)
+    indegree = dict((head, 0) for head in heads)
+    for head in heads:
+        seen = set([head])
+        for n in head.cycles or [head]:
+            for k in n.successors:
+                target = lead[k]
+                if n is not head and target is not head:
+                    head.dependencies.add(k)
+                if target not in seen:
+                    seen.add(target)
+                    successors[head].append(target)
+                    indegree[target] += 1
+
+    queue = deque([head for head in heads if not indegree[head]])
+    output = []
+    while queue:
+        head = queue.popleft()
+        output.append(head)
+        for target in successors[head]:
+            indegree[target] -= 1
+            if not indegree[target]:
+                queue.append(target)
+    return output
 
-    queue = []
-    for n in nodes.values():
-        if not edges.has_parents(n):
-            queue.append(n)
+def _strongly_connected(nodes):
+    """Return the strongly connected components among the given nodes.
 
-    output = []
-    while nodes:
-        if not queue:
-            # edges remain but no edgeless nodes to remove; this indicates
-            # a cycle
-            if allow_cycles:
-                for cycle in _find_cycles(edges):
-                    lead = cycle[0][0]
-                    lead.cycles = set()
-                    for edge in cycle:
-                        n = edges.remove(edge)
-                        lead.cycles.add(edge[0])
-                        lead.cycles.add(edge[1])
-                        if n is not None:
-                            queue.append(n)
-                    for n in lead.cycles:
-                        if n is not lead:
-                            n._cyclical = True
-                            for (n, k) in list(edges.edges_by_parent(n)):
-                                edges.add((lead, k))
-                                edges.remove((n, k))
-                continue
+    Uses Tarjan's algorithm, iteratively so that long chains of
+    dependencies don't exhaust the stack.  The nodes of each
+    component are returned in their original order.
+
+    """
+    index = {}
+    lowlink = {}
+    stack = []
+    onstack = set()
+    components = []
+
+    for root in nodes:
+        if root in index:
+            continue
+        index[root] = lowlink[root] = len(index)
+        stack.append(root)
+        onstack.add(root)
+        work = [(root, iter(root.successors))]
+        while work:
+            node, successors = work[-1]
+            for child in successors:
+                if child not in index:
+                    index[child] = lowlink[child] = len(index)
+                    stack.append(child)
+                    onstack.add(child)
+                    work.append((child, iter(child.successors)))
+                    break
+                elif child in onstack and index[child] < lowlink[node]:
+                    lowlink[node] = index[child]
             else:
-                # long cycles not allowed
-                raise CircularDependencyError("Circular dependency detected " + repr(edges) + repr(queue))
-        node = queue.pop()
-        if not hasattr(node, '_cyclical'):
-            output.append(node)
-        del nodes[node.item]
-        for childnode in edges.pop_node(node):
-            queue.append(childnode)
-    return output
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    if lowlink[node] < lowlink[parent]:
+                        lowlink[parent] = lowlink[node]
+                if lowlink[node] == index[node]:
+                    component = []
+                    while True:
+                        n = stack.pop()
+                        onstack.remove(n)
+                        component.append(n)
+                        if n is node:
+                            break
+                    component.sort(key=lambda n: n.index)
+                    components.append(component)
+    return components
 
 def _organize_as_tree(nodes):
     """Given a list of nodes from a topological sort, organize the
@@ -228,77 +228,48 @@ def _organize_as_tree(nodes):
 
     if not nodes:
         return None
-    # a list of all currently independent subtrees as a tuple of
-    # (root_node, set_of_all_tree_nodes, set_of_all_cycle_nodes_in_tree)
-    # order of the list has no semantics for the algorithmic
-    independents = []
+    # all currently independent subtrees, keyed on the order in which
+    # they were created
+    independents = {}
+    # subtrees which were merged into another, keyed to that subtree
+    merged = {}
+    # the subtree each node, and each node of a cycle, was placed in
+    subtree_of = {}
+    cycle_of = {}
+
+    def find(key):
+        root = key
+        while root in merged:
+            root = merged[root]
+        while key != root:
+            merged[key], key = root, merged[key]
+        return root
+
     # in reverse topological order
-    for node in reversed(nodes):
-        # nodes subtree and cycles contain the node itself
-        subtree = set([node])
-        if node.cycles is not None:
-            cycles = set(node.cycles)
-        else:
-            cycles = set()
-        # get a set of dependent nodes of node and its cycles
-        nodealldeps = node.all_deps()
-        if nodealldeps:
-            # iterate over independent node indexes in reverse order so we can efficiently remove them
-            for index in xrange(len(independents) - 1, -1, -1):
-                child, childsubtree, childcycles = independents[index]
-                # if there is a dependency between this node and an independent node
-                if (childsubtree.intersection(nodealldeps) or childcycles.intersection(node.dependencies)):
-                    # prepend child to nodes children
-                    # (append should be fine, but previous implemetation used prepend)
-                    node.children[0:0] = [(child.item, [n.item for n in child.cycles or []], child.children)]
-                    # merge childs subtree and cycles
-                    subtree.update(childsubtree)
-                    cycles.update(childcycles)
-                    # remove the child from list of independent subtrees
-                    independents[index:index+1] = []
+    for key, node in enumerate(reversed(nodes)):
+        # subtrees which node or its cycles depend upon become its children
+        found = set()
+        for dep in node.all_deps():
+            if dep in subtree_of:
+                found.add(find(subtree_of[dep]))
+        for dep in node.dependencies:
+            if dep in cycle_of:
+                found.add(find(cycle_of[dep]))
+        for childkey in sorted(found):
+            child = independents.pop(childkey)
+            node.children.append((child.item, [n.item for n in child.cycles or []], child.children))
+            merged[childkey] = key
+
         # add node as a new independent subtree
-        independents.append((node, subtree, cycles))
-    # choose an arbitrary node from list of all independent subtrees
-    head = independents.pop()[0]
-    # add all other independent subtrees as a child of the chosen root
-    # used prepend [0:0] instead of extend to maintain exact behaviour of previous implementation
-    head.children[0:0] = [(i[0].item, [n.item for n in i[0].cycles or []], i[0].children) for i in independents]
+        independents[key] = node
+        subtree_of[node] = key
+        for n in node.cycles or []:
+            cycle_of[n] = key
+
+    # the most recently created subtree is the root; all others are
+    # its children
+    keys = sorted(independents)
+    head = independents[keys.pop()]
+    head.children[0:0] = [(n.item, [c.item for c in n.cycles or []], n.children)
+                          for n in [independents[k] for k in keys]]
     return (head.item, [n.item for n in head.cycles or []], head.children)
-
-def _find_cycles(edges):
-    involved_in_cycles = set()
-    cycles = {}
-    def traverse(node, goal=None, cycle=None):
-        if goal is None:
-            goal = node
-            cycle = []
-        elif node is goal:
-            return True
-
-        for (n, key) in edges.edges_by_parent(node):
-            if key in cycle:
-                continue
-            cycle.append(key)
-            if traverse(key, goal, cycle):
-                cycset = set(cycle)
-                for x in cycle:
-                    involved_in_cycles.add(x)
-                    if x in cycles:
-                        existing_set = cycles[x]
-                        [existing_set.add(y) for y in cycset]
-                        for y in existing_set:
-                            cycles[y] = existing_set
-                        cycset = existing_set
-                    else:
-                        cycles[x] = cycset
-            cycle.pop()
-
-    for parent in edges.get_parents():
-        traverse(parent)
-
-    # sets are not hashable, so uniquify with id
-    unique_cycles = dict((id(s), s) for s in cycles.values()).values()
-    for cycle in unique_cycles:
-        edgecollection = [edge for edge in edges
-                          if edge[0] in cycle and edge[1] in cycle]
-        yield edgecollection
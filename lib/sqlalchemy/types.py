@@ -313,6 +313,15 @@ class MutableType(object):
     :meth:`copy_value` and :meth:`compare_values` should be customized
     as needed to match the needs of the object.
 
+    Types which can serialize their values may instead have the ORM
+    retain only a digest of the committed value, by implementing
+    :meth:`serialize_value` and returning True from :meth:`uses_digest`.
+    A changed value is always detected; an unchanged value may be
+    reported as changed if its serialized form differs, such as a
+    dict whose keys were inserted in a different order.  The history
+    of a value changed in place then doesn't include its previous
+    value.
+
     """
 
     def is_mutable(self):
@@ -327,6 +336,20 @@ class MutableType(object):
         """Compare *x* == *y*."""
         return x == y
 
+    def uses_digest(self):
+        """Return True if changes are to be detected by comparing digests."""
+        return False
+
+    def serialize_value(self, value):
+        """Return a string form of *value*, used by :meth:`digest_value`."""
+        raise NotImplementedError()
+
+    def digest_value(self, value):
+        """Return a digest of *value*, retained in place of a copy."""
+        if value is None:
+            return None
+        return util.md5(self.serialize_value(value)).digest()
+
 def to_instance(typeobj):
     if typeobj is None:
         return NULLTYPE
@@ -733,7 +756,7 @@ class PickleType(MutableType, TypeDecorator):
 
     impl = Binary
 
-    def __init__(self, protocol=pickle.HIGHEST_PROTOCOL, pickler=None, mutable=True, comparator=None):
+    def __init__(self, protocol=pickle.HIGHEST_PROTOCOL, pickler=None, mutable=True, comparator=None, digest=False):
         """
         Construct a PickleType.
 
@@ -759,11 +782,21 @@ class PickleType(MutableType, TypeDecorator):
           of pickle.dumps(obj) is compared.  The last option is a deprecated
           usage and will raise a warning.
 
+        :param digest: defaults to False.  When ``True`` and mutable is
+          ``True``, the ORM retains an MD5 digest of the pickled value
+          instead of a deep copy of the value, and detects changes made
+          in place by comparing digests; ``comparator`` is not used for
+          them.  This saves memory and copying for large values, at the
+          cost of occasionally updating a value whose pickle differs but
+          which is otherwise unchanged, and of the previous value being
+          absent from the attribute's history.
+
         """
         self.protocol = protocol
         self.pickler = pickler or pickle
         self.mutable = mutable
         self.comparator = comparator
+        self.digest = digest
         super(PickleType, self).__init__()
 
     def process_bind_param(self, value, dialect):
@@ -785,6 +818,12 @@ class PickleType(MutableType, TypeDecorator):
         else:
             return value
 
+    def uses_digest(self):
+        return self.mutable and self.digest
+
+    def serialize_value(self, value):
+        return self.pickler.dumps(value, self.protocol)
+
     def compare_values(self, x, y):
         if self.comparator:
             return self.comparator(x, y)
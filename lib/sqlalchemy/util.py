@@ -49,6 +49,11 @@ else:
     except ImportError:
         import pickle
 
+try:
+    from hashlib import md5
+except ImportError:
+    from md5 import new as md5
+
 # a controversial feature, required by MySQLdb currently
 def buffer(x):
     return x 
@@ -751,6 +756,88 @@ class OrderedDict(dict):
         self._list.remove(item[0])
         return item
 
+class LRUCache(dict):
+    """A dictionary-like object that discards its least recently used items.
+
+    Once the number of items exceeds ``capacity`` by the fraction
+    ``threshold``, the least recently used items are removed until
+    ``capacity`` remain.  Reading or writing an item marks it as used.
+
+    """
+
+    def __init__(self, capacity=100, threshold=.5):
+        self.capacity = capacity
+        self.threshold = threshold
+        self._counter = itertools.count()
+
+    def __getitem__(self, key):
+        item = dict.__getitem__(self, key)
+        item[2] = self._counter.next()
+        return item[1]
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def values(self):
+        return [i[1] for i in dict.values(self)]
+
+    def itervalues(self):
+        return iter(self.values())
+
+    def items(self):
+        return [(i[0], i[1]) for i in dict.values(self)]
+
+    def iteritems(self):
+        return iter(self.items())
+
+    def setdefault(self, key, value):
+        if key in self:
+            return self[key]
+        else:
+            self[key] = value
+            return value
+
+    def pop(self, key, *default):
+        present = key in self
+        value = dict.pop(self, key, *default)
+        if present:
+            return value[1]
+        return value
+
+    def popitem(self):
+        key, item = dict.popitem(self)
+        return key, item[1]
+
+    def update(self, ____sequence=None, **kwargs):
+        if ____sequence is not None:
+            if hasattr(____sequence, 'keys'):
+                for key in ____sequence.keys():
+                    self[key] = ____sequence[key]
+            else:
+                for key, value in ____sequence:
+                    self[key] = value
+        if kwargs:
+            self.update(kwargs)
+
+    def __setitem__(self, key, value):
+        item = dict.get(self, key)
+        if item is None:
+            item = [key, value, self._counter.next()]
+            dict.__setitem__(self, key, item)
+        else:
+            item[1] = value
+            item[2] = self._counter.next()
+        self._manage_size()
+
+    def _manage_size(self):
+        if len(self) > self.capacity + self.capacity * self.threshold:
+            by_use = sorted(dict.values(self), key=operator.itemgetter(2), reverse=True)
+            for item in by_use[self.capacity:]:
+                dict.__delitem__(self, item[0])
+
 class OrderedSet(set):
     def __init__(self, d=None):
         set.__init__(self)
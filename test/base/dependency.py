@@ -1,5 +1,6 @@
 import testenv; testenv.configure_for_tests()
 import sqlalchemy.topological as topological
+from sqlalchemy.exc import CircularDependencyError
 from testlib import TestBase
 
 
@@ -182,6 +183,32 @@ class DependencySortTest(TestBase):
             tuples.append((i, i+1))
         head = topological.sort_as_tree(tuples, [])
 
+    def testbigcycles(self):
+        # a long chain, with every ten nodes forming a cycle
+        tuples = [(i, i + 1) for i in xrange(5000)]
+        tuples += [(i + 9, i) for i in xrange(0, 5000, 10)]
+        result = topological.sort_with_cycles(tuples, [])
+        self.assertEquals(len(result), 501)
+        for i, (item, cycles) in enumerate(result[:-1]):
+            self.assertEquals(item, i * 10)
+            self.assertEquals(cycles, range(i * 10, i * 10 + 10))
+        self.assertEquals(result[-1], (5000, []))
+
+    def testdeterministic(self):
+        tuples = [('b', 'd'), ('a', 'd'), ('d', 'e'), ('c', 'e')]
+        allitems = ['e', 'd', 'c', 'b', 'a', 'f']
+        self.assertEquals(topological.sort(tuples, allitems),
+                          ['c', 'b', 'a', 'f', 'd', 'e'])
+        self.assertEquals(topological.sort(list(reversed(tuples)), allitems),
+                          topological.sort(tuples, allitems))
+
+    def testraisescircular(self):
+        tuples = [('a', 'b'), ('b', 'c'), ('c', 'a')]
+        self.assertRaises(CircularDependencyError, topological.sort, tuples, [])
+        self.assertRaises(CircularDependencyError, topological.sort_as_tree, tuples, [])
+        self.assertRaises(CircularDependencyError, topological.sort_as_tree, [('a', 'a')], [])
+        self.assertEquals(topological.sort([('a', 'a')], []), ['a'])
+
 
 if __name__ == "__main__":
     testenv.main()
@@ -61,6 +61,38 @@ class OrderedSetTest(TestBase):
         eq_(o.intersection(iter([3,4, 6])), util.OrderedSet([3, 4]))
         eq_(o.union(iter([3,4, 6])), util.OrderedSet([2, 3, 4, 5, 6]))
 
+class LRUCacheTest(TestBase):
+    def test_values(self):
+        c = util.LRUCache(capacity=10)
+        c['a'] = 1
+        c.update({'b': 2}, c=3)
+        eq_(c['b'], 2)
+        eq_(sorted(c.values()), [1, 2, 3])
+        eq_(sorted(c.items()), [('a', 1), ('b', 2), ('c', 3)])
+
+        eq_(c.pop('a'), 1)
+        eq_(c.pop('a', 'woot'), 'woot')
+        try:
+            c.pop('a')
+            assert False
+        except KeyError:
+            pass
+
+        eq_(c.popitem()[1] in (2, 3), True)
+        eq_(len(c), 1)
+
+    def test_size(self):
+        c = util.LRUCache(capacity=10, threshold=.5)
+        for i in range(10):
+            c[i] = i
+        # reading marks items as used
+        for i in range(5):
+            c[i]
+        for i in range(10, 16):
+            c[i] = i
+        eq_(len(c), 10)
+        eq_(sorted(c.keys()), range(1, 5) + range(10, 16))
+
 class ColumnCollectionTest(TestBase):
     def test_in(self):
         cc = sql.ColumnCollection()
@@ -2,6 +2,7 @@ import testenv; testenv.configure_for_tests()
 import datetime
 from sqlalchemy import *
 from sqlalchemy.orm import *
+from sqlalchemy.orm import attributes
 from sqlalchemy import exc
 from sqlalchemy.databases import postgres
 from sqlalchemy.engine.strategies import MockEngineStrategy
@@ -819,6 +820,40 @@ class ArrayTest(TestBase, AssertsExecutionResults):
         sess.save(foo)
         sess.flush()
 
+    def test_array_mutability_digest(self):
+        class Bar(object): pass
+        bartable = Table('bar', metadata,
+            Column('id', Integer, primary_key=True),
+            Column('intarr', postgres.PGArray(Integer, digest=True), nullable=True)
+        )
+        mapper(Bar, bartable)
+        metadata.create_all()
+        sess = create_session()
+
+        bar = Bar()
+        bar.id = 1
+        bar.intarr = [1,2,3]
+        sess.save(bar)
+        sess.flush()
+        sess.clear()
+        bar = sess.query(Bar).get(1)
+        self.assertEquals(bar.intarr, [1,2,3])
+
+        state = attributes.instance_state(bar)
+        assert 'intarr' not in state.committed_state
+        bar.intarr.append(4)
+        self.assertEquals(attributes.get_history(state, 'intarr'), ([[1,2,3,4]], (), ()))
+        sess.flush()
+        sess.clear()
+        bar = sess.query(Bar).get(1)
+        self.assertEquals(bar.intarr, [1,2,3,4])
+
+        bar.intarr = None
+        sess.flush()
+        sess.clear()
+        bar = sess.query(Bar).get(1)
+        self.assertEquals(bar.intarr, None)
+
 class TimeStampTest(TestBase, AssertsExecutionResults):
     __only_on__ = 'postgres'
     def test_timestamp(self):
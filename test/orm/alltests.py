@@ -31,6 +31,8 @@ def suite():
         'orm.relationships',
         'orm.association',
         'orm.merge',
+        'orm.caching',
+        'orm.uowprofiler',
         'orm.pickled',
         'orm.utils',
 
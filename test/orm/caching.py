@@ -0,0 +1,254 @@
+import testenv; testenv.configure_for_tests()
+import shutil
+import socket
+import tempfile
+import threading
+from sqlalchemy.orm.caching import QueryCache, MemoryBackend, FileBackend, MemcachedBackend
+from testlib import sa, testing
+from testlib.sa.orm import mapper, relation, create_session, eagerload
+from testlib.testing import eq_
+from orm import _fixtures
+
+
+class QueryCacheTest(_fixtures.FixtureTest):
+    run_setup_mappers = 'once'
+    run_inserts = 'once'
+    run_deletes = None
+
+    @testing.resolve_artifact_names
+    def setup_mappers(self):
+        mapper(User, users, properties={
+            'addresses':relation(Address, backref='user', order_by=addresses.c.id)})
+        mapper(Address, addresses)
+
+    def _backend(self):
+        return MemoryBackend()
+
+    @testing.resolve_artifact_names
+    def test_cached(self):
+        cache = QueryCache(self._backend())
+        sess = create_session(query_cache=cache)
+        users = sess.query(User).filter(User.id.in_([7, 8])).order_by(User.id).cache().all()
+        eq_([u.name for u in users], ['jack', 'ed'])
+        eq_((cache.hits, cache.misses), (0, 1))
+
+        sess = create_session(query_cache=cache)
+        def go():
+            users2 = sess.query(User).filter(User.id.in_([7, 8])).order_by(User.id).cache().all()
+            eq_([u.name for u in users2], ['jack', 'ed'])
+            assert users2[0] is not users[0]
+            assert users2[0] in sess
+            assert not sess.dirty
+            assert sess.query(User).get(7) is users2[0]
+        self.assert_sql_count(testing.db, go, 0)
+        eq_((cache.hits, cache.misses), (1, 1))
+
+        # differing parameters are cached separately
+        users3 = sess.query(User).filter(User.id.in_([8, 9])).order_by(User.id).cache().all()
+        eq_([u.id for u in users3], [8, 9])
+        eq_(cache.misses, 2)
+
+    @testing.resolve_artifact_names
+    def test_eager(self):
+        cache = QueryCache(self._backend())
+        q = create_session(query_cache=cache).query(User).options(eagerload('addresses')).filter(User.id == 8).cache()
+        q.all()
+
+        sess = create_session(query_cache=cache)
+        def go():
+            u = sess.query(User).options(eagerload('addresses')).filter(User.id == 8).cache().all()[0]
+            eq_([a.id for a in u.addresses], [2, 3, 4])
+        self.assert_sql_count(testing.db, go, 0)
+
+    @testing.resolve_artifact_names
+    def test_tuples(self):
+        cache = QueryCache(self._backend())
+        q = create_session(query_cache=cache).query(User, User.name).filter(User.id == 7).cache()
+        eq_([tuple(row) for row in q.all()], [(User(id=7), 'jack')])
+
+        sess = create_session(query_cache=cache)
+        def go():
+            row = sess.query(User, User.name).filter(User.id == 7).cache().all()[0]
+            eq_(row.name, 'jack')
+            assert row.User in sess
+        self.assert_sql_count(testing.db, go, 0)
+
+    @testing.resolve_artifact_names
+    def test_flush_invalidates(self):
+        cache = QueryCache(self._backend())
+        create_session(query_cache=cache).query(User).filter(User.id == 7).cache().all()
+        create_session(query_cache=cache).query(Address).filter(Address.id == 1).cache().all()
+
+        sess = create_session(autocommit=False, query_cache=cache)
+        try:
+            u = sess.query(User).get(7)
+            u.name = 'fred'
+            sess.flush()
+
+            # the Session sees its own change
+            eq_(sess.query(User).filter(User.id == 7).cache().all()[0].name, 'fred')
+            eq_((cache.hits, cache.misses), (0, 2))
+
+            # others re-load from the database
+            sess2 = create_session(query_cache=cache)
+            sess2.query(User).filter(User.id == 7).cache().all()
+            sess2.query(Address).filter(Address.id == 1).cache().all()
+            eq_((cache.hits, cache.misses), (1, 3))
+        finally:
+            sess.rollback()
+
+        # and again once the transaction has ended
+        sess2.query(User).filter(User.id == 7).cache().all()
+        eq_((cache.hits, cache.misses), (1, 4))
+
+    @testing.resolve_artifact_names
+    def test_bulk_invalidates(self):
+        cache = QueryCache(self._backend())
+        create_session(query_cache=cache).query(User).filter(User.id == 7).cache().all()
+
+        sess = create_session(autocommit=False, query_cache=cache)
+        try:
+            sess.query(User).filter(User.id == 7).update({'name':'fred'})
+            eq_(sess.query(User).filter(User.id == 7).cache().all()[0].name, 'fred')
+        finally:
+            sess.rollback()
+        eq_(create_session(query_cache=cache).query(User).filter(User.id == 7).cache().all()[0].name, 'jack')
+        eq_((cache.hits, cache.misses), (0, 2))
+
+    @testing.resolve_artifact_names
+    def test_invalidate(self):
+        cache = QueryCache(self._backend())
+        create_session(query_cache=cache).query(User).filter(User.id == 7).cache().all()
+        cache.invalidate(users)
+        create_session(query_cache=cache).query(User).filter(User.id == 7).cache().all()
+        eq_((cache.hits, cache.misses), (0, 2))
+
+    @testing.resolve_artifact_names
+    def test_no_cache(self):
+        self.assertRaises(sa.exc.InvalidRequestError, create_session().query(User).cache)
+
+class FileBackendTest(QueryCacheTest):
+    def setUpAll(self):
+        super(FileBackendTest, self).setUpAll()
+        self.__class__.directory = tempfile.mkdtemp()
+
+    def tearDownAll(self):
+        shutil.rmtree(self.directory)
+        super(FileBackendTest, self).tearDownAll()
+
+    def _backend(self):
+        return FileBackend(tempfile.mkdtemp(dir=self.directory))
+
+class MemcachedBackendTest(QueryCacheTest):
+    def setUpAll(self):
+        super(MemcachedBackendTest, self).setUpAll()
+        self.__class__.server = _MemcachedStandIn()
+
+    def tearDownAll(self):
+        self.server.shutdown()
+        super(MemcachedBackendTest, self).tearDownAll()
+
+    def _backend(self):
+        self.server.values.clear()
+        return MemcachedBackend(['127.0.0.1:%d' % self.server.port])
+
+    def test_unreachable(self):
+        backend = MemcachedBackend(['127.0.0.1:1'], timeout=.5)
+        backend.set('somekey', 'somevalue')
+        assert backend.get('somekey') is None
+
+class BackendTest(testing.TestBase):
+    def test_memory_ttl(self):
+        backend = MemoryBackend(ttl=-1)
+        backend.set('somekey', 'somevalue')
+        assert backend.get('somekey') is None
+
+    def test_memory_size(self):
+        backend = MemoryBackend(size=2)
+        for key in ('a', 'b', 'c', 'd'):
+            backend.set(key, key)
+        eq_([backend.get(key) for key in ('a', 'b', 'c', 'd')], [None, None, 'c', 'd'])
+
+    def test_file(self):
+        directory = tempfile.mkdtemp()
+        try:
+            backend = FileBackend(directory)
+            backend.set('somekey', 'somevalue')
+            eq_(FileBackend(directory).get('somekey'), 'somevalue')
+            backend.delete('somekey')
+            assert backend.get('somekey') is None
+
+            backend = FileBackend(directory, ttl=-1)
+            backend.set('somekey', 'somevalue')
+            assert backend.get('somekey') is None
+        finally:
+            shutil.rmtree(directory)
+
+class _MemcachedStandIn(object):
+    """Serves the get, set and delete commands of the memcached protocol from a dict."""
+
+    def __init__(self):
+        self.values = {}
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.bind(('127.0.0.1', 0))
+        self.listener.listen(5)
+        self.port = self.listener.getsockname()[1]
+        self.running = True
+        self.connections = []
+        self.threads = [threading.Thread(target=self._accept)]
+        self.threads[0].start()
+
+    def _accept(self):
+        while True:
+            conn, address = self.listener.accept()
+            if not self.running:
+                conn.close()
+                return
+            self.connections.append(conn)
+            thread = threading.Thread(target=self._handle, args=(conn,))
+            self.threads.append(thread)
+            thread.start()
+
+    def _handle(self, conn):
+        values = self.values
+        f = conn.makefile('rb')
+        try:
+            while True:
+                line = f.readline()
+                if not line:
+                    return
+                args = line.split()
+                if args[0] == 'get':
+                    if args[1] in values:
+                        value = values[args[1]]
+                        conn.sendall("VALUE %s 0 %d\r\n%s\r\n" % (args[1], len(value), value))
+                    conn.sendall("END\r\n")
+                elif args[0] == 'set':
+                    values[args[1]] = f.read(int(args[4]) + 2)[:-2]
+                    conn.sendall("STORED\r\n")
+                elif args[0] == 'delete':
+                    if values.pop(args[1], None) is None:
+                        conn.sendall("NOT_FOUND\r\n")
+                    else:
+                        conn.sendall("DELETED\r\n")
+        finally:
+            f.close()
+            conn.close()
+
+    def shutdown(self):
+        self.running = False
+        # wake the accepting thread
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        s.connect(('127.0.0.1', self.port))
+        s.close()
+        for conn in self.connections:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except socket.error:
+                pass
+        for thread in self.threads:
+            thread.join()
+        self.listener.close()
+
+if __name__ == '__main__':
+    testenv.main()
@@ -211,6 +211,78 @@ class O2MBackrefTest(_fixtures.FixtureTest):
         assert o1 in sess
 
 
+class CascadeTraversalTest(_fixtures.FixtureTest):
+    run_inserts = None
+
+    @testing.resolve_artifact_names
+    def test_props_for_cascade(self):
+        mapper(Address, addresses)
+        mapper(Order, orders)
+        m = mapper(User, users, properties={
+            'addresses':relation(Address, cascade="all"),
+            'orders':relation(Order, cascade="merge")
+        })
+
+        eq_([p.key for p in m._props_for_cascade('delete')], ['addresses'])
+        eq_(sorted(p.key for p in m._props_for_cascade('merge')), ['addresses', 'orders'])
+        eq_(class_mapper(Order)._props_for_cascade('save-update'), [])
+
+        m.add_property('open_orders', relation(Order, cascade="delete"))
+        eq_(sorted(p.key for p in m._props_for_cascade('delete')), ['addresses', 'open_orders'])
+
+    @testing.resolve_artifact_names
+    def test_unmodified_persistent_not_traversed(self):
+        iterated = []
+        class Addresses(list):
+            def __iter__(self):
+                iterated.append(self)
+                return list.__iter__(self)
+
+        mapper(Address, addresses)
+        mapper(User, users, properties={
+            'addresses':relation(Address, collection_class=Addresses)
+        })
+
+        sess = create_session()
+        u = User(name='u1', addresses=[Address(email_address='a%d' % i) for i in range(5)])
+        sess.add(u)
+        sess.flush()
+        eq_(len(u.addresses), 5)
+
+        del iterated[:]
+        sess.add(u)
+        eq_(iterated, [])
+
+        # a member expunged on its own is attached again
+        a1 = u.addresses[0]
+        sess.expunge(a1)
+        sess.add(u)
+        assert iterated
+        assert a1 in sess
+
+        del iterated[:]
+        sess.add(u)
+        eq_(iterated, [])
+
+        # a new member is cascaded as it's attached
+        a6 = Address(email_address='a6')
+        u.addresses.append(a6)
+        assert a6 in sess
+
+        # a modified instance has its graph traversed
+        u.name = 'u2'
+        sess.add(u)
+        assert iterated
+
+        # as does one which isn't present in the Session
+        sess.flush()
+        sess.expunge(u)
+        del iterated[:]
+        sess.add(u)
+        assert iterated
+        assert u.addresses[0] in sess
+
+
 class NoSaveCascadeTest(_fixtures.FixtureTest):
     """test that backrefs don't force save-update cascades to occur
     when the cascade initiated from the forwards side."""
@@ -581,8 +581,8 @@ class OneToManyManyToOneTest(_base.MappedTest):
             ExactSQL("UPDATE person SET favorite_ball_id=:favorite_ball_id "
                 "WHERE person.id = :person_id",
                 lambda ctx: {'person_id': p.id, 'favorite_ball_id': None}),
-            ExactSQL("DELETE FROM ball WHERE ball.id = :id", None), # lambda ctx:[{'id': 1L}, {'id': 4L}, {'id': 3L}, {'id': 2L}])
-            ExactSQL("DELETE FROM person WHERE person.id = :id", lambda ctx:[{'id': p.id}])
+            ExactSQL("DELETE FROM ball WHERE ball.id IN (:id_1, :id_2, :id_3, :id_4)", None),
+            ExactSQL("DELETE FROM person WHERE person.id IN (:id_1)", lambda ctx:{'id_1': p.id})
         )
 
     @testing.resolve_artifact_names
@@ -673,14 +673,14 @@ class OneToManyManyToOneTest(_base.MappedTest):
              "WHERE ball.id = :ball_id",
              lambda ctx:{'person_id': None, 'ball_id': b4.id}),
 
-            CompiledSQL("DELETE FROM person WHERE person.id = :id",
-             lambda ctx:[{'id':p.id}]),
+            CompiledSQL("DELETE FROM person WHERE person.id IN (:id_1)",
+             lambda ctx:{'id_1':p.id}),
 
-            CompiledSQL("DELETE FROM ball WHERE ball.id = :id",
-             lambda ctx:[{'id': b.id},
-                         {'id': b2.id},
-                         {'id': b3.id},
-                         {'id': b4.id}])
+            CompiledSQL("DELETE FROM ball WHERE ball.id IN (:id_1, :id_2, :id_3, :id_4)",
+             lambda ctx:{'id_1': b.id,
+                         'id_2': b2.id,
+                         'id_3': b3.id,
+                         'id_4': b4.id})
         )
 
 
@@ -786,8 +786,8 @@ class SelfReferentialPostUpdateTest(_base.MappedTest):
              "WHERE node.id = :node_id",
              lambda ctx:{'next_sibling_id':None, 'node_id':cats.id}),
              
-            CompiledSQL("DELETE FROM node WHERE node.id = :id",
-             lambda ctx:[{'id':cats.id}])
+            CompiledSQL("DELETE FROM node WHERE node.id IN (:id_1)",
+             lambda ctx:{'id_1':cats.id})
         )
 
 
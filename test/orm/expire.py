@@ -657,6 +657,83 @@ class ExpireTest(_fixtures.FixtureTest):
         self.assertEquals(self.static.user_address_result, userlist)
         assert len(list(sess)) == 9
 
+class ExpireOnCommitTest(_fixtures.FixtureTest):
+    run_inserts = 'each'
+
+    @testing.resolve_artifact_names
+    def test_refreshes_group(self):
+        mapper(User, users)
+        sess = create_session(autocommit=False, expire_on_commit=True)
+        userlist = sess.query(User).order_by(User.id).all()
+        u7 = sess.query(User).get(7)
+        sess.commit()
+
+        # expiration is deferred until access
+        assert 'name' in u7.__dict__
+
+        def go():
+            self.assertEquals(u7.name, 'jack')
+        self.assert_sql_count(testing.db, go, 1)
+
+        # the others loaded by the same query were refreshed too
+        def go():
+            self.assertEquals([u.name for u in userlist], ['jack', 'ed', 'fred', 'chuck'])
+        self.assert_sql_count(testing.db, go, 0)
+
+    @testing.resolve_artifact_names
+    def test_group_per_batch(self):
+        mapper(User, users)
+        sess = create_session(autocommit=False, expire_on_commit=True)
+        userlist = list(sess.query(User).order_by(User.id).stream(batch=2, expunge=False))
+        self.assertEquals([len(attributes.instance_state(u).load_group) for u in userlist], [2, 2, 2, 2])
+        sess.commit()
+
+        def go():
+            self.assertEquals([u.name for u in userlist[0:2]], ['jack', 'ed'])
+        self.assert_sql_count(testing.db, go, 1)
+
+        # instances of another batch are refreshed as their own group
+        def go():
+            self.assertEquals([u.name for u in userlist[2:4]], ['fred', 'chuck'])
+        self.assert_sql_count(testing.db, go, 1)
+
+    @testing.resolve_artifact_names
+    def test_sees_changes(self):
+        mapper(User, users)
+        sess = create_session(autocommit=False, expire_on_commit=True)
+        userlist = sess.query(User).order_by(User.id).all()
+        userlist[0].name = 'jack jones'
+        sess.commit()
+
+        users.update(users.c.id == 8).execute(name='ed wood')
+        users.delete(users.c.id == 9).execute()
+        self.assertEquals(userlist[1].name, 'ed wood')
+        self.assertEquals(userlist[0].name, 'jack jones')
+        self.assertRaises(sa.orm.exc.ObjectDeletedError, getattr, userlist[2], 'name')
+
+    @testing.resolve_artifact_names
+    def test_changes_after_commit(self):
+        mapper(User, users)
+        sess = create_session(autocommit=False, expire_on_commit=True)
+        u = sess.query(User).get(7)
+        sess.commit()
+
+        users.update(users.c.id == 7).execute(name='jack jones')
+        u.name = 'fred'
+        assert u in sess.dirty
+        sess.rollback()
+        self.assertEquals(u.name, 'jack jones')
+
+    @testing.resolve_artifact_names
+    def test_expunged_after_commit(self):
+        mapper(User, users)
+        sess = create_session(autocommit=False, expire_on_commit=True)
+        u = sess.query(User).get(7)
+        sess.commit()
+        sess.expunge(u)
+        assert 'name' not in u.__dict__
+        self.assertRaises(sa_exc.UnboundExecutionError, getattr, u, 'name')
+
 class PolymorphicExpireTest(_base.MappedTest):
     run_inserts = 'once'
     run_deletes = None
@@ -793,6 +870,44 @@ class RefreshTest(_fixtures.FixtureTest):
         s.refresh(u)
         assert u.name == 'jack'
 
+    @testing.resolve_artifact_names
+    def test_refresh_all(self):
+        mapper(User, users, properties={'addresses':relation(mapper(Address, addresses))})
+        s = create_session()
+        userlist = s.query(User).order_by(User.id).all()
+        a = s.query(Address).get(1)
+        for u in userlist:
+            u.name = 'foo'
+        a.email_address = 'foo'
+        s.expire(userlist[1])
+
+        def go():
+            s.refresh_all([a] + userlist)
+        self.assert_sql_count(testing.db, go, 2)
+        assert not s.dirty
+        self.assertEquals([u.name for u in userlist], ['jack', 'ed', 'fred', 'chuck'])
+        self.assertEquals(a.email_address, 'jack@bean.com')
+
+        userlist[2].name = 'foo'
+        s.refresh_all(userlist, ['id'])
+        self.assertEquals(userlist[2].name, 'foo')
+        assert userlist[2] in s.dirty
+
+        # a refresh of a subset of attributes retains pending changes
+        # to the others, as does refresh()
+        s.expunge_all()
+        a = s.query(Address).get(1)
+        a.user_id = 8
+        a.email_address = 'foo'
+        s.refresh_all([a], ['email_address'])
+        self.assertEquals(a.email_address, 'jack@bean.com')
+        assert a in s.dirty
+        s.flush()
+        self.assertEquals(addresses.select(addresses.c.id == 1).execute().fetchone().user_id, 8)
+
+        users.delete(users.c.id == 10).execute()
+        self.assertRaises(sa.exc.InvalidRequestError, s.refresh_all, userlist)
+
     @testing.resolve_artifact_names
     def test_refresh_with_lazy(self):
         """test that when a lazy loader is set as a trigger on an object's attribute
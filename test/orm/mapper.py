@@ -876,6 +876,36 @@ class MapperTest(_fixtures.FixtureTest):
 
         mapper(B, users)
 
+    @testing.resolve_artifact_names
+    def test_compiled_populators(self):
+        """Plain column populators are generated once per set of keys and shared across queries."""
+
+        mapper(User, users, properties={
+            'addresses':relation(mapper(Address, addresses), lazy=False, order_by=addresses.c.id)
+        })
+        sess = create_session()
+
+        eq_(sess.query(User).filter_by(id=8).one().addresses,
+            [Address(id=2, email_address='ed@wood.com'),
+             Address(id=3, email_address='ed@bettyboop.com'),
+             Address(id=4, email_address='ed@lala.com')])
+        keys = set(class_mapper(User)._compiled_populators)
+        eq_([sorted(k) for k in keys], [['id', 'name']])
+        factory = class_mapper(User)._compiled_populators[keys.pop()]
+
+        sess.expunge_all()
+        ualias = aliased(User)
+        eq_(sess.query(ualias).order_by(ualias.id).all(),
+            [User(id=7, name='jack'), User(id=8, name='ed'),
+             User(id=9, name='fred'), User(id=10, name='chuck')])
+        assert class_mapper(User)._compiled_populators.values() == [factory]
+
+        sess.expunge_all()
+        u = sess.query(User).options(defer('name')).get(9)
+        assert 'name' not in u.__dict__
+        eq_(u.name, 'fred')
+        assert ('id',) in class_mapper(User)._compiled_populators
+
 
 class OptionsTest(_fixtures.FixtureTest):
 
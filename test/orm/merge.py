@@ -676,5 +676,49 @@ class MergeTest(_fixtures.FixtureTest):
         sess.flush()
         assert merged_user not in sess.new
 
+    @testing.resolve_artifact_names
+    def test_merge_all(self):
+        mapper(User, users, properties={
+            'addresses':relation(mapper(Address, addresses), backref='user',
+                                 order_by=addresses.c.id)})
+
+        sess = create_session()
+        for i in range(1, 5):
+            sess.add(User(id=i, name='user%d' % i, addresses=[
+                Address(id=i * 10, email_address='a%d' % i),
+                Address(id=i * 10 + 1, email_address='b%d' % i)]))
+        sess.flush()
+        userlist = sess.query(User).order_by(User.id).all()
+        for u in userlist:
+            u.name = u.name + ' modified'
+            u.addresses[1].email_address = 'modified'
+        u5 = User(id=5, name='user5', addresses=[Address(id=50, email_address='a5')])
+        sess.expunge_all()
+
+        sess2 = create_session()
+        merged = []
+        def go():
+            merged[:] = sess2.merge_all(userlist + [u5])
+        # one SELECT for the users and their addresses, and one for
+        # the addresses of the new user
+        self.assert_sql_count(testing.db, go, 2)
+
+        eq_([u.name for u in merged],
+            ['user1 modified', 'user2 modified', 'user3 modified', 'user4 modified', 'user5'])
+        eq_([[a.email_address for a in u.addresses] for u in merged],
+            [['a1', 'modified'], ['a2', 'modified'], ['a3', 'modified'], ['a4', 'modified'], ['a5']])
+        assert merged[4] in sess2.new
+        assert merged[0] not in sess2.new
+        assert merged[0] is not userlist[0]
+        sess2.flush()
+        sess2.expunge_all()
+
+        eq_(sess2.query(User).order_by(User.id).all(), [
+            User(id=1, name='user1 modified', addresses=[Address(id=10, email_address='a1'), Address(id=11, email_address='modified')]),
+            User(id=2, name='user2 modified'),
+            User(id=3, name='user3 modified'),
+            User(id=4, name='user4 modified'),
+            User(id=5, name='user5', addresses=[Address(id=50, email_address='a5')])])
+
 if __name__ == "__main__":
     testenv.main()
@@ -76,6 +76,28 @@ class RowTupleTest(QueryTest):
         assert row.id == 7
         assert row.uname == 'jack'
 
+    def test_column_only(self):
+        mapper(User, users)
+        sess = create_session()
+
+        rows = sess.query(User.id, User.name).order_by(User.id).all()
+        eq_(rows, [(7, 'jack'), (8, 'ed'), (9, 'fred'), (10, 'chuck')])
+        eq_([r.name for r in rows], ['jack', 'ed', 'fred', 'chuck'])
+        eq_(len(sess.identity_map), 0)
+
+        # the named tuple class is shared among queries with the same labels
+        row = sess.query(User.id, User.name).filter(User.id==8).one()
+        assert type(row) is type(rows[0])
+        assert type(sess.query(User.name, User.id).first()) is not type(row)
+
+        eq_(list(sess.query(User.id).order_by(User.id).yield_per(2)), [(7,), (8,), (9,), (10,)])
+
+    def test_type_cache_bounded(self):
+        from sqlalchemy.orm import query as query_mod
+        for i in range(500):
+            query_mod._rowtuple_type(['id', 'col%d' % i])
+        assert len(query_mod._rowtuple_types) <= 150
+
 class GetTest(QueryTest):
     def test_get(self):
         s = create_session()
@@ -114,6 +136,43 @@ class GetTest(QueryTest):
         sess = create_session()
         assert sess.query(SomeUser).get(7).name == 'jack'
 
+    def test_get_many(self):
+        s = create_session()
+        u8 = s.query(User).get(8)
+
+        users = []
+        def go():
+            users[:] = s.query(User).get_many([9, 19, 8, 7, 9])
+            assert users[2] is u8
+            assert users[0] is users[4]
+            eq_([u and u.id for u in users], [9, None, 8, 7, 9])
+        self.assert_sql_count(testing.db, go, 1)
+
+        def go():
+            eq_([u.id for u in s.query(User).get_many([7, 8, 9])], [7, 8, 9])
+        self.assert_sql_count(testing.db, go, 0)
+
+        self.assertRaises(sa_exc.InvalidRequestError, s.query(User).filter(User.id==7).get_many, [7])
+
+    def test_get_many_chunks(self):
+        s = create_session()
+        testing.db.dialect.max_bind_params = 2
+        try:
+            def go():
+                eq_([u and u.id for u in s.query(User).get_many([10, 9, 8, 7, 6])], [10, 9, 8, 7, None])
+            self.assert_sql_count(testing.db, go, 3)
+        finally:
+            del testing.db.dialect.max_bind_params
+
+    def test_get_many_composite(self):
+        class OrderItem(object):
+            pass
+        mapper(OrderItem, order_items, primary_key=[order_items.c.order_id, order_items.c.item_id])
+
+        s = create_session()
+        found = s.query(OrderItem).get_many([(1, 2), (3, 3), (1, 9), (5, 5)])
+        eq_([o and (o.order_id, o.item_id) for o in found], [(1, 2), (3, 3), None, (5, 5)])
+
     def test_load(self):
         s = create_session()
 
@@ -865,6 +924,245 @@ class YieldTest(QueryTest):
         except StopIteration:
             pass
 
+class StreamTest(QueryTest):
+    def test_expunge(self):
+        sess = create_session()
+        q = sess.query(User).order_by(User.id).stream(batch=2)
+
+        u1 = q.next()
+        eq_(len(sess.identity_map), 2)
+        assert u1 in sess
+        q.next()
+        u3 = q.next()
+        eq_(len(sess.identity_map), 2)
+        assert u1 not in sess
+        assert u3 in sess
+        eq_([u.id for u in q], [10])
+        eq_(len(sess.identity_map), 0)
+
+    def test_no_expunge(self):
+        sess = create_session()
+        users = list(sess.query(User).order_by(User.id).stream(batch=3, expunge=False))
+        eq_([u.id for u in users], [7, 8, 9, 10])
+        eq_(len(sess.identity_map), 4)
+
+    def test_modified_retained(self):
+        sess = create_session()
+        q = sess.query(User).order_by(User.id).stream(batch=1)
+        u1 = q.next()
+        u1.name = 'newname'
+        list(q)
+        assert u1 in sess
+        eq_(len(sess.identity_map), 1)
+
+    def test_eager_window(self):
+        sess = create_session()
+        # rows for user 8 span the batch boundary
+        q = sess.query(User).options(eagerload('addresses')).filter(User.id.in_([7, 8])).order_by(User.id)
+        eq_([u.id for u in q.stream(batch=3)], [7, 8])
+        eq_(len(sess.identity_map), 0)
+
+class WindowedTest(QueryTest):
+    def test_basic(self):
+        sess = create_session()
+        eq_([u.id for u in sess.query(User).windowed(User.id, 3)], [7, 8, 9, 10])
+        eq_([u.id for u in sess.query(User).windowed(User.id.desc(), 2)], [10, 9, 8, 7])
+        eq_([u.id for u in sess.query(User).filter(User.id > 7).windowed(desc(users.c.id), 1)], [10, 9, 8])
+
+    def test_sql(self):
+        sess = create_session()
+        def go():
+            eq_([a.id for a in sess.query(Address).windowed(Address.id, 2)], [1, 2, 3, 4, 5])
+        self.assert_sql_count(testing.db, go, 3)
+
+    def test_composite(self):
+        sess = create_session()
+        eq_([(a.user_id, a.id) for a in sess.query(Address).windowed([Address.user_id.desc(), Address.id], 2)],
+            [(9, 5), (8, 2), (8, 3), (8, 4), (7, 1)])
+
+    def test_columns(self):
+        sess = create_session()
+        rows = list(sess.query(Address.email_address, Address.id).windowed(Address.id, 3))
+        eq_([r.id for r in rows], [1, 2, 3, 4, 5])
+        eq_(rows[0], ('jack@bean.com', 1))
+
+        # a single column produces one-element tuples, as the Query does
+        eq_(list(sess.query(Address.id).windowed(Address.id, 2)),
+            list(sess.query(Address.id).order_by(Address.id)))
+        eq_([r.id for r in sess.query(Address.id).windowed(Address.id, 2)], [1, 2, 3, 4, 5])
+
+        eq_([(u.id, a.id) for u, a in sess.query(User, Address).join(User.addresses).windowed(Address.id, 4)],
+            [(7, 1), (8, 2), (8, 3), (8, 4), (9, 5)])
+
+    def test_eager_yield_per(self):
+        sess = create_session()
+        eq_([(u.id, len(u.addresses)) for u in sess.query(User).options(eagerload('addresses')).windowed(User.id, 2)],
+            [(7, 1), (8, 3), (9, 1), (10, 0)])
+        eq_([u.id for u in sess.query(User).yield_per(1).windowed(User.id, 3)], [7, 8, 9, 10])
+
+    def test_invalid(self):
+        sess = create_session()
+        self.assertRaises(sa_exc.InvalidRequestError, sess.query(User).order_by(User.id).windowed, User.id)
+        self.assertRaises(sa_exc.InvalidRequestError, sess.query(User).limit(5).windowed, User.id)
+
+class ReadonlyTest(QueryTest):
+    def test_basic(self):
+        sess = create_session()
+        users = sess.query(User).readonly().order_by(User.id).all()
+        eq_(users, [User(id=7), User(id=8), User(id=9), User(id=10)])
+        eq_(len(sess.identity_map), 0)
+        for u in users:
+            assert attributes.instance_state(u).readonly
+            assert u not in sess
+            assert object_session(u) is None
+
+        u = users[0]
+        u.name = 'newname'
+        assert not attributes.instance_state(u).committed_state
+        assert not sess.dirty
+
+    def test_get(self):
+        sess = create_session()
+        u = sess.query(User).get(7)
+        u2 = sess.query(User).readonly().get(7)
+        assert u2 is not u
+        eq_(u2, User(id=7, name='jack'))
+        assert sess.query(User).readonly().get(7) is not u2
+
+    def test_eager(self):
+        sess = create_session()
+        def go():
+            users = sess.query(User).readonly().options(eagerload('addresses')).filter(User.id.in_([8, 9])).order_by(User.id).all()
+            eq_([[a.id for a in u.addresses] for u in users], [[2, 3, 4], [5]])
+        self.assert_sql_count(testing.db, go, 1)
+        eq_(len(sess.identity_map), 0)
+
+    def test_lazy(self):
+        sess = create_session()
+        u = sess.query(User).readonly().get(7)
+        eq_(u.addresses, [Address(id=1)])
+        assert u not in sess
+        assert object_session(u) is None
+        assert object_session(u.addresses[0]) is sess
+
+        u = sess.query(User).readonly().options(defer('name')).get(8)
+        eq_(u.name, 'ed')
+        assert object_session(u) is None
+
+    def test_no_attach(self):
+        sess = create_session()
+        u = sess.query(User).readonly().get(7)
+        self.assertRaises(sa_exc.InvalidRequestError, sess.add, u)
+        self.assertRaises(sa_exc.InvalidRequestError, sess.delete, u)
+        self.assertRaises(sa_exc.InvalidRequestError, create_session().add, u)
+
+        u.name = 'ed'
+        u2 = sess.merge(u)
+        assert u2 in sess
+        eq_(u2.name, 'ed')
+        assert u2 in sess.dirty
+
+class IdentityCacheTest(QueryTest):
+    def test_get(self):
+        cache = IdentityCache()
+        sess = create_session(identity_cache=cache)
+        u = sess.query(User).get(7)
+        eq_((cache.hits, cache.misses), (0, 1))
+        eq_(len(cache), 1)
+
+        sess = create_session(identity_cache=cache)
+        def go():
+            u2 = sess.query(User).get(7)
+            assert u2 is not u
+            eq_(u2.name, 'jack')
+            assert u2 in sess
+            assert not sess.dirty
+            assert sess.query(User).get(7) is u2
+        self.assert_sql_count(testing.db, go, 0)
+        eq_((cache.hits, cache.misses), (1, 1))
+        eq_(cache.hit_ratio, .5)
+
+    def test_loaded_by_query(self):
+        cache = IdentityCache()
+        sess = create_session(identity_cache=cache)
+        users = sess.query(User).all()
+        eq_(len(cache), 4)
+
+        sess = create_session(identity_cache=cache)
+        def go():
+            a = sess.query(Address).get(1)
+            eq_(a.user.name, 'jack')
+        self.assert_sql_count(testing.db, go, 1)
+
+    def test_deferred(self):
+        cache = IdentityCache()
+        sess = create_session(identity_cache=cache)
+        sess.query(User).options(defer('name')).all()
+
+        sess = create_session(identity_cache=cache)
+        def go():
+            u = sess.query(User).get(7)
+            eq_(u.name, 'jack')
+        self.assert_sql_count(testing.db, go, 1)
+
+    def test_size(self):
+        cache = IdentityCache(size=2)
+        sess = create_session(identity_cache=cache)
+        for id in (7, 8, 9, 10):
+            sess.query(User).get(id)
+        eq_(len(cache), 2)
+
+        sess = create_session(identity_cache=cache)
+        for id in (10, 9, 8):
+            sess.query(User).get(id)
+        eq_((cache.hits, cache.misses), (2, 5))
+
+    def test_ttl(self):
+        cache = IdentityCache(ttl=-1)
+        sess = create_session(identity_cache=cache)
+        sess.query(User).get(7)
+
+        sess = create_session(identity_cache=cache)
+        def go():
+            sess.query(User).get(7)
+        self.assert_sql_count(testing.db, go, 1)
+        eq_(cache.hits, 0)
+
+    def test_flush_invalidates(self):
+        cache = IdentityCache()
+        sess = create_session(identity_cache=cache)
+        sess.query(User).get(7)
+
+        sess = create_session(autocommit=False, identity_cache=cache)
+        try:
+            u = sess.query(User).get(7)
+            u.name = 'ed'
+            sess.flush()
+            eq_(len(cache), 0)
+
+            # not cached again by this session's transaction
+            sess.expunge_all()
+            eq_(sess.query(User).get(7).name, 'ed')
+            eq_(len(cache), 0)
+        finally:
+            sess.rollback()
+        eq_(len(cache), 0)
+        eq_(create_session(identity_cache=cache).query(User).get(7).name, 'jack')
+        eq_(len(cache), 1)
+
+    def test_bulk_invalidates(self):
+        cache = IdentityCache()
+        sess = create_session(identity_cache=cache)
+        sess.query(User).all()
+        sess.query(Address).get(1)
+
+        sess = create_session(autocommit=False, identity_cache=cache)
+        try:
+            sess.query(User).filter(User.id == 7).update({'name':'ed'})
+            eq_(len(cache), 1)
+        finally:
+            sess.rollback()
+
 class TextTest(QueryTest):
     def test_fulltext(self):
         assert [User(id=7), User(id=8), User(id=9),User(id=10)] == create_session().query(User).from_statement("select * from users order by id").all()
@@ -4,11 +4,12 @@ import inspect
 import pickle
 from sqlalchemy.orm import create_session, sessionmaker, attributes
 from testlib import engines, sa, testing, config
-from testlib.sa import Table, Column, Integer, String, Sequence
-from testlib.sa.orm import mapper, relation, backref
+from testlib.sa import Table, Column, Integer, String, Sequence, ForeignKey
+from testlib.sa.orm import mapper, relation, backref, dynamic_loader
 from testlib.testing import eq_
 from engine import _base as engine_base
 from orm import _base, _fixtures
+from testlib.assertsql import CompiledSQL
 
 
 class SessionTest(_fixtures.FixtureTest):
@@ -741,6 +742,34 @@ class SessionTest(_fixtures.FixtureTest):
         assert s.is_modified(user)
         assert not s.is_modified(user, include_collections=False)
 
+    @testing.resolve_artifact_names
+    def test_dirty_tracking(self):
+        """test that modified states are recorded as they change, rather than found by scanning."""
+
+        s = create_session()
+        mapper(User, users, properties={'addresses':dynamic_loader(Address)})
+        mapper(Address, addresses)
+
+        for name in ('u1', 'u2', 'u3'):
+            s.add(User(name=name))
+        s.flush()
+        assert not s.identity_map._modified
+
+        u1, u2, u3 = s.query(User).order_by(User.name).all()
+        u2.name = 'u2modified'
+        eq_(s.identity_map._modified.keys(), [attributes.instance_state(u2)])
+        eq_(list(s.dirty), [u2])
+
+        u3.addresses.append(Address(email_address='u3@foo'))
+        eq_(set(s.dirty), set([u2, u3]))
+
+        s.expunge(u2)
+        eq_(list(s.dirty), [u3])
+        s.flush()
+        assert not s.dirty
+        assert not s.identity_map._modified
+        eq_(u3.addresses.count(), 1)
+
 
     @testing.resolve_artifact_names
     def test_weak_ref(self):
@@ -1106,6 +1135,168 @@ class SessionTest(_fixtures.FixtureTest):
         assert b in sess
         assert len(list(sess)) == 1
 
+class BulkTest(_fixtures.FixtureTest):
+    run_inserts = None
+
+    @testing.resolve_artifact_names
+    def setup_mappers(self):
+        mapper(User, users, properties={'addresses':relation(Address)})
+        mapper(Address, addresses)
+
+    @testing.resolve_artifact_names
+    def test_insert_mappings(self):
+        sess = create_session()
+        def go():
+            sess.bulk_insert_mappings(User, [dict(id=i, name='u%d' % i) for i in range(1, 11)])
+        self.assert_sql_count(testing.db, go, 1)
+        assert not sess.identity_map
+
+        sess.bulk_insert_mappings(sa.orm.class_mapper(User), [dict(name='u11'), dict(name='u12')])
+        eq_(sess.query(User).order_by(User.id).all(),
+            [User(id=i, name='u%d' % i) for i in range(1, 13)])
+
+    @testing.resolve_artifact_names
+    def test_update_mappings(self):
+        sess = create_session()
+        sess.bulk_insert_mappings(User, [dict(id=i, name='u%d' % i) for i in range(1, 5)])
+        def go():
+            sess.bulk_update_mappings(User, [dict(id=1, name='u1new'), dict(id=3, name='u3new'), dict(id=4)])
+        self.assert_sql_count(testing.db, go, 1)
+        eq_(sess.query(User).order_by(User.id).all(),
+            [User(id=1, name='u1new'), User(id=2, name='u2'), User(id=3, name='u3new'), User(id=4, name='u4')])
+
+        self.assertRaises(sa.exc.InvalidRequestError, sess.bulk_update_mappings, User, [dict(name='noid')])
+
+    @testing.resolve_artifact_names
+    def test_save_objects(self):
+        sess = create_session()
+        u1, u2 = User(id=1, name='u1'), User(id=2, name='u2')
+        sess.add_all([u1, u2])
+        sess.flush()
+
+        u1.name = 'u1new'
+        u3 = User(id=3, name='u3', addresses=[Address(email_address='a3')])
+        sess.bulk_save_objects([u1, u2, u3, Address(id=1, user_id=3, email_address='a1')])
+        assert u3 not in sess
+        assert u1 in sess.dirty
+
+        sess.clear()
+        eq_(sess.query(User).order_by(User.id).all(),
+            [User(id=1, name='u1new'), User(id=2, name='u2'), User(id=3, name='u3', addresses=[Address(email_address='a1')])])
+
+    @testing.resolve_artifact_names
+    def test_save_objects_dependency_order(self):
+        sess = create_session()
+        a1 = Address(id=1, user_id=1, email_address='a1')
+        u1 = User(id=1, name='u1')
+        self.assert_sql_execution(
+            testing.db,
+            lambda: sess.bulk_save_objects([a1, u1]),
+            CompiledSQL("INSERT INTO users (id, name) VALUES (:id, :name)",
+                        {'id': 1, 'name': 'u1'}),
+            CompiledSQL("INSERT INTO addresses (id, user_id, email_address) "
+                        "VALUES (:id, :user_id, :email_address)",
+                        {'id': 1, 'user_id': 1, 'email_address': 'a1'}))
+
+    @testing.resolve_artifact_names
+    def test_rollback(self):
+        sess = create_session(autocommit=False)
+        sess.bulk_insert_mappings(User, [dict(id=1, name='u1')])
+        self.assertRaises(sa.exc.DBAPIError, sess.bulk_insert_mappings, User, [dict(id=1, name='u1')])
+        sess.rollback()
+        eq_(sess.query(User).count(), 0)
+
+class BulkInheritanceTest(_base.MappedTest):
+    def define_tables(self, metadata):
+        Table('people', metadata,
+            Column('person_id', Integer, primary_key=True,
+                   test_needs_autoincrement=True),
+            Column('name', String(50)),
+            Column('type', String(30)))
+        Table('engineers', metadata,
+            Column('engineer_id', Integer, ForeignKey('people.person_id'),
+                   primary_key=True),
+            Column('language', String(50)))
+
+    def setup_classes(self):
+        class Person(_base.ComparableEntity):
+            pass
+        class Engineer(Person):
+            pass
+
+    @testing.resolve_artifact_names
+    def setup_mappers(self):
+        mapper(Person, people, polymorphic_on=people.c.type, polymorphic_identity='person')
+        mapper(Engineer, engineers, inherits=Person, polymorphic_identity='engineer')
+
+    @testing.resolve_artifact_names
+    def test_insert_update(self):
+        sess = create_session()
+        sess.bulk_insert_mappings(Engineer, [
+            dict(person_id=1, name='e1', language='python'),
+            dict(name='e2', language='java'),
+            dict(name='e3', language='c')])
+        sess.bulk_insert_mappings(Person, [dict(name='p4')])
+        eq_(sess.query(Person).order_by(Person.person_id).all(), [
+            Engineer(name='e1', language='python', type='engineer'),
+            Engineer(name='e2', language='java', type='engineer'),
+            Engineer(name='e3', language='c', type='engineer'),
+            Person(name='p4', type='person')])
+
+        sess.clear()
+        sess.bulk_update_mappings(Engineer, [
+            dict(person_id=1, language='c++'),
+            dict(person_id=2, name='e2new', language='perl')])
+        eq_(sess.query(Person).order_by(Person.person_id).all(), [
+            Engineer(name='e1', language='c++'),
+            Engineer(name='e2new', language='perl'),
+            Engineer(name='e3', language='c'),
+            Person(name='p4')])
+
+class BulkVersioningTest(_base.MappedTest):
+    def define_tables(self, metadata):
+        Table('versioned', metadata,
+            Column('id', Integer, primary_key=True),
+            Column('version_id', Integer, nullable=False),
+            Column('value', String(40)))
+
+    def setup_classes(self):
+        class Foo(_base.ComparableEntity):
+            pass
+
+    @testing.resolve_artifact_names
+    def setup_mappers(self):
+        mapper(Foo, versioned, version_id_col=versioned.c.version_id)
+
+    @testing.resolve_artifact_names
+    def test_update_mappings(self):
+        sess = create_session()
+        sess.bulk_insert_mappings(Foo, [dict(id=1, value='f1'), dict(id=2, value='f2')])
+        sess.bulk_update_mappings(Foo, [dict(id=1, version_id=1, value='f1new'),
+                                        dict(id=2, version_id=1, value='f2new')])
+        eq_(sess.query(Foo).order_by(Foo.id).all(),
+            [Foo(id=1, version_id=2, value='f1new'), Foo(id=2, version_id=2, value='f2new')])
+
+        self.assertRaises(sa.exc.InvalidRequestError,
+                          sess.bulk_update_mappings, Foo, [dict(id=1, value='noversion')])
+
+        if testing.db.dialect.supports_sane_multi_rowcount:
+            self.assertRaises(sa.orm.exc.ConcurrentModificationError,
+                              sess.bulk_update_mappings, Foo, [dict(id=1, version_id=1, value='stale')])
+            eq_(sess.query(Foo.value).filter_by(id=1).scalar(), 'f1new')
+
+    @testing.resolve_artifact_names
+    def test_save_objects(self):
+        sess = create_session()
+        f1 = Foo(id=1, value='f1')
+        sess.add(f1)
+        sess.flush()
+
+        f1.value = 'f1new'
+        sess.bulk_save_objects([f1])
+        sess.clear()
+        eq_(sess.query(Foo).one(), Foo(id=1, version_id=2, value='f1new'))
+
 class DisposedStates(testing.ORMTest):
     keep_mappers = True
     keep_tables = True
@@ -2,6 +2,7 @@ import testenv; testenv.configure_for_tests()
 import datetime, os
 from sqlalchemy import *
 from sqlalchemy import sql
+import sqlalchemy as sa
 from sqlalchemy.orm import *
 from sqlalchemy.orm.shard import ShardedSession
 from sqlalchemy.sql import operators
@@ -11,13 +12,17 @@ from testlib.testing import eq_
 # TODO: ShardTest can be turned into a base for further subclasses
 
 class ShardTest(TestBase):
+    concurrent = False
+
     def setUpAll(self):
         global db1, db2, db3, db4, weather_locations, weather_reports
 
-        db1 = create_engine('sqlite:///shard1.db')
-        db2 = create_engine('sqlite:///shard2.db')
-        db3 = create_engine('sqlite:///shard3.db')
-        db4 = create_engine('sqlite:///shard4.db')
+        # shard queries may run in worker threads
+        connect_args = {'check_same_thread':False}
+        db1 = create_engine('sqlite:///shard1.db', connect_args=connect_args)
+        db2 = create_engine('sqlite:///shard2.db', connect_args=connect_args)
+        db3 = create_engine('sqlite:///shard3.db', connect_args=connect_args)
+        db4 = create_engine('sqlite:///shard4.db', connect_args=connect_args)
 
         meta = MetaData()
         ids = Table('ids', meta,
@@ -88,7 +93,8 @@ class ShardTest(TestBase):
                             for bind in binary.right.clauses:
                                 ids.append(shard_lookup[bind.value])
 
-            FindContinent().traverse(query._criterion)
+            if query._criterion is not None:
+                FindContinent().traverse(query._criterion)
             if len(ids) == 0:
                 return ['north_america', 'asia', 'europe', 'south_america']
             else:
@@ -101,7 +107,8 @@ class ShardTest(TestBase):
             'asia':db2,
             'europe':db3,
             'south_america':db4
-        }, shard_chooser=shard_chooser, id_chooser=id_chooser, query_chooser=query_chooser)
+        }, shard_chooser=shard_chooser, id_chooser=id_chooser, query_chooser=query_chooser,
+        concurrent=self.concurrent)
 
 
     def setup_mappers(self):
@@ -123,6 +130,41 @@ class ShardTest(TestBase):
 
         mapper(Report, weather_reports)
 
+    def test_merge(self):
+        sess = create_session()
+        for id, continent, city, temperatures in [
+                (11, 'Asia', 'Tokyo', [80, 81]),
+                (12, 'North America', 'New York', [75]),
+                (13, 'Europe', 'London', [60, 61, 62]),
+                (14, 'North America', 'Toronto', [])]:
+            location = WeatherLocation(continent, city)
+            location.id = id
+            location.reports = [Report(t) for t in temperatures]
+            for report in location.reports:
+                report.report_time = datetime.datetime(2008, 10, 1)
+            sess.add(location)
+        sess.commit()
+
+        try:
+            sess = create_session()
+            q = sess.query(WeatherLocation)
+
+            # rows of an eagerly joined collection count along with their parent
+            eq_([(c.id, len(c.reports)) for c in
+                 q.options(eagerload('reports')).order_by(WeatherLocation.id).limit(2)],
+                [(11, 2), (12, 1)])
+            eq_([c.id for c in q.order_by(WeatherLocation.id).offset(1).limit(2)], [12, 13])
+            eq_(q.order_by(WeatherLocation.id).limit(0).all(), [])
+
+            eq_([c.id for c in q.order_by(func.abs(WeatherLocation.id - 13), WeatherLocation.id)],
+                [13, 12, 14, 11])
+            self.assertRaises(sa.exc.InvalidRequestError,
+                              q.order_by("weather_locations.city").all)
+        finally:
+            for db in (db1, db2, db3, db4):
+                db.execute(weather_reports.delete())
+                db.execute(weather_locations.delete())
+
     def test_roundtrip(self):
         tokyo = WeatherLocation('Asia', 'Tokyo')
         newyork = WeatherLocation('North America', 'New York')
@@ -157,7 +199,127 @@ class ShardTest(TestBase):
         asia_and_europe = sess.query(WeatherLocation).filter(WeatherLocation.continent.in_(['Europe', 'Asia']))
         eq_(set([c.city for c in asia_and_europe]), set(['Tokyo', 'London', 'Dublin']))
 
+        eq_([c.id for c in sess.query(WeatherLocation).order_by(WeatherLocation.id)], [1, 2, 3, 4, 5, 6, 7])
+        eq_([c.id for c in sess.query(WeatherLocation).order_by(WeatherLocation.id.desc()).limit(3)], [7, 6, 5])
+        eq_([c.id for c in sess.query(WeatherLocation).order_by(WeatherLocation.continent, WeatherLocation.id)[2:5]],
+            [5, 2, 3])
+        eq_(len(sess.query(WeatherLocation).limit(2).all()), 2)
+
+        sess = create_session(cache_negative_lookups=True)
+        key = sa.orm.util.identity_key(WeatherLocation, 7)
+        q = sess.query(WeatherLocation)
+        eq_(q.get(7).city, 'Quito')
+        eq_(sess._negative_lookups[key], set(['north_america', 'asia', 'europe']))
+        sess.expunge(q.get(7))
+        eq_(q.get(7).city, 'Quito')
+        assert q.get(100) is None
+        eq_(len(sess._negative_lookups[sa.orm.util.identity_key(WeatherLocation, 100)]), 4)
+        assert q.get(100) is None
+        self.assertRaises(sa.exc.InvalidRequestError, q.load, 100)
+        sess.expunge_all()
+        eq_(sess._negative_lookups, {})
+
+class ConcurrentShardTest(ShardTest):
+    concurrent = True
 
+    def test_roundtrip(self):
+        # the id_generator default can't be invoked by a concurrent flush
+        sess = create_session()
+        sess.add(WeatherLocation('Asia', 'Tokyo'))
+        sess.add(WeatherLocation('Europe', 'London'))
+        self.assertRaises(sa.exc.InvalidRequestError, sess.flush)
+
+    def test_flush(self):
+        sess = create_session()
+        locations = {}
+        for id, continent, city in [
+                (21, 'North America', 'New York'),
+                (22, 'North America', 'Toronto'),
+                (23, 'Asia', 'Tokyo'),
+                (24, 'Europe', 'London'),
+                (25, 'Europe', 'Dublin'),
+                (26, 'South America', 'Quito')]:
+            location = WeatherLocation(continent, city)
+            location.id = id
+            report = Report(id * 2)
+            report.report_time = datetime.datetime(2008, 10, 1)
+            location.reports.append(report)
+            sess.add(location)
+            locations[city] = location
+
+        try:
+            sess.flush()
+
+            # keys generated by each shard are applied to the instances
+            for location in locations.values():
+                report = location.reports[0]
+                eq_((report.id, report.location_id),
+                    tuple(sess.connection(instance=location).execute(
+                        select([weather_reports.c.id, weather_reports.c.location_id],
+                               weather_reports.c.temperature == location.id * 2)).fetchone()))
+            sess.commit()
+
+            sess = create_session()
+            locations = dict((c.city, c) for c in sess.query(WeatherLocation))
+            locations['Tokyo'].city = 'Kyoto'
+            locations['Toronto'].city = 'Ottawa'
+            locations['Dublin'].city = 'Cork'
+            sess.delete(locations['London'])
+            sess.commit()
+            eq_([db.execute(select([weather_locations.c.city], order_by=weather_locations.c.id)).fetchall()
+                 for db in (db1, db2, db3, db4)],
+                [[('New York',), ('Ottawa',)], [('Kyoto',)], [('Cork',)], [('Quito',)]])
+            eq_(db3.execute(select([weather_reports.c.location_id], order_by=weather_reports.c.id)).fetchall(),
+                [(None,), (25,)])
+        finally:
+            for db in (db1, db2, db3, db4):
+                db.execute(weather_reports.delete())
+                db.execute(weather_locations.delete())
+
+    def test_get_first_hit(self):
+        db1.execute(weather_locations.insert(), id=41, continent='North America', city='Ottawa')
+        # a connection apart from the Engine's pool
+        lock = db4.dialect.dbapi.connect("shard4.db", isolation_level=None)
+        try:
+            # the probe of south_america waits on the lock, which get()
+            # doesn't wait for as an earlier shard has the row
+            lock.execute("BEGIN EXCLUSIVE")
+            sess = create_session()
+            ottawa = sess.query(WeatherLocation).get(41)
+            eq_(ottawa.id, 41)
+            eq_(len(sess._pending_probes), 1)
+            lock.execute("ROLLBACK")
+
+            # the Session's Connections are used once the probe completes
+            eq_(ottawa.city, 'Ottawa')
+            eq_(sess._pending_probes, [])
+            sess.close()
+
+            self.assertRaises(TypeError, sess.query(WeatherLocation).get, 41, populate_existing=True)
+        finally:
+            lock.close()
+            db1.execute(weather_locations.delete())
+
+    def test_thread_pool(self):
+        sess = create_session(max_threads=2)
+        for id, continent, city in [
+                (31, 'North America', 'New York'),
+                (32, 'Asia', 'Tokyo'),
+                (33, 'Europe', 'London'),
+                (34, 'South America', 'Quito')]:
+            location = WeatherLocation(continent, city)
+            location.id = id
+            sess.add(location)
+        try:
+            sess.commit()
+            # threads are shared among queries and flushes, up to max_threads
+            for i in range(5):
+                eq_([c.id for c in sess.query(WeatherLocation).order_by(WeatherLocation.id)],
+                    [31, 32, 33, 34])
+            eq_(sess._thread_pool._threads, 2)
+        finally:
+            for db in (db1, db2, db3, db4):
+                db.execute(weather_locations.delete())
 
 if __name__ == '__main__':
     testenv.main()
@@ -282,6 +282,49 @@ class SavepointTest(TransactionTest):
         assert u2.name == 'jack'
         self.assertEquals(s.query(User.name).order_by(User.id).all(), [('ed',), ('jack',)])
 
+    @testing.requires.savepoints
+    def test_savepoint_rollback_expires_altered(self):
+        s = self.session()
+        u1, u2, u3 = User(name='ed'), User(name='jack'), User(name='wendy')
+        s.add_all([u1, u2, u3])
+        s.commit()
+        for u in (u1, u2, u3):
+            u.name
+
+        s.begin_nested()
+        u1.name = 'edward'
+        s.flush()
+        u2.name = 'jackward'
+        s.begin_nested()
+        u4 = User(name='foo')
+        s.add(u4)
+        s.commit()
+        s.rollback()
+
+        assert 'name' not in u1.__dict__
+        assert 'name' not in u2.__dict__
+        assert u3.__dict__['name'] == 'wendy'
+        assert u4 not in s
+        assert u1.name == 'ed'
+        assert u2.name == 'jack'
+
+    @testing.requires.savepoints
+    def test_savepoint_rollback_expires_loaded(self):
+        s = self.session()
+        u1 = User(name='ed')
+        s.add(u1)
+        s.commit()
+        u1.name
+
+        s.begin_nested()
+        s.execute(addresses.insert(), dict(email_address='a1', user_id=u1.id))
+        # lazily loaded from a row inserted within the SAVEPOINT
+        assert [a.email_address for a in u1.addresses] == ['a1']
+        s.rollback()
+
+        assert 'addresses' not in u1.__dict__
+        assert u1.addresses == []
+
     @testing.requires.savepoints
     def test_savepoint_commit(self):
         s = self.session()
@@ -4,7 +4,7 @@
 import testenv; testenv.configure_for_tests()
 import datetime
 import operator
-from sqlalchemy.orm import mapper as orm_mapper
+from sqlalchemy.orm import mapper as orm_mapper, unitofwork
 
 from testlib import engines, sa, testing
 from testlib.sa import Table, Column, Integer, String, ForeignKey, literal_column
@@ -408,6 +408,39 @@ class MutableTypesTest(_base.MappedTest):
         self.sql_count_(0, session.commit)
 
 
+class DigestMutableTypesTest(MutableTypesTest):
+    """MutableTypesTest, comparing digests of pickles rather than copies."""
+
+    def define_tables(self, metadata):
+        Table('mutable_t', metadata,
+            Column('id', Integer, primary_key=True,
+                   test_needs_autoincrement=True),
+            Column('data', sa.PickleType(digest=True)),
+            Column('val', sa.Unicode(30)))
+
+    @testing.resolve_artifact_names
+    def test_no_copy(self):
+        f1 = Foo(data={'x':[1, 2, 3]})
+        session = create_session(autocommit=False)
+        session.add(f1)
+        session.commit()
+
+        state = sa.orm.attributes.instance_state(f1)
+        assert 'data' not in state.committed_state
+        assert isinstance(state.committed_digests['data'], str)
+        self.sql_count_(0, session.commit)
+
+        f1.data['x'].append(4)
+        assert f1 in session.dirty
+        eq_(sa.orm.attributes.get_history(state, 'data'),
+            ([{'x':[1, 2, 3, 4]}], (), ()))
+        self.sql_count_(1, session.commit)
+
+        f1.data = None
+        self.sql_count_(1, session.commit)
+        self.sql_count_(0, session.commit)
+        session.close()
+
 class PickledDicts(_base.MappedTest):
 
     def define_tables(self, metadata):
@@ -1292,6 +1325,41 @@ class OneToManyTest(_fixtures.FixtureTest):
         session.add(u)
         session.flush()
 
+    @testing.resolve_artifact_names
+    def test_sort_cached(self):
+        """The mapper-level dependency sort is reused by later flushes."""
+
+        mapper(User, users, properties={
+            'addresses':relation(mapper(Address, addresses), backref='user')})
+
+        sorts = []
+        sort_with_cycles = unitofwork.topological.sort_with_cycles
+        def counting_sort(*args):
+            sorts.append(args)
+            return sort_with_cycles(*args)
+        unitofwork.topological.sort_with_cycles = counting_sort
+        try:
+            session = create_session()
+            u = User(name='u1', addresses=[Address(email_address='a1')])
+            session.add(u)
+            session.flush()
+            eq_(len(sorts), 1)
+
+            u.addresses.append(Address(email_address='a2'))
+            u.name = 'u2'
+            session.flush()
+            eq_(len(sorts), 1)
+
+            session = create_session()
+            session.add(User(name='u3', addresses=[Address(email_address='a3')]))
+            session.flush()
+            eq_(len(sorts), 1)
+        finally:
+            unitofwork.topological.sort_with_cycles = sort_with_cycles
+
+        eq_(users.count().scalar(), 2)
+        eq_(addresses.count().scalar(), 3)
+
 class SaveTest(_fixtures.FixtureTest):
     run_inserts = None
 
@@ -1570,6 +1638,77 @@ class SaveTest(_fixtures.FixtureTest):
         session.add_all((u1, u2))
         self.assertRaises(AssertionError, session.flush)
 
+    @testing.resolve_artifact_names
+    def test_delete_chunked(self):
+        mapper(User, users)
+        session = create_session()
+        session.add_all([User(name='user%d' % i) for i in range(7)])
+        session.flush()
+
+        for u in session.query(User):
+            session.delete(u)
+        testing.db.dialect.max_bind_params = 3
+        try:
+            # 7 rows in chunks of 3
+            self.assert_sql_count(testing.db, session.flush, 3)
+        finally:
+            del testing.db.dialect.max_bind_params
+        eq_(users.count().scalar(), 0)
+
+    @testing.resolve_artifact_names
+    def test_delete_chunked_rowcount(self):
+        mapper(User, users)
+        session = create_session()
+        session.add_all([User(name='user1'), User(name='user2')])
+        session.flush()
+
+        for u in session.query(User):
+            session.delete(u)
+        users.delete(users.c.name == 'user1').execute()
+        self.assertRaises(sa.orm.exc.ConcurrentModificationError, session.flush)
+
+
+class SequencePrefetchTest(_base.ORMTest):
+    """Primary keys from Sequence(prefetch=N), against a mock DB-API."""
+
+    def test_batched_insert(self):
+        engine = engines.sequence_engine(increments={'parent_seq': 10, 'child_seq': 10})
+        dbapi = engine.dialect.dbapi
+        metadata = sa.MetaData()
+        parent = Table('parent', metadata,
+            Column('id', Integer, sa.Sequence('parent_seq', prefetch=10), primary_key=True),
+            Column('data', String(30)))
+        child = Table('child', metadata,
+            Column('id', Integer, sa.Sequence('child_seq', prefetch=10), primary_key=True),
+            Column('parent_id', Integer, ForeignKey('parent.id')),
+            Column('data', String(30)))
+
+        class Parent(_base.ComparableEntity):
+            pass
+        class Child(_base.ComparableEntity):
+            pass
+        mapper(Parent, parent, properties={'children':relation(Child)})
+        mapper(Child, child)
+
+        sess = create_session(bind=engine)
+        p1 = Parent(data='p1', children=[Child(data='c%d' % i) for i in range(3)])
+        p2 = Parent(data='p2', children=[Child(data='c3')])
+        sess.add_all([p1, p2])
+        sess.flush()
+
+        eq_([p1.id, p2.id], [1, 2])
+        eq_([c.id for c in p1.children + p2.children], [1, 2, 3, 4])
+        eq_([(stmt, params) for stmt, params in dbapi.statements
+             if stmt.startswith('INSERT')],
+            [('INSERT INTO parent (id, data) VALUES (%(id)s, %(data)s)',
+              [{'id': 1, 'data': 'p1'}, {'id': 2, 'data': 'p2'}]),
+             ('INSERT INTO child (id, parent_id, data) VALUES (%(id)s, %(parent_id)s, %(data)s)',
+              [{'id': 1, 'parent_id': 1, 'data': 'c0'}, {'id': 2, 'parent_id': 1, 'data': 'c1'},
+               {'id': 3, 'parent_id': 1, 'data': 'c2'}, {'id': 4, 'parent_id': 2, 'data': 'c3'}])])
+        eq_(len([stmt for stmt, params in dbapi.statements
+                 if stmt.startswith('select nextval')]), 2)
+        assert sess.query(Parent).get(1) is p1
+
 
 class ManyToOneTest(_fixtures.FixtureTest):
     run_inserts = None
@@ -1841,6 +1980,94 @@ class ManyToManyTest(_fixtures.FixtureTest):
         session.delete(objects[3])
         session.flush()
 
+    @testing.resolve_artifact_names
+    def test_ordered_flush(self):
+        mapper(Keyword, keywords)
+        mapper(Item, items, properties=dict(
+            keywords = relation(Keyword, item_keywords),
+            ))
+
+        session = create_session(ordered_flush=True)
+        i = Item(description='i1')
+        kws = [Keyword(name='k%d' % n) for n in range(4)]
+        i.keywords.extend(kws)
+        session.add(i)
+        session.flush()
+
+        i.keywords.remove(kws[3])
+        i.keywords.remove(kws[1])
+        k4, k5 = Keyword(name='k4'), Keyword(name='k5')
+        session.add_all([k4, k5])
+        i.keywords.extend([k5, k4])
+        kws[3].name = 'k3b'
+        kws[0].name = 'k0b'
+
+        self.assert_sql_execution(
+            testing.db,
+            session.flush,
+            CompiledSQL("UPDATE keywords SET name=:name "
+                     "WHERE keywords.id = :keywords_id",
+                     lambda ctx: {'name': 'k0b', 'keywords_id': kws[0].id}),
+            CompiledSQL("UPDATE keywords SET name=:name "
+                     "WHERE keywords.id = :keywords_id",
+                     lambda ctx: {'name': 'k3b', 'keywords_id': kws[3].id}),
+            CompiledSQL("INSERT INTO keywords (name) VALUES (:name)",
+                    {'name': 'k4'}),
+            CompiledSQL("INSERT INTO keywords (name) VALUES (:name)",
+                    {'name': 'k5'}),
+            # row by row rather than with a single multi-row DELETE
+            CompiledSQL("DELETE FROM item_keywords WHERE "
+                     "item_keywords.item_id = :item_id AND "
+                     "item_keywords.keyword_id = :keyword_id",
+                     lambda ctx: {'item_id': i.id, 'keyword_id': kws[1].id}),
+            CompiledSQL("DELETE FROM item_keywords WHERE "
+                     "item_keywords.item_id = :item_id AND "
+                     "item_keywords.keyword_id = :keyword_id",
+                     lambda ctx: {'item_id': i.id, 'keyword_id': kws[3].id}),
+            CompiledSQL("INSERT INTO item_keywords (item_id, keyword_id) "
+                    "VALUES (:item_id, :keyword_id)",
+                    lambda ctx: [{'item_id': i.id, 'keyword_id': k4.id},
+                                 {'item_id': i.id, 'keyword_id': k5.id}]))
+
+        i.keywords.remove(k4)
+        i.keywords.remove(k5)
+        session.flush()
+        session.delete(k5)
+        session.delete(k4)
+        self.assert_sql_execution(
+            testing.db,
+            session.flush,
+            CompiledSQL("DELETE FROM keywords WHERE keywords.id = :id",
+                     lambda ctx: [{'id': k4.id}, {'id': k5.id}]))
+
+    @testing.resolve_artifact_names
+    def test_secondary_batch_size(self):
+        mapper(Keyword, keywords)
+        mapper(Item, items, properties=dict(
+            keywords = relation(Keyword, item_keywords, secondary_batch_size=2),
+            ))
+
+        session = create_session()
+        i = Item(description='i1')
+        kws = [Keyword(name='k%d' % n) for n in range(5)]
+        session.add(i)
+        session.add_all(kws)
+        session.flush()
+
+        i.keywords.extend(kws)
+        self.sql_count_(3, session.flush)
+        eq_(testing.db.scalar(item_keywords.count()), 5)
+
+        i.keywords = []
+        self.sql_count_(3, session.flush)
+        eq_(testing.db.scalar(item_keywords.count()), 0)
+
+    @testing.resolve_artifact_names
+    def test_secondary_batch_size_invalid(self):
+        for size in (0, -1):
+            self.assertRaises(sa.exc.ArgumentError,
+                              relation, Keyword, item_keywords, secondary_batch_size=size)
+
     @testing.resolve_artifact_names
     def test_many_to_many_remove(self):
         """Setting a collection to empty deletes many-to-many rows.
@@ -0,0 +1,107 @@
+import testenv; testenv.configure_for_tests()
+from sqlalchemy.orm.uowprofiler import FlushProfiler
+from testlib import engines, sa, testing
+from testlib.sa.orm import mapper, relation, create_session
+from testlib.testing import eq_
+from orm import _fixtures
+
+
+class FlushProfilerTest(_fixtures.FixtureTest):
+    run_inserts = None
+
+    @testing.resolve_artifact_names
+    def setup_mappers(self):
+        mapper(User, users, properties={
+            'addresses':relation(Address, backref='user', order_by=addresses.c.id)})
+        mapper(Address, addresses)
+        mapper(Keyword, keywords)
+        mapper(Item, items, properties={
+            'keywords':relation(Keyword, item_keywords)})
+
+    @testing.resolve_artifact_names
+    def test_profile(self):
+        profiler = FlushProfiler()
+        sess = create_session(extension=profiler)
+        assert profiler.last is None
+
+        u = User(name='u1', addresses=[Address(email_address='a1'), Address(email_address='a2')])
+        i = Item(description='i1', keywords=[Keyword(name='k1'), Keyword(name='k2')])
+        sess.add_all([u, i])
+        sess.flush()
+
+        profile = profiler.last
+        eq_(sorted(profile.phases.keys()),
+            ['execute', 'finalize', 'preprocess', 'register', 'sort'])
+        assert profile.duration >= sum(profile.phases.values()) * 0.99
+
+        eq_(sorted(str(m) for m in profile.mappers),
+            ['Mapper|Address|addresses', 'Mapper|Item|items',
+             'Mapper|Keyword|keywords', 'Mapper|User|users'])
+        eq_(sorted(str(p) for p in profile.relations),
+            ['Address.user', 'Item.keywords', 'User.addresses'])
+
+        eq_(profile.statements, {users: 1, addresses: 2, items: 1, keywords: 2, item_keywords: 1})
+        eq_(profile.rows, {users: 1, addresses: 2, items: 1, keywords: 2, item_keywords: 2})
+        eq_((profile.total_statements, profile.total_rows), (7, 8))
+        assert 'table item_keywords: 1 statements, 2 rows' in profile.summary()
+
+        sess.delete(u)
+        for a in u.addresses:
+            sess.delete(a)
+        sess.flush()
+        eq_(len(profiler.profiles), 2)
+        eq_(profiler.last.statements, {users: 1, addresses: 1})
+        eq_(profiler.last.rows, {users: 1, addresses: 2})
+
+    @testing.resolve_artifact_names
+    def test_history(self):
+        profiler = FlushProfiler(history=2)
+        sess = create_session(extension=profiler)
+        for name in ('u1', 'u2', 'u3'):
+            sess.add(User(name=name))
+            sess.flush()
+        eq_(len(profiler.profiles), 2)
+
+        # no flush occurs
+        sess.flush()
+        eq_(len(profiler.profiles), 2)
+
+        profiler.clear()
+        assert profiler.last is None
+
+    def test_sequence_prefetch(self):
+        engine = engines.sequence_engine(increments={'parent_seq': 10})
+        metadata = sa.MetaData()
+        parent = sa.Table('parent', metadata,
+            sa.Column('id', sa.Integer, sa.Sequence('parent_seq', prefetch=10), primary_key=True),
+            sa.Column('data', sa.String(30)))
+        class Parent(object):
+            pass
+        mapper(Parent, parent)
+
+        profiler = FlushProfiler()
+        sess = create_session(bind=engine, extension=profiler)
+        for i in range(3):
+            p = Parent()
+            p.data = 'p%d' % i
+            sess.add(p)
+        sess.flush()
+
+        # the block of keys is fetched with a single statement, counted
+        # with the statements of its table
+        eq_(profiler.last.statements, {parent: 2})
+        eq_(profiler.last.rows, {parent: 3})
+
+        for i in range(3):
+            p = Parent()
+            p.data = 'p%d' % (i + 3)
+            sess.add(p)
+        sess.flush()
+
+        # keys are handed out from the block without SQL
+        eq_(profiler.last.statements, {parent: 1})
+        eq_(profiler.last.rows, {parent: 3})
+
+
+if __name__ == "__main__":
+    testenv.main()
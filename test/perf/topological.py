@@ -0,0 +1,54 @@
+import testenv; testenv.simple_setup()
+import random, sys, time
+
+from sqlalchemy import topological
+
+# times the topological sorts over synthetic graphs of increasing size.
+# each should grow roughly linearly with the number of nodes.
+
+def adjacency_tree(n, fanout=5):
+    """a tree of n nodes, as produced by a flush of self-referential rows."""
+
+    return [(i // fanout, i) for i in xrange(1, n)], range(n)
+
+def chain_with_cycles(n, length=10):
+    """a chain of n nodes, in which every run of length nodes forms a cycle."""
+
+    tuples = [(i, i + 1) for i in xrange(n - 1)]
+    tuples += [(i + length - 1, i) for i in xrange(0, n - length, length)]
+    return tuples, range(n)
+
+def random_dag(n, edges_per_node=3):
+    """n nodes with random edges, all pointing from lower to higher numbers."""
+
+    r = random.Random(n)
+    tuples = []
+    for i in xrange(1, n):
+        for j in xrange(edges_per_node):
+            tuples.append((r.randrange(i), i))
+    return tuples, range(n)
+
+def timed(fn, *args):
+    now = time.time()
+    fn(*args)
+    return time.time() - now
+
+def run(sizes):
+    for name, graph, sort in (
+            ('sort, random dag', random_dag, topological.sort),
+            ('sort_as_tree, adjacency tree', adjacency_tree, topological.sort_as_tree),
+            ('sort_with_cycles, chain of cycles', chain_with_cycles, topological.sort_with_cycles),
+            ('sort_as_tree, chain of cycles', chain_with_cycles,
+             lambda tuples, allitems: topological.sort_as_tree(tuples, allitems, with_cycles=True)),
+        ):
+        print name
+        for n in sizes:
+            tuples, allitems = graph(n)
+            print "  %8d nodes %8d edges: %.3f sec" % (n, len(tuples), timed(sort, tuples, allitems))
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        sizes = [int(x) for x in sys.argv[1:]]
+    else:
+        sizes = [1000, 10000, 100000]
+    run(sizes)
@@ -1,8 +1,9 @@
 import testenv; testenv.configure_for_tests()
 import datetime
+import threading
 from sqlalchemy import Sequence, Column, func
 from sqlalchemy.sql import select, text
-from testlib import sa, testing
+from testlib import sa, testing, engines
 from testlib.sa import MetaData, Table, Integer, String, ForeignKey, Boolean
 from testlib.testing import eq_
 from sql import _base
@@ -630,5 +631,64 @@ class SequenceTest(testing.TestBase):
         metadata.drop_all()
 
 
+class SequencePrefetchTest(testing.TestBase):
+    """Sequence(prefetch=N) against a mock DB-API."""
+
+    def setUp(self):
+        global engine, dbapi, seqtable
+        engine = engines.sequence_engine(increments={'seq_id_seq': 10})
+        dbapi = engine.dialect.dbapi
+        seqtable = Table('seqtable', MetaData(),
+            Column('id', Integer, Sequence('seq_id_seq', prefetch=10), primary_key=True),
+            Column('data', String(30)))
+
+    def _nextvals(self):
+        return len([s for s, p in dbapi.statements if s.startswith('select nextval')])
+
+    def test_arguments(self):
+        eq_(Sequence('s', prefetch=5).increment, 5)
+        self.assertRaises(sa.exc.ArgumentError, Sequence, 's', prefetch=5, increment=1)
+        self.assertRaises(sa.exc.ArgumentError, Sequence, 's', prefetch=0)
+
+    def test_create(self):
+        seqtable.c.id.default.create(bind=engine, checkfirst=False)
+        eq_(dbapi.statements[-1][0], 'CREATE SEQUENCE seq_id_seq INCREMENT BY 10')
+
+    def test_blocks(self):
+        seq = seqtable.c.id.default
+        eq_([engine.execute(seq) for i in range(25)], range(1, 26))
+        eq_(self._nextvals(), 3)
+
+        # blocks are reserved per engine
+        other = engines.sequence_engine()
+        other.dialect.dbapi.sequences['seq_id_seq'] = 31
+        eq_(other.execute(seq), 31)
+        eq_(engine.execute(seq), 26)
+
+    def test_threads(self):
+        seq = seqtable.c.id.default
+        values = []
+        def go():
+            for i in range(50):
+                values.append(engine.execute(seq))
+        threads = [threading.Thread(target=go) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        eq_(sorted(values), range(1, 201))
+        eq_(self._nextvals(), 20)
+
+    def test_executemany(self):
+        engine.execute(seqtable.insert(), [{'data': 'd%d' % i} for i in range(3)])
+        eq_(dbapi.statements[-1],
+            ('INSERT INTO seqtable (id, data) VALUES (%(id)s, %(data)s)',
+             [{'id': 1, 'data': 'd0'}, {'id': 2, 'data': 'd1'}, {'id': 3, 'data': 'd2'}]))
+
+        r = engine.execute(seqtable.insert(), data='d3')
+        eq_(r.last_inserted_ids(), [4])
+        eq_(self._nextvals(), 1)
+
+
 if __name__ == "__main__":
     testenv.main()
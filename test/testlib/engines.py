@@ -154,6 +154,71 @@ def mock_engine(db=None):
     engine.mock = buffer
     return engine
 
+class SequenceDBAPI(object):
+    """A DB-API module recording the statements executed against it.
+
+    ``nextval()`` on any sequence returns values starting at 1, advancing
+    by the increment given in ``increments`` for the sequence name, or 1.
+    Other statements produce no rows.
+
+    """
+
+    paramstyle = 'pyformat'
+
+    def __init__(self, increments=None):
+        self.increments = increments or {}
+        self.sequences = {}
+        self.statements = []
+
+    def connect(self, *args, **kwargs):
+        return SequenceConnection(self)
+
+class SequenceConnection(object):
+    def __init__(self, dbapi):
+        self.dbapi = dbapi
+    def cursor(self):
+        return SequenceCursor(self.dbapi)
+    def commit(self):
+        pass
+    def rollback(self):
+        pass
+    def close(self):
+        pass
+
+class SequenceCursor(object):
+    def __init__(self, dbapi):
+        self.dbapi = dbapi
+        self.description = None
+        self.rowcount = -1
+        self.row = None
+    def execute(self, statement, parameters=None):
+        import re
+        self.dbapi.statements.append((statement, parameters))
+        m = re.match(r"select nextval\('(\w+)'\)", statement)
+        if m:
+            name = m.group(1)
+            self.row = (self.dbapi.sequences.get(name, 1),)
+            self.dbapi.sequences[name] = self.row[0] + self.dbapi.increments.get(name, 1)
+            self.description = [('nextval', None, None, None, None, None, None)]
+        else:
+            self.rowcount = 1
+    def executemany(self, statement, parameters):
+        parameters = list(parameters)
+        self.dbapi.statements.append((statement, parameters))
+        self.rowcount = len(parameters)
+    def fetchone(self):
+        row, self.row = self.row, None
+        return row
+    def close(self):
+        pass
+
+def sequence_engine(increments=None):
+    """Produce a Postgres engine against a SequenceDBAPI, available as
+    ``engine.dialect.dbapi``."""
+
+    from sqlalchemy import create_engine
+    return create_engine('postgres://', module=SequenceDBAPI(increments))
+
 class ReplayableSession(object):
     """A simple record/playback tool.
 